@@ -13,11 +13,9 @@ The test will:
 import argparse
 import csv
 import logging
-import os
 import sys
 import textwrap
 from pathlib import Path
-from tempfile import NamedTemporaryFile
 from typing import Any, Dict, List, Optional
 
 import serial
@@ -25,10 +23,14 @@ import serial
 from .arduino_binaries import STOCK_FW, TEST_FW
 from .arduino_flash import SUPPORTED_VID_PIDS, flash_arduino, get_avrdude_path
 from .hal import discover_boards
+from .results_log import prepare_log
+from .timing import PhaseTimer, TimingSummary, timing_fieldnames
 
 logger = logging.getLogger("arduino_test")
 
 BAUDRATE = 19200  # NOTE: This needs to match the baudrate in the test sketch
+# The phases of the test that are timed
+PHASES = ['discovery', 'asset', 'flash_test', 'capture', 'flash_stock']
 
 
 def parse_test_output(test_output: List[str], results: Dict[str, Any]) -> bool:
@@ -91,13 +93,16 @@ def test_arduino(
     avrdude: Path,
     test_sketch_hex: Path,
     stock_fw_hex: Path,
+    summary: Optional[TimingSummary] = None,
 ) -> None:
     """Test an arduino."""
     results: Dict[str, Any] = {}
     serial_port: Optional[serial.Serial] = None
+    timer = PhaseTimer()
 
     # Find arduino port
-    ports = discover_boards(SUPPORTED_VID_PIDS)
+    with timer.phase('discovery'):
+        ports = discover_boards(SUPPORTED_VID_PIDS)
     if len(ports) == 0:
         logger.error("No arduinos found.")
         return
@@ -109,40 +114,47 @@ def test_arduino(
         results['serial'] = serial_num
         results['passed'] = False  # default to failure
         if collect_asset:
-            asset_tag = input("Enter the asset tag: ")
+            with timer.phase('asset'):
+                asset_tag = input("Enter the asset tag: ")
             results['asset'] = asset_tag
 
         # Flash arduino with test sketch
-        flash_arduino(avrdude, arduino.port, test_sketch_hex)
+        with timer.phase('flash_test'):
+            flash_arduino(avrdude, arduino.port, test_sketch_hex)
         logger.info(f"Flashed {test_sketch_hex} to {arduino.port}")
 
         logger.info(f"Opening serial port {arduino.port}")
-        serial_port = serial.Serial(
-            port=arduino.port,
-            baudrate=BAUDRATE,
-            timeout=2,
-        )
-
-        try:
-            *lines_bytes, test_summary_bytes = serial_port.readlines()
-            lines = [line.decode('utf-8').strip() for line in lines_bytes]
-            test_summary = test_summary_bytes.decode('utf-8').strip()
-        except serial.SerialTimeoutException:
-            logger.error("Timed out waiting for test output")
-            raise AssertionError("Timed out waiting for test output")
-        finally:
-            serial_port.close()
+        with timer.phase('capture'):
+            serial_port = serial.Serial(
+                port=arduino.port,
+                baudrate=BAUDRATE,
+                timeout=2,
+            )
+
+            try:
+                *lines_bytes, test_summary_bytes = serial_port.readlines()
+                lines = [line.decode('utf-8').strip() for line in lines_bytes]
+                test_summary = test_summary_bytes.decode('utf-8').strip()
+            except serial.SerialTimeoutException:
+                logger.error("Timed out waiting for test output")
+                raise AssertionError("Timed out waiting for test output")
+            finally:
+                serial_port.close()
 
         assert parse_test_output(lines, results), "Failed analog tests"
         # Test summary only contains content when there are failures
         assert test_summary == "TEST COMPLETE", test_summary
 
         # Flash arduino with stock firmware
-        flash_arduino(avrdude, arduino.port, stock_fw_hex)
+        with timer.phase('flash_stock'):
+            flash_arduino(avrdude, arduino.port, stock_fw_hex)
 
         logger.info("Board passed")
         results['passed'] = True
     finally:
+        timer.save(results)
+        if summary is not None:
+            summary.add(timer)
         output_writer.writerow(results)
         if serial_port is not None:
             serial_port.close()
@@ -150,7 +162,6 @@ def test_arduino(
 
 def main(args: argparse.Namespace) -> None:
     """Main function for the arduino test."""
-    new_log = True
     fieldnames = ['asset', 'serial', 'passed', 'stuck_pins']
     fieldnames += [f'PIN-{n}_source' for n in range(3, 13)]
     fieldnames += [f'PIN-{n}_sink' for n in range(3, 13)]
@@ -161,6 +172,7 @@ def main(args: argparse.Namespace) -> None:
         for lvl in ('mid', 'high', 'low')
         for n in range(0, 6)
     ]
+    fieldnames += timing_fieldnames(PHASES)
 
     try:
         avrdude = get_avrdude_path()
@@ -177,13 +189,9 @@ def main(args: argparse.Namespace) -> None:
         logger.error(f"Stock firmware not found: {args.stock_fw_hex}")
         sys.exit(1)
 
-    if args.log:
-        logfile = args.log
-        if os.path.exists(logfile):
-            new_log = False
-    else:
-        logfile = NamedTemporaryFile(delete=False).name
+    logfile, new_log = prepare_log(args.log, fieldnames)
 
+    summary = TimingSummary()
     with open(logfile, 'a', newline='') as csvfile:
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         if new_log:
@@ -197,6 +205,7 @@ def main(args: argparse.Namespace) -> None:
                     avrdude,
                     args.test_hex,
                     args.stock_fw_hex,
+                    summary,
                 )
             except AssertionError as e:
                 logger.error(f"Test failed: {e}")
@@ -205,6 +214,8 @@ def main(args: argparse.Namespace) -> None:
             if result.lower() != 'y':
                 break
 
+    for line in summary.format():
+        logger.info(line)
     logger.info(f"Test results saved to {logfile}")
 
 
@@ -0,0 +1,536 @@
+"""
+HAL and board test benchmarks.
+
+Run a set of benchmarks against simulated boards and record the results in a
+JSON history file so the performance of different commits can be compared.
+
+The benchmarks measure:
+- SerialWrapper.query latency and throughput
+- Query throughput of several threads sharing a board, with and without the multiplexer
+- PowerStatus and MotorStatus status parsing rates
+- Output current reads and servo moves through the HAL, with pre-encoded commands
+  and with the string commands used before the codec
+- discover_boards scan time on this machine
+- End-to-end wall time of the power, motor and servo board tests
+
+With --replay, the board tests are run against a session recorded from real boards
+with --record-session instead of the simulators, reproducing the real boards'
+responses and timing.
+
+Each run is compared against the most recent run in the history file with the
+same transport, latency, iterations, replay session and clock, as runs with
+different settings can't be compared.
+Metrics ending in '_per_s' are better when higher, all others are better when lower.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import textwrap
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from . import motor_test, power_test, servo_test
+from ._version import version
+from .hal import discover_boards
+from .hal.clock import Clock, VirtualClock, use_clock
+from .hal.discovery import Port, clear_discovery_cache
+from .hal.motor_board import MotorStatus
+from .hal.power_board import VIDPID as POWER_VIDPID
+from .hal.power_board import PowerBoard, PowerStatus
+from .hal.serial_wrapper import SerialWrapper
+from .hal.servo_board import START_DUTY_MAX, START_DUTY_MIN, ServoBoard
+from .hal.utils import BoardIdentity, map_to_int
+from .parallel import unattended
+from .simulator import (
+    PtyTransport,
+    SimulatedBoard,
+    SimulatedMotorBoard,
+    SimulatedPowerBoard,
+    SimulatedServoBoard,
+    SimulatorTransport,
+    SocketTransport,
+    replay_ports,
+)
+
+logger = logging.getLogger("benchmark")
+
+Results = Dict[str, float]
+
+
+class BenchmarkContext:
+    """
+    The settings shared by all the benchmarks in a run.
+
+    :param transport: The simulator transport to use, 'pty' or 'socket'.
+    :param latency: The simulated board response latency, in seconds.
+    :param iterations: The number of iterations for the repeated benchmarks.
+    :param replay: A recorded session to run the board tests against instead of
+        the simulators.
+    :param replay_speed: The factor to speed up the replayed boards' responses by.
+    :param virtual_clock: Run the board tests on a virtual clock so their delays
+        take no real time.
+    """
+
+    def __init__(
+        self,
+        transport: str,
+        latency: float,
+        iterations: int,
+        replay: Optional[Path] = None,
+        replay_speed: float = 1.0,
+        virtual_clock: bool = False,
+    ) -> None:
+        self.transport = transport
+        self.latency = latency
+        self.iterations = iterations
+        self.replay = replay
+        self.replay_speed = replay_speed
+        self.virtual_clock = virtual_clock
+
+    @contextmanager
+    def serve(self, board: SimulatedBoard) -> Iterator[SimulatorTransport]:
+        """
+        Serve a simulated board for the duration of the context.
+
+        :param board: The simulated board to serve.
+        :return: The running transport.
+        """
+        transport: SimulatorTransport
+        if self.transport == 'socket':
+            transport = SocketTransport(board, self.latency)
+        else:
+            transport = PtyTransport(board, self.latency)
+        with transport:
+            yield transport
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """
+    Return the value below which the given fraction of the samples fall.
+
+    :param samples: The samples, in any order.
+    :param fraction: The fraction of samples, between 0 and 1.
+    :return: The nearest-rank percentile of the samples.
+    """
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def bench_query(ctx: BenchmarkContext) -> Results:
+    """Measure the round trip latency and throughput of SerialWrapper.query."""
+    with ctx.serve(SimulatedPowerBoard()) as transport:
+        wrapper = SerialWrapper(transport.url, 115200)
+        try:
+            wrapper.query('*IDN?')  # open the port before timing
+
+            latencies = []
+            for _ in range(ctx.iterations):
+                start = perf_counter()
+                wrapper.query('BATT:V?')
+                latencies.append(perf_counter() - start)
+
+            commands = [f'OUT:{i}:I?' for i in range(7)] + ['BATT:V?']
+            batches = max(1, ctx.iterations // len(commands))
+            start = perf_counter()
+            for _ in range(batches):
+                wrapper.query_multi(commands)
+            multi_elapsed = perf_counter() - start
+        finally:
+            wrapper.stop()
+
+    return {
+        'latency_mean_ms': statistics.mean(latencies) * 1000,
+        'latency_p50_ms': percentile(latencies, 0.5) * 1000,
+        'latency_p95_ms': percentile(latencies, 0.95) * 1000,
+        'latency_max_ms': max(latencies) * 1000,
+        'queries_per_s': len(latencies) / sum(latencies),
+        'multi_queries_per_s': batches * len(commands) / multi_elapsed,
+    }
+
+
+def bench_multiplexer(ctx: BenchmarkContext) -> Results:
+    """Measure the query throughput of several threads sharing one board."""
+    threads = 4
+    per_thread = max(1, ctx.iterations // threads)
+    results = {}
+    with ctx.serve(SimulatedPowerBoard()) as transport:
+        for name, multiplexed in (('locked', False), ('multiplexed', True)):
+            wrapper = SerialWrapper(transport.url, 115200, multiplexed=multiplexed)
+            try:
+                wrapper.query('*IDN?')  # open the port before timing
+
+                def worker(index: int) -> None:
+                    command = f'OUT:{index}:I?'
+                    for _ in range(per_thread):
+                        wrapper.query(command)
+
+                start = perf_counter()
+                with ThreadPoolExecutor(threads) as executor:
+                    list(executor.map(worker, range(threads)))
+                elapsed = perf_counter() - start
+            finally:
+                wrapper.stop()
+            results[f'{name}_queries_per_s'] = threads * per_thread / elapsed
+    return results
+
+
+def bench_parse_status(ctx: BenchmarkContext) -> Results:
+    """Measure the rate status responses can be parsed at."""
+    power_response = '0,0,0,0,0,0,0:25:0:5100'
+    motor_response = '0,0:12000'
+    number = ctx.iterations * 100
+
+    power_time = timeit.timeit(
+        lambda: PowerStatus.from_status_response(power_response), number=number)
+    motor_time = timeit.timeit(
+        lambda: MotorStatus.from_status_response(motor_response), number=number)
+    return {
+        'power_status_per_s': number / power_time,
+        'motor_status_per_s': number / motor_time,
+    }
+
+
+def bench_codec(ctx: BenchmarkContext) -> Results:
+    """
+    Measure the rate of output current reads and servo moves through the HAL.
+
+    Each is timed through the board objects, which send pre-encoded commands and parse
+    the raw responses, and through the string commands the boards sent before the codec.
+    """
+    index = 3
+    positions = [-0.5, 0.5]
+    with ctx.serve(SimulatedPowerBoard()) as transport:
+        wrapper = SerialWrapper(transport.url, 115200)
+        try:
+            output = PowerBoard(transport.url, serial_wrapper=wrapper).outputs[index]
+            legacy_current = timeit.timeit(
+                lambda: float(wrapper.query(f'OUT:{index}:I?')) / 1000,
+                number=ctx.iterations)
+            codec_current = timeit.timeit(output.current, number=ctx.iterations)
+        finally:
+            wrapper.stop()
+
+    with ctx.serve(SimulatedServoBoard()) as transport:
+        wrapper = SerialWrapper(transport.url, 115200)
+        try:
+            servo = ServoBoard(transport.url, serial_wrapper=wrapper).servos[index]
+
+            def legacy_set(iteration: int) -> None:
+                setpoint = map_to_int(
+                    positions[iteration % 2], -1.0, 1.0, START_DUTY_MIN, START_DUTY_MAX)
+                wrapper.write(f'SERVO:{index}:SET:{setpoint}')
+
+            legacy_set_time = _time_calls(legacy_set, ctx.iterations)
+            codec_set_time = _time_calls(
+                lambda iteration: servo.set_position(positions[iteration % 2]),
+                ctx.iterations)
+        finally:
+            wrapper.stop()
+
+    return {
+        'legacy_current_per_s': ctx.iterations / legacy_current,
+        'codec_current_per_s': ctx.iterations / codec_current,
+        'legacy_set_per_s': ctx.iterations / legacy_set_time,
+        'codec_set_per_s': ctx.iterations / codec_set_time,
+    }
+
+
+def _time_calls(func: Callable[[int], None], number: int) -> float:
+    """Return the time taken to call a function with each iteration number in turn."""
+    start = perf_counter()
+    for iteration in range(number):
+        func(iteration)
+    return perf_counter() - start
+
+
+def bench_discovery(ctx: BenchmarkContext) -> Results:
+    """Measure the time taken to scan this machine's serial ports for boards."""
+    durations = []
+    uncached_durations = []
+    for _ in range(max(1, ctx.iterations // 100)):
+        clear_discovery_cache()
+        start = perf_counter()
+        discover_boards(POWER_VIDPID)
+        uncached_durations.append(perf_counter() - start)
+
+        start = perf_counter()
+        discover_boards(POWER_VIDPID)
+        durations.append(perf_counter() - start)
+    return {
+        'scan_min_ms': min(durations) * 1000,
+        'scan_mean_ms': statistics.mean(durations) * 1000,
+        'scan_uncached_mean_ms': statistics.mean(uncached_durations) * 1000,
+    }
+
+
+def _run_board_test(
+    ctx: BenchmarkContext,
+    board: SimulatedBoard,
+    run: Callable[[csv.DictWriter, Port], None],
+) -> Results:
+    """
+    Time a single board test against a simulated or replayed board.
+
+    The test is given the simulator's port, or the port of the matching board in the
+    replayed session, instead of discovering boards, and every operator prompt is
+    answered with the default.
+    """
+    if ctx.replay is not None:
+        ports = [
+            port for port in replay_ports(ctx.replay, ctx.replay_speed)
+            if port.identity.board_type == board.board_type
+        ]
+        if not ports:
+            logger.warning(f"No {board.board_type} board in {ctx.replay}, skipping")
+            return {}
+        return _time_board_test(ctx, run, ports[0])
+
+    with ctx.serve(board) as transport:
+        return _time_board_test(ctx, run, Port(transport.url, BoardIdentity()))
+
+
+def _time_board_test(
+    ctx: BenchmarkContext,
+    run: Callable[[csv.DictWriter, Port], None],
+    port: Port,
+) -> Results:
+    writer: csv.DictWriter = csv.DictWriter(
+        io.StringIO(), fieldnames=[], extrasaction='ignore')
+    test_clock = VirtualClock() if ctx.virtual_clock else Clock()
+    with unattended(), use_clock(test_clock):
+        start = perf_counter()
+        run(writer, port)
+        elapsed = perf_counter() - start
+    results = {'wall_time_s': elapsed}
+    if isinstance(test_clock, VirtualClock):
+        # The time the test would have spent sleeping on the real clock
+        results['virtual_sleep_s'] = test_clock.slept
+    return results
+
+
+def bench_power_test(ctx: BenchmarkContext) -> Results:
+    """Measure the wall time of the power board test."""
+    return _run_board_test(
+        ctx, SimulatedPowerBoard(auto_press_start=True),
+        lambda writer, port: power_test.test_board(writer, test_uvlo=False, port=port),
+    )
+
+
+def bench_motor_test(ctx: BenchmarkContext) -> Results:
+    """Measure the wall time of the motor board test."""
+    return _run_board_test(
+        ctx, SimulatedMotorBoard(),
+        lambda writer, port: motor_test.test_board(writer, port=port),
+    )
+
+
+def bench_servo_test(ctx: BenchmarkContext) -> Results:
+    """Measure the wall time of the servo board test."""
+    return _run_board_test(
+        ctx, SimulatedServoBoard(),
+        lambda writer, port: servo_test.test_board(writer, port=port),
+    )
+
+
+BENCHMARKS: Dict[str, Callable[[BenchmarkContext], Results]] = {
+    'query': bench_query,
+    'multiplexer': bench_multiplexer,
+    'parse_status': bench_parse_status,
+    'codec': bench_codec,
+    'discovery': bench_discovery,
+    'power_test': bench_power_test,
+    'motor_test': bench_motor_test,
+    'servo_test': bench_servo_test,
+}
+
+
+def git_commit() -> Optional[str]:
+    """Return the current git commit of the source tree, if available."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=Path(__file__).parent,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path: Path) -> List[Dict]:
+    """Load the list of previous runs from the history file."""
+    if not path.exists():
+        return []
+    with open(path) as f:
+        history: List[Dict] = json.load(f)
+    return history
+
+
+def run_config(args: argparse.Namespace) -> Dict[str, Any]:
+    """Return the settings of a run that affect its results."""
+    return {
+        'transport': args.transport,
+        'latency': args.latency,
+        'iterations': args.iterations,
+        'replay': str(args.replay) if args.replay else None,
+        'replay_speed': args.replay_speed if args.replay else None,
+        'virtual_clock': args.virtual_clock,
+    }
+
+
+def find_baseline(history: List[Dict], config: Dict[str, Any]) -> Optional[Dict]:
+    """
+    Find the run to compare a new run against.
+
+    :param history: The previous runs, oldest first.
+    :param config: The settings of the new run, from run_config.
+    :return: The most recent run with the same settings, or None if there isn't one.
+    """
+    for run in reversed(history):
+        if all(run.get(key) == value for key, value in config.items()):
+            return run
+    return None
+
+
+def compare_runs(
+    previous: Dict[str, Results],
+    current: Dict[str, Results],
+    threshold: float,
+) -> List[str]:
+    """
+    Log the change in each metric between two runs.
+
+    :param previous: The results of the earlier run.
+    :param current: The results of the latest run.
+    :param threshold: The fractional change in a metric that counts as a regression.
+    :return: The names of the metrics that regressed by more than the threshold.
+    """
+    regressions = []
+    for bench_name, results in current.items():
+        for metric, value in results.items():
+            old_value = previous.get(bench_name, {}).get(metric)
+            if not old_value:
+                logger.info(f"{bench_name}.{metric}: {value:.4g}")
+                continue
+
+            change = (value - old_value) / old_value
+            worse = -change if metric.endswith('_per_s') else change
+            flag = ''
+            if worse > threshold:
+                regressions.append(f'{bench_name}.{metric}')
+                flag = ' REGRESSION'
+            logger.info(
+                f"{bench_name}.{metric}: {value:.4g} "
+                f"(was {old_value:.4g}, {change:+.1%}){flag}")
+    return regressions
+
+
+def main(args: argparse.Namespace) -> None:
+    """Main function for the benchmarks."""
+    ctx = BenchmarkContext(
+        args.transport, args.latency, args.iterations, args.replay, args.replay_speed,
+        args.virtual_clock)
+    selected = args.only or list(BENCHMARKS)
+
+    results: Dict[str, Results] = {}
+    # The board tests log every measurement, only show warnings while benchmarking
+    root_logger = logging.getLogger()
+    log_level = root_logger.level
+    for name in selected:
+        logger.info(f"Running {name} benchmark")
+        root_logger.setLevel(max(log_level, logging.WARNING))
+        try:
+            results[name] = BENCHMARKS[name](ctx)
+        finally:
+            root_logger.setLevel(log_level)
+
+    config = run_config(args)
+    history = load_history(args.history)
+    baseline = find_baseline(history, config)
+    if baseline is None:
+        logger.info("No baseline: no previous run has the same settings")
+        previous = {}
+    else:
+        logger.info(
+            f"Comparing with the run at {baseline['timestamp']} "
+            f"(commit {baseline.get('commit')})")
+        previous = baseline['results']
+    regressions = compare_runs(previous, results, args.threshold)
+
+    history.append({
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'version': version,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        **config,
+        'results': results,
+    })
+    tmp_path = args.history.with_suffix('.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, args.history)
+    logger.info(f"Benchmark results saved to {args.history}")
+
+    if regressions:
+        logger.error(f"Regressions over {args.threshold:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+def create_subparser(subparsers: argparse._SubParsersAction) -> None:
+    """Benchmark command parser."""
+    parser = subparsers.add_parser(
+        "benchmark",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=textwrap.dedent(__doc__),
+        help="Benchmark the HAL and board tests against simulated boards.",
+    )
+
+    parser.add_argument(
+        '--history', type=Path, default=Path('benchmark_history.json'),
+        help='The JSON file to append the results to. Defaults to benchmark_history.json.')
+    parser.add_argument(
+        '--only', nargs='+', choices=list(BENCHMARKS),
+        help='Only run the given benchmarks.')
+    parser.add_argument(
+        '--transport', choices=['pty', 'socket'], default='pty',
+        help='How to connect to the simulated boards. Defaults to a pseudo-terminal.')
+    parser.add_argument(
+        '--latency', type=float, default=0.0,
+        help='The simulated board response latency, in seconds.')
+    parser.add_argument(
+        '--iterations', type=int, default=500,
+        help='The number of iterations for the repeated benchmarks.')
+    parser.add_argument(
+        '--replay', type=Path, default=None,
+        help='Run the board tests against a session recorded with --record-session.')
+    parser.add_argument(
+        '--replay-speed', type=float, default=1.0,
+        help="The factor to speed up the replayed boards' responses by, 0 for no delay.")
+    parser.add_argument(
+        '--virtual-clock', action='store_true',
+        help='Run the board tests on a virtual clock, so their sleeps take no real time.')
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='The fractional change in a metric that is reported as a regression.')
+    parser.add_argument(
+        '--fail-on-regression', action='store_true',
+        help='Exit with an error if any metric regressed.')
+
+    parser.set_defaults(func=main)
@@ -13,16 +13,20 @@ The test will:
 import argparse
 import csv
 import logging
-import os
 import textwrap
-from tempfile import NamedTemporaryFile
 from typing import Any, Dict, List, Optional
 
 import cv2
 from april_vision import Processor, USBCamera, calibrations, find_cameras
 
+from .results_log import prepare_log
+from .timing import PhaseTimer, TimingSummary, timing_fieldnames
+
 logger = logging.getLogger("camera_test")
 
+# The phases of the test that are timed
+PHASES = ['discovery', 'asset', 'open', 'detect', 'review']
+
 
 def test_camera(
     output_writer: csv.DictWriter,
@@ -30,13 +34,16 @@ def test_camera(
     vidpid_filter: List[str],
     marker_id: int,
     marker_size: float = 80,
+    summary: Optional[TimingSummary] = None,
 ) -> None:
     """Test a camera."""
     cam: Optional[Processor] = None
     results: Dict[str, Any] = {}
+    timer = PhaseTimer()
 
     # Find available cameras
-    all_cameras = find_cameras(calibrations, include_uncalibrated=True)
+    with timer.phase('discovery'):
+        all_cameras = find_cameras(calibrations, include_uncalibrated=True)
     if vidpid_filter:
         cameras = [camera for camera in all_cameras if camera.vidpid in vidpid_filter]
     else:
@@ -58,20 +65,22 @@ def test_camera(
         logger.info(f"Camera serial number: {camera.serial_num}")
 
         if collect_asset:
-            asset_tag = input("Enter the asset tag: ")
+            with timer.phase('asset'):
+                asset_tag = input("Enter the asset tag: ")
             results['asset'] = asset_tag
 
-        if camera.calibration is None:
-            source = USBCamera(camera.index, (1280, 720))
-        else:
-            source = USBCamera.from_calibration_file(
-                camera.index,
-                camera.calibration,
-                camera.vidpid,
-            )
+        with timer.phase('open'):
+            if camera.calibration is None:
+                source = USBCamera(camera.index, (1280, 720))
+            else:
+                source = USBCamera.from_calibration_file(
+                    camera.index,
+                    camera.calibration,
+                    camera.vidpid,
+                )
 
         logger.info(f"Camera {camera.name} ({camera.serial_num}) opened, index {camera.index}")
-        logger.info(f"Resolution set to {source._get_resolution()}")  # noqa: SLF001
+        logger.info(f"Resolution set to {source._get_resolution()}")  # ruff: ignore[private-member-access]
 
         cam = Processor(
             source,
@@ -81,30 +90,31 @@ def test_camera(
         logger.info("Press 'q' to quit the preview window")
 
         marker_detected = False
-        while True:
-            frame = cam._capture(fresh=False)  # noqa: SLF001
-            cv2.imshow('image', frame.colour_frame)
-            button = cv2.waitKey(1) & 0xFF
-            if (button == ord('q')) or (button == 27):
-                cv2.destroyAllWindows()
-                _ = cv2.waitKey(1)  # Window is only closed after this wait
-                # Quit on q or ESC key
-                raise AssertionError("Camera test aborted by user")
-
-            markers = cam.see(frame=frame.colour_frame)
-
-            for marker in markers:
-                if marker.id == marker_id:
-                    marker_detected = True
+        with timer.phase('detect'):
+            while True:
+                frame = cam._capture(fresh=False)  # ruff: ignore[private-member-access]
+                cv2.imshow('image', frame.colour_frame)
+                button = cv2.waitKey(1) & 0xFF
+                if (button == ord('q')) or (button == 27):
+                    cv2.destroyAllWindows()
+                    _ = cv2.waitKey(1)  # Window is only closed after this wait
+                    # Quit on q or ESC key
+                    raise AssertionError("Camera test aborted by user")
+
+                markers = cam.see(frame=frame.colour_frame)
+
+                for marker in markers:
+                    if marker.id == marker_id:
+                        marker_detected = True
+                        break
+                    else:
+                        logger.warning(f"Detected unexpected marker ID: {marker.id}")
+
+                if marker_detected:
                     break
-                else:
-                    logger.warning(f"Detected unexpected marker ID: {marker.id}")
-
-            if marker_detected:
-                break
 
         # On detecting the correct marker, annotate it and stop updating the preview
-        cam._annotate(frame, [marker])  # noqa: SLF001
+        cam._annotate(frame, [marker])  # ruff: ignore[private-member-access]
         cv2.imshow('image', frame.colour_frame)
 
         if marker.has_pose():
@@ -117,13 +127,17 @@ def test_camera(
         logger.info("Press any key to continue")
 
         # Any key closes the preview window
-        _ = cv2.waitKey(0)
-        cv2.destroyAllWindows()
-        _ = cv2.waitKey(1)
+        with timer.phase('review'):
+            _ = cv2.waitKey(0)
+            cv2.destroyAllWindows()
+            _ = cv2.waitKey(1)
 
         logger.info("Camera passed")
         results['passed'] = True
     finally:
+        timer.save(results)
+        if summary is not None:
+            summary.add(timer)
         output_writer.writerow(results)
         if cam is not None:
             cam.close()
@@ -131,18 +145,13 @@ def test_camera(
 
 def main(args: argparse.Namespace) -> None:
     """Main function for the camera test."""
-    new_log = True
-    fieldnames = ['asset', 'serial', 'passed', 'distance']
+    fieldnames = ['asset', 'serial', 'passed', 'distance'] + timing_fieldnames(PHASES)
 
     vidpid_filter = [vidpid.lower() for vidpid in args.vidpid_filter]
 
-    if args.log:
-        logfile = args.log
-        if os.path.exists(logfile):
-            new_log = False
-    else:
-        logfile = NamedTemporaryFile(delete=False).name
+    logfile, new_log = prepare_log(args.log, fieldnames)
 
+    summary = TimingSummary()
     with open(logfile, 'a', newline='') as csvfile:
         writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
         if new_log:
@@ -156,6 +165,7 @@ def main(args: argparse.Namespace) -> None:
                     vidpid_filter,
                     args.marker_id,
                     args.marker_size,
+                    summary,
                 )
             except AssertionError as e:
                 logger.error(f"Test failed: {e}")
@@ -164,6 +174,8 @@ def main(args: argparse.Namespace) -> None:
             if result.lower() != 'y':
                 break
 
+    for line in summary.format():
+        logger.info(line)
     logger.info(f"Test results saved to {logfile}")
 
 
@@ -8,6 +8,9 @@ import warnings
 from typing import Sequence
 
 from ._version import version
+from .hal import flight_recorder, session_recorder
+from .hal.serial_stats import STATS
+from .parallel import TagFilter
 
 subcommands = [
     "power_test",
@@ -16,6 +19,9 @@ subcommands = [
     "arduino_test",
     "arduino_flash",
     "camera_test",
+    "simulate",
+    "benchmark",
+    "report",
     "inventory_helpers",
 ]
 
@@ -37,16 +43,30 @@ def build_argparser() -> argparse.ArgumentParser:
     parser.add_argument(
         '--version', action='version', version=version, help="Print package version")
     parser.add_argument('--debug', action='store_true', help="Enable debug logging")
+    parser.add_argument(
+        '--serial-stats', action='store_true',
+        help="Log the latency and error counts of each board's serial commands on exit")
+    parser.add_argument(
+        '--flight-recorder', type=int, default=0, metavar='N',
+        help="Keep the last N serial transactions of each board, saved when a test fails")
+    parser.add_argument(
+        '--flight-recorder-dir', default='.',
+        help="The directory to save flight recordings to. Defaults to the current directory.")
+    parser.add_argument(
+        '--record-session', default=None, metavar='FILE',
+        help="Record every serial transaction to FILE for replay, gzipped if it ends in .gz")
 
     return parser
 
 
 def setup_logger(debug: bool = False) -> None:
     """Output all loggers to console with custom format at level INFO or DEBUG."""
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(tag)s%(message)s')
 
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
+    # Prefix the messages of boards tested in parallel with their asset tag
+    console_handler.addFilter(TagFilter())
 
     # log from all loggers to stdout
     root_logger = logging.getLogger()
@@ -62,11 +82,27 @@ def main(argv: Sequence[str] | None = None) -> None:
     parser = build_argparser()
     args = parser.parse_args(argv)
     setup_logger(debug=args.debug)
-
-    if "func" in args:
-        args.func(args)
-    else:
-        parser.print_help()
+    flight_recorder.configure(args.flight_recorder, args.flight_recorder_dir)
+
+    if args.record_session:
+        session_recorder.start_recording(args.record_session)
+
+    try:
+        if "func" in args:
+            args.func(args)
+        else:
+            parser.print_help()
+    finally:
+        session_recorder.stop_recording()
+        if args.serial_stats:
+            log_serial_stats()
+
+
+def log_serial_stats() -> None:
+    """Log the serial statistics of every board used during the run."""
+    stats_logger = logging.getLogger("serial_stats")
+    for line in STATS.format():
+        stats_logger.info(line)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,20 @@
+"""
+The loads connected to the boards by the test fixtures.
+
+The board tests calculate the currents they expect from these, and the simulated
+boards model the same loads, so they are kept here rather than in either.
+"""
+
+# The resistance of the load on each power board output, in ohms
+OUTPUT_RESISTANCE = [
+    1.5,  # H0
+    1.5,  # H1
+    1.5,  # L0
+    5.0,  # L1
+    6.0,  # L2
+    1.5,  # L3
+    10.0,  # 5V
+]
+
+# The resistance of the load on each motor board output, in ohms
+MOTOR_RESISTANCE = 4.7
@@ -1,20 +1,30 @@
-from .discovery import VidPid, discover_boards
+from .discovery import BoardWatcher, VidPid, discover_boards
 from .motor_board import VIDPID as MOTOR_VIDPID
 from .motor_board import MotorBoard
 from .power_board import BRAIN_OUTPUT, PowerBoard, PowerOutputPosition
 from .power_board import VIDPID as POWER_VIDPID
+from .probe import probe_boards
 from .servo_board import VIDPID as SERVO_VIDPID
 from .servo_board import ServoBoard
+from .session_pool import SessionPool
+from .settle import wait_until_settled
+from .telemetry import TelemetrySampler, TimeSeries
 
 __all__ = [
     'BRAIN_OUTPUT',
     'MOTOR_VIDPID',
     'POWER_VIDPID',
     'SERVO_VIDPID',
+    'BoardWatcher',
     'MotorBoard',
     'PowerBoard',
     'PowerOutputPosition',
     'ServoBoard',
+    'SessionPool',
+    'TelemetrySampler',
+    'TimeSeries',
     'VidPid',
     'discover_boards',
+    'probe_boards',
+    'wait_until_settled',
 ]
@@ -0,0 +1,26 @@
+"""
+An asyncio variant of the board interfaces.
+
+All the boards opened with these classes can be driven from a single event loop,
+for example reading every output current on several boards at once:
+
+    boards = await asyncio.gather(*(AsyncPowerBoard.open(p.port, p.identity) for p in ports))
+    currents = await asyncio.gather(*(board.outputs[0].current() for board in boards))
+"""
+from .motor_board import AsyncMotor, AsyncMotorBoard
+from .power_board import AsyncBatterySensor, AsyncLed, AsyncOutput, AsyncPiezo, AsyncPowerBoard
+from .serial_wrapper import AsyncSerialWrapper
+from .servo_board import AsyncServo, AsyncServoBoard
+
+__all__ = [
+    'AsyncBatterySensor',
+    'AsyncLed',
+    'AsyncMotor',
+    'AsyncMotorBoard',
+    'AsyncOutput',
+    'AsyncPiezo',
+    'AsyncPowerBoard',
+    'AsyncSerialWrapper',
+    'AsyncServo',
+    'AsyncServoBoard',
+]
@@ -0,0 +1,168 @@
+"""The asyncio interface to the motor board firmware over serial."""
+from __future__ import annotations
+
+import logging
+
+from ..motor_board import BAUDRATE, MotorPower, MotorStatus
+from ..utils import BoardIdentity, map_to_float, map_to_int
+from .serial_wrapper import AsyncSerialWrapper
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncMotorBoard:
+    """
+    A class representing the motor board interface using asyncio.
+
+    The board is not contacted until connect() is awaited,
+    use the open() classmethod to create and connect to a board in one step.
+
+    :param serial_port: The serial port to connect to.
+    :param initial_identity: The identity of the board, as reported by the USB descriptor.
+    """
+
+    def __init__(
+        self,
+        serial_port: str,
+        initial_identity: BoardIdentity | None = None,
+    ) -> None:
+        if initial_identity is None:
+            initial_identity = BoardIdentity()
+        self._serial = AsyncSerialWrapper(serial_port, BAUDRATE, identity=initial_identity)
+
+        self.motors = (
+            AsyncMotor(self._serial, 0),
+            AsyncMotor(self._serial, 1)
+        )
+
+    @classmethod
+    async def open(
+        cls,
+        serial_port: str,
+        initial_identity: BoardIdentity | None = None,
+    ) -> AsyncMotorBoard:
+        """
+        Create a motor board and connect to it.
+
+        :param serial_port: The serial port to connect to.
+        :param initial_identity: The identity of the board, as reported by the USB descriptor.
+        :return: The connected motor board.
+        """
+        board = cls(serial_port, initial_identity)
+        await board.connect()
+        return board
+
+    async def connect(self) -> None:
+        """Connect to the board and check that it is a motor board."""
+        identity = await self.identify()
+        assert identity.board_type == 'MCv4B', \
+            f"Expected board type 'MCv4B', got {identity.board_type!r} instead."
+        self._serial.set_identity(identity)
+
+    async def identify(self) -> BoardIdentity:
+        """
+        Get the identity of the board.
+
+        :return: The identity of the board.
+        """
+        response = await self._serial.query('*IDN?')
+        return BoardIdentity(*response.split(':'))
+
+    async def status(self) -> MotorStatus:
+        """
+        The status of the board.
+
+        :return: The status of the board.
+        """
+        response = await self._serial.query('*STATUS?')
+        return MotorStatus.from_status_response(response)
+
+    async def query_multi(self, commands: list[str]) -> list[str]:
+        """
+        Send several raw commands to the board in a single exchange.
+
+        :param commands: The commands to send, without trailing newlines.
+        :raises RuntimeError: If the board returns a NACK to any of the commands.
+        :return: The responses to each of the commands, in order.
+        """
+        return await self._serial.query_multi(commands)
+
+    async def reset(self) -> None:
+        """
+        Reset the board.
+
+        This command disables the motors and clears all faults.
+        """
+        await self._serial.write('*RESET')
+
+    def close(self) -> None:
+        """Close the underlying serial port."""
+        self._serial.stop()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__qualname__}: {self._serial}>"
+
+
+class AsyncMotor:
+    """
+    A class representing a motor on the motor board.
+
+    :param serial: The serial wrapper to use to communicate with the board.
+    :param index: The index of the motor on the board.
+    """
+
+    def __init__(self, serial: AsyncSerialWrapper, index: int):
+        self._serial = serial
+        self._index = index
+
+    async def get_power(self) -> float:
+        """
+        Read the current power setting of the motor.
+
+        :return: The power of the motor as a float between -1.0 and 1.0
+            or the special value MotorPower.COAST.
+        """
+        response = await self._serial.query(f'MOT:{self._index}:GET?')
+
+        data = response.split(':')
+        enabled = (data[0] == '1')
+        value = int(data[1])
+
+        if not enabled:
+            return MotorPower.COAST
+        return map_to_float(value, -1000, 1000, -1.0, 1.0, precision=3)
+
+    async def set_power(self, value: float) -> None:
+        """
+        Set the power of the motor.
+
+        :param value: The power of the motor as a float between -1.0 and 1.0
+            or the special values MotorPower.COAST and MotorPower.BRAKE.
+        """
+        if value == MotorPower.COAST:
+            await self._serial.write(f'MOT:{self._index}:DISABLE')
+            return
+
+        setpoint = map_to_int(value, -1.0, 1.0, -1000, 1000)
+        await self._serial.write(f'MOT:{self._index}:SET:{setpoint}')
+
+    async def current(self) -> float:
+        """
+        Read the current draw of the motor.
+
+        :return: The current draw of the motor in amps.
+        """
+        response = await self._serial.query(f'MOT:{self._index}:I?')
+        return float(response) / 1000
+
+    async def in_fault(self) -> bool:
+        """
+        Check if the motor is in a fault state.
+
+        :return: True if the motor is in a fault state, False otherwise.
+        """
+        response = await self._serial.query('*STATUS?')
+        return MotorStatus.from_status_response(response).output_faults[self._index]
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__qualname__} index={self._index} {self._serial}>"
@@ -0,0 +1,271 @@
+"""The asyncio interface to the power board firmware over serial."""
+from __future__ import annotations
+
+import logging
+
+from ..power_board import BAUDRATE, BRAIN_OUTPUT, PowerStatus
+from ..utils import BoardIdentity
+from .serial_wrapper import AsyncSerialWrapper
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPowerBoard:
+    """
+    A class representing the power board interface using asyncio.
+
+    The board is not contacted until connect() is awaited,
+    use the open() classmethod to create and connect to a board in one step.
+
+    :param serial_port: The serial port to connect to.
+    :param initial_identity: The identity of the board, as reported by the USB descriptor.
+    """
+
+    def __init__(
+        self,
+        serial_port: str,
+        initial_identity: BoardIdentity | None = None,
+    ) -> None:
+        if initial_identity is None:
+            initial_identity = BoardIdentity()
+        self._serial = AsyncSerialWrapper(serial_port, BAUDRATE, identity=initial_identity)
+
+        self.outputs = tuple(AsyncOutput(self._serial, i) for i in range(7))
+        self.battery_sensor = AsyncBatterySensor(self._serial)
+        self.piezo = AsyncPiezo(self._serial)
+        self.run_led = AsyncLed(self._serial, 'RUN')
+        self.error_led = AsyncLed(self._serial, 'ERR')
+
+    @classmethod
+    async def open(
+        cls,
+        serial_port: str,
+        initial_identity: BoardIdentity | None = None,
+    ) -> AsyncPowerBoard:
+        """
+        Create a power board and connect to it.
+
+        :param serial_port: The serial port to connect to.
+        :param initial_identity: The identity of the board, as reported by the USB descriptor.
+        :return: The connected power board.
+        """
+        board = cls(serial_port, initial_identity)
+        await board.connect()
+        return board
+
+    async def connect(self) -> None:
+        """Connect to the board and check that it is a power board."""
+        identity = await self.identify()
+        assert identity.board_type == 'PBv4B', \
+            f"Expected board type 'PBv4B', got {identity.board_type!r} instead."
+        self._serial.set_identity(identity)
+
+    async def identify(self) -> BoardIdentity:
+        """
+        Get the identity of the board.
+
+        :return: The identity of the board.
+        """
+        response = await self._serial.query('*IDN?')
+        return BoardIdentity(*response.split(':'))
+
+    async def status(self) -> PowerStatus:
+        """
+        Return the status of the power board.
+
+        :return: The status of the power board.
+        """
+        response = await self._serial.query('*STATUS?')
+        return PowerStatus.from_status_response(response)
+
+    async def query_multi(self, commands: list[str]) -> list[str]:
+        """
+        Send several raw commands to the board in a single exchange.
+
+        :param commands: The commands to send, without trailing newlines.
+        :raises RuntimeError: If the board returns a NACK to any of the commands.
+        :return: The responses to each of the commands, in order.
+        """
+        return await self._serial.query_multi(commands)
+
+    async def reset(self) -> None:
+        """
+        Reset the power board.
+
+        This turns off all outputs except the brain output and stops any running tones.
+        """
+        await self._serial.write('*RESET')
+        # Additionally, the brain output is always on, so we need to turn it off
+        # manually.
+        await self._serial.write('*SYS:BRAIN:SET:0')
+
+    async def start_button(self) -> bool:
+        """
+        Return whether the start button has been pressed.
+
+        This value latches until the button is read, so only shows that the
+        button has been pressed since this method was last called.
+
+        :return: Whether the start button has been pressed.
+        """
+        response = await self._serial.query('BTN:START:GET?')
+        internal, external = response.split(':')
+        return (internal == '1') or (external == '1')
+
+    async def enable_fan(self, value: bool) -> None:
+        """
+        Enable or disable the fan.
+
+        :param value: Whether to enable the fan.
+        """
+        await self._serial.write(f'*SYS:FAN:SET:{bool(value):d}')
+
+    def close(self) -> None:
+        """Close the underlying serial port."""
+        self._serial.stop()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__qualname__}: {self._serial}>"
+
+
+class AsyncOutput:
+    """
+    A class representing a single output of the power board.
+
+    :param serial: The serial wrapper to use for communication.
+    :param index: The index of the output to represent.
+    """
+
+    def __init__(self, serial: AsyncSerialWrapper, index: int):
+        self._serial = serial
+        self._index = index
+
+    async def is_enabled(self) -> bool:
+        """
+        Return whether the output is enabled.
+
+        :return: Whether the output is enabled.
+        """
+        response = await self._serial.query(f'OUT:{self._index}:GET?')
+        return response == '1'
+
+    async def enable(self, value: bool) -> None:
+        """
+        Set whether the output is enabled.
+
+        :param value: Whether the output should be enabled.
+        """
+        if self._index == BRAIN_OUTPUT:
+            # Changing the brain output will also raise a NACK from the firmware
+            await self._serial.write(f'*SYS:BRAIN:SET:{bool(value):d}')
+        else:
+            await self._serial.write(f'OUT:{self._index}:SET:{bool(value):d}')
+
+    async def current(self) -> float:
+        """
+        Return the current draw of the output.
+
+        :return: The current draw of the output, in amps.
+        """
+        response = await self._serial.query(f'OUT:{self._index}:I?')
+        return float(response) / 1000
+
+    async def overcurrent(self) -> bool:
+        """
+        Return whether the output is in an overcurrent state.
+
+        :return: Whether the output is in an overcurrent state.
+        """
+        response = await self._serial.query('*STATUS?')
+        return PowerStatus.from_status_response(response).overcurrent[self._index]
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__qualname__} index={self._index} {self._serial}>"
+
+
+class AsyncLed:
+    """
+    A class representing a single LED of the power board.
+
+    :param serial: The serial wrapper to use for communication.
+    :param led: The name of the LED to represent.
+    """
+
+    def __init__(self, serial: AsyncSerialWrapper, led: str):
+        self._serial = serial
+        self._led = led
+
+    async def on(self) -> None:
+        """Turn on the LED."""
+        await self._serial.write(f'LED:{self._led}:SET:1')
+
+    async def off(self) -> None:
+        """Turn off the LED."""
+        await self._serial.write(f'LED:{self._led}:SET:0')
+
+    async def flash(self) -> None:
+        """Set the LED to flash at 1Hz."""
+        await self._serial.write(f'LED:{self._led}:SET:F')
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__qualname__} led={self._led} {self._serial}>"
+
+
+class AsyncBatterySensor:
+    """
+    A class representing the battery sensor of the power board.
+
+    :param serial: The serial wrapper to use for communication.
+    """
+
+    def __init__(self, serial: AsyncSerialWrapper):
+        self._serial = serial
+
+    async def voltage(self) -> float:
+        """
+        Return the voltage of the battery.
+
+        :return: The voltage of the battery, in volts.
+        """
+        response = await self._serial.query('BATT:V?')
+        return float(response) / 1000
+
+    async def current(self) -> float:
+        """
+        Return the current draw from the battery.
+
+        :return: The current draw from the battery, in amps.
+        """
+        response = await self._serial.query('BATT:I?')
+        return float(response) / 1000
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__qualname__}: {self._serial}>"
+
+
+class AsyncPiezo:
+    """
+    A class representing the piezo of the power board.
+
+    :param serial: The serial wrapper to use for communication.
+    """
+
+    def __init__(self, serial: AsyncSerialWrapper):
+        self._serial = serial
+
+    async def buzz(self, frequency: float, duration: float) -> None:
+        """
+        Produce a tone on the piezo.
+
+        This does not wait for the tone to finish.
+
+        :param frequency: The frequency of the tone, in Hz, in the range 8-10,000Hz.
+        :param duration: The duration of the tone, in seconds.
+        """
+        frequency_int = int(frequency)
+        duration_ms = int(duration * 1000)
+
+        await self._serial.write(f'NOTE:{frequency_int}:{duration_ms}')
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__qualname__}: {self._serial}>"
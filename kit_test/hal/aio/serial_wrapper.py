@@ -0,0 +1,381 @@
+"""
+AsyncSerialWrapper class for communicating with boards over serial using asyncio.
+
+This is the asyncio equivalent of the SerialWrapper class. Reads never block,
+instead the running event loop waits for data to arrive on the port,
+so a single thread can service all the boards on a rig.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+import serial
+
+from ..codec import NEWLINE, can_resend, decode_command, decode_response, encode_command
+from ..retry_policy import DEFAULT_RETRY_POLICY, RetryPolicy
+from ..serial_stats import STATS
+from ..serial_wrapper import BASE_TIMEOUT, check_nacks, stats_key
+from ..utils import TRACE, BoardDisconnectionError, BoardIdentity
+
+logger = logging.getLogger(__name__)
+
+# How often to check ports that the event loop is unable to watch for incoming data
+POLL_INTERVAL = 0.005
+
+
+class AsyncSerialWrapper:
+    """
+    Wrapper class for asyncio serial communication with boards.
+
+    This class is responsible for opening and closing the serial port,
+    and for handling port timeouts and disconnections.
+
+    All the methods that communicate with the board must be awaited from
+    the same event loop.
+
+    :param port: The serial port to connect to.
+    :param baud: The baud rate to use for the serial connection.
+    :param timeout: The timeout for the serial connection.
+    :param identity: The identity of the board this serial wrapper is connected to.
+    :param delay_after_connect: The time to wait after connecting to the board before sending
+                                data.
+    :param retry_policy: The policy for retrying failed transactions,
+        defaults to DEFAULT_RETRY_POLICY.
+    """
+
+    def __init__(
+        self,
+        port: str,
+        baud: int,
+        timeout: float | None = BASE_TIMEOUT,
+        identity: BoardIdentity = BoardIdentity(),
+        delay_after_connect: float = 0,
+        retry_policy: RetryPolicy | None = None,
+    ):
+        # The lock is created on first use so it is bound to the running event loop
+        self._lock: asyncio.Lock | None = None
+        self.identity = identity
+        self.timeout = timeout
+
+        # Time to wait before sending data after connecting to a board
+        self.delay_after_connect = delay_after_connect
+
+        # Bytes received from the board that are not yet part of a complete line
+        self._rx_buffer = bytearray()
+
+        self.retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+
+        # pyserial serial port, the port will be opened on the first message.
+        # Reads are non-blocking, the event loop is used to wait for data.
+        self.serial = serial.serial_for_url(
+            port,
+            baudrate=baud,
+            timeout=0,
+            write_timeout=timeout,
+            do_not_open=True,
+        )
+
+    async def start(self) -> None:
+        """
+        Helper method to open the serial port.
+
+        This is not usually needed as the port will be opened on the first message.
+        """
+        await self._connect()
+
+    def stop(self) -> None:
+        """
+        Helper method to close the serial port.
+
+        This is not usually needed as the port will be closed on garbage collection.
+        """
+        self._disconnect()
+
+    async def query(self, data: str) -> str:
+        """
+        Send a command to the board and return the response.
+
+        This method will automatically reconnect to the board and retry the command
+        on serial errors, according to the retry policy.
+
+        :param data: The data to write to the board.
+        :raises BoardDisconnectionError: If the serial connection fails during the transaction,
+            including failing to respond to the command.
+        :return: The response from the board with the trailing newline removed.
+        """
+        return decode_response((await self.query_multi_raw([encode_command(data)]))[0])
+
+    async def query_multi(self, commands: list[str]) -> list[str]:
+        """
+        Send multiple commands to the board and return the responses.
+
+        All the commands are sent in a single write, then a response is read for each
+        command in turn.
+
+        :param commands: The commands to write to the board.
+        :raises BoardDisconnectionError: If the serial connection fails during the transaction,
+            including failing to respond to any of the commands.
+        :raises RuntimeError: If the board returns a NACK response to any of the commands.
+        :return: The responses from the board with the trailing newlines removed,
+            in the same order as the commands.
+        """
+        responses = await self.query_multi_raw(
+            [encode_command(command) for command in commands])
+        return [decode_response(response) for response in responses]
+
+    async def query_multi_raw(self, commands: list[bytes]) -> list[bytes]:
+        """
+        Send multiple pre-encoded commands to the board and return the raw responses.
+
+        This is the same as query_multi, but skips encoding the commands and decoding
+        the responses.
+
+        :param commands: The encoded commands, each including the trailing newline.
+        :return: The responses from the board with the trailing newlines removed.
+        """
+        if not commands:
+            return []
+
+        # A retry only sends the commands that weren't answered, see codec.can_resend
+        received: list[bytes] = []
+
+        def unanswered() -> list[bytes]:
+            return commands[len(received):]
+
+        await self.retry_policy.call_async(
+            lambda: self._transact(unanswered(), received),
+            on_retry=lambda _: self._record_retry(unanswered()),
+            should_retry=lambda _: can_resend(unanswered()),
+        )
+        check_nacks(self.identity, self._stats_key(), commands, received)
+        return received
+
+    def _record_retry(self, commands: list[bytes]) -> None:
+        """Record a retry of each of the commands in the serial statistics."""
+        board, board_type = self._stats_key()
+        for command in commands:
+            STATS.record_retry(board, board_type, command)
+
+    async def _transact(
+        self,
+        commands: list[bytes],
+        received: list[bytes] | None = None,
+    ) -> list[bytes]:
+        """
+        Write the commands to the board and read a response to each, without retrying.
+
+        NACK responses are returned like any other response.
+
+        :param commands: The encoded commands to write to the board.
+        :param received: A list each response is also appended to as it is read,
+            so the responses read before a failure are kept.
+        :raises BoardDisconnectionError: If the serial connection fails during the transaction.
+        :return: The responses from the board with the trailing newlines removed.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if not self.serial.is_open:
+                if not await self._connect():
+                    # If the serial port cannot be opened raise an error,
+                    # this will be caught by the retry policy
+                    raise BoardDisconnectionError((
+                        f'Connection to board {self.identity.board_type}:'
+                        f'{self.identity.asset_tag} could not be established',
+                    ))
+
+            if self._rx_buffer:
+                # Anything left over from a previous transaction can't be a response
+                # to these commands, discard it so the responses stay in step
+                logger.debug(f'Discarding unexpected serial data: {bytes(self._rx_buffer)!r}')
+                self._rx_buffer.clear()
+
+            trace = logger.isEnabledFor(TRACE)
+            responses: list[bytes] = []
+            try:
+                if trace:
+                    for command in commands:
+                        logger.log(TRACE, f'Serial write - {decode_command(command)!r}')
+                board, board_type = self._stats_key()
+                start_time = time.perf_counter()
+                self.serial.write(b''.join(commands))
+
+                for index, command in enumerate(commands):
+                    response = await self._readline()
+                    if not response.isascii():
+                        logger.warning(
+                            f"Board {self.identity.board_type}:{self.identity.asset_tag} "
+                            f"returned invalid characters: {response!r}")
+                        # Consume the responses to the remaining commands and anything
+                        # else received, so a retry doesn't read them as its own responses
+                        for _ in range(len(commands) - index - 1):
+                            await self._readline()
+                        self._rx_buffer.clear()
+                        # Raises UnicodeDecodeError
+                        response.decode('ascii')
+                    if trace:
+                        logger.log(TRACE, f'Serial read  - {decode_response(response)!r}')
+
+                    if not response.endswith(NEWLINE):
+                        # If the read times out no error is raised,
+                        # it returns an incomplete string
+                        logger.warning((
+                            f'Connection to board {self.identity.board_type}:'
+                            f'{self.identity.asset_tag} timed out waiting for response'
+                        ))
+                        STATS.record_timeout(board, board_type, command)
+                        raise serial.SerialException('Timeout on readline')
+                    STATS.record_latency(
+                        board, board_type, command, time.perf_counter() - start_time)
+                    responses.append(response[:-1])
+                    if received is not None:
+                        received.append(response[:-1])
+            except serial.SerialException:
+                # Serial connection failed, close the port and raise an error
+                self._disconnect()
+                raise BoardDisconnectionError((
+                    f'Board {self.identity.board_type}:{self.identity.asset_tag} '
+                    'disconnected during transaction'
+                ))
+
+            return responses
+
+    async def write(self, data: str) -> None:
+        """
+        Send a command to the board that does not require a response.
+
+        :param data: The data to write to the board.
+        :raises RuntimeError: If the board returns a NACK response,
+            the firmware's error message is raised.
+        """
+        _ = await self.query(data)
+
+    async def _readline(self) -> bytes:
+        """
+        Read a single line from the board without blocking the event loop.
+
+        Like pyserial's readline, no error is raised on timeout and the incomplete
+        line is returned instead.
+
+        :return: The line read from the board, including the trailing newline.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = None if self.timeout is None else loop.time() + self.timeout
+
+        while True:
+            end = self._rx_buffer.find(NEWLINE)
+            if end >= 0:
+                line = bytes(self._rx_buffer[:end + 1])
+                del self._rx_buffer[:end + 1]
+                return line
+
+            waiting = self.serial.in_waiting
+            if waiting:
+                self._rx_buffer += self.serial.read(waiting)
+                continue
+
+            remaining = None if deadline is None else deadline - loop.time()
+            if remaining is not None and remaining <= 0:
+                line = bytes(self._rx_buffer)
+                self._rx_buffer.clear()
+                return line
+
+            await self._wait_readable(remaining)
+
+    async def _wait_readable(self, timeout: float | None) -> None:
+        """
+        Wait until data may be available on the serial port.
+
+        Where the event loop can watch the port's file descriptor it is used,
+        otherwise the port is polled.
+
+        :param timeout: The maximum time to wait, in seconds.
+        """
+        loop = asyncio.get_running_loop()
+        fileno = getattr(self.serial, 'fileno', None)
+
+        if fileno is not None:
+            readable = loop.create_future()
+
+            def set_readable() -> None:
+                if not readable.done():
+                    readable.set_result(None)
+
+            fd = fileno()
+            try:
+                loop.add_reader(fd, set_readable)
+            except NotImplementedError:
+                # e.g. the Windows proactor event loop
+                pass
+            else:
+                try:
+                    await asyncio.wait_for(readable, timeout)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    loop.remove_reader(fd)
+                return
+
+        await asyncio.sleep(POLL_INTERVAL if timeout is None else min(POLL_INTERVAL, timeout))
+
+    async def _connect(self) -> bool:
+        """
+        Connect to the class's serial port.
+
+        This is called automatically when a message is sent to the board or the
+        serial connection is lost.
+
+        :return: True if the serial port was opened successfully, False otherwise.
+        """
+        try:
+            self.serial.open()
+            self._rx_buffer.clear()
+            # Wait for the board to be ready to receive data
+            # Certain boards will reset when the serial port is opened
+            await asyncio.sleep(self.delay_after_connect)
+        except serial.SerialException:
+            logger.error((
+                'Failed to connect to board '
+                f'{self.identity.board_type}:{self.identity.asset_tag}'
+            ))
+            return False
+
+        logger.info(
+            f'Connected to board {self.identity.board_type}:{self.identity.asset_tag}'
+        )
+        return True
+
+    def _disconnect(self) -> None:
+        """
+        Close the class's serial port.
+
+        This is called automatically when the serial connection fails.
+        The serial port will be reopened on the next message.
+        """
+        self.serial.close()
+        self._rx_buffer.clear()
+        logger.warning(
+            f'Board {self.identity.board_type}:{self.identity.asset_tag} disconnected'
+        )
+
+    def _stats_key(self) -> tuple[str, str]:
+        """Return the board name and type that the serial statistics are recorded under."""
+        return stats_key(self.identity, self.serial.port)
+
+    def set_identity(self, identity: BoardIdentity) -> None:
+        """
+        Stores the identity of the board this serial wrapper is connected to.
+
+        This is used for logging purposes.
+
+        :param identity: The identity of the board this serial wrapper is connected to.
+        """
+        self.identity = identity
+
+    def __str__(self) -> str:
+        return (
+            f"<{self.__class__.__qualname__} {self.serial.port!r} {self.identity.asset_tag!r}>"
+        )
@@ -0,0 +1,169 @@
+"""The asyncio interface to the servo board firmware over serial."""
+from __future__ import annotations
+
+import logging
+
+from ..servo_board import BAUDRATE, START_DUTY_MAX, START_DUTY_MIN, ServoStatus
+from ..utils import BoardIdentity, map_to_float, map_to_int
+from .serial_wrapper import AsyncSerialWrapper
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncServoBoard:
+    """
+    A class representing the servo board interface using asyncio.
+
+    The board is not contacted until connect() is awaited,
+    use the open() classmethod to create and connect to a board in one step.
+
+    :param serial_port: The serial port to connect to.
+    :param initial_identity: The identity of the board, as reported by the USB descriptor.
+    """
+
+    def __init__(
+        self,
+        serial_port: str,
+        initial_identity: BoardIdentity | None = None,
+    ) -> None:
+        if initial_identity is None:
+            initial_identity = BoardIdentity()
+        self._serial = AsyncSerialWrapper(serial_port, BAUDRATE, identity=initial_identity)
+
+        self.servos = tuple(
+            AsyncServo(self._serial, index) for index in range(12)
+        )
+
+    @classmethod
+    async def open(
+        cls,
+        serial_port: str,
+        initial_identity: BoardIdentity | None = None,
+    ) -> AsyncServoBoard:
+        """
+        Create a servo board and connect to it.
+
+        :param serial_port: The serial port to connect to.
+        :param initial_identity: The identity of the board, as reported by the USB descriptor.
+        :return: The connected servo board.
+        """
+        board = cls(serial_port, initial_identity)
+        await board.connect()
+        return board
+
+    async def connect(self) -> None:
+        """Connect to the board and check that it is a servo board."""
+        identity = await self.identify()
+        assert identity.board_type == 'SBv4B', \
+            f"Expected board type 'SBv4B', got {identity.board_type!r} instead."
+        self._serial.set_identity(identity)
+
+    async def identify(self) -> BoardIdentity:
+        """
+        Get the identity of the board.
+
+        :return: The identity of the board.
+        """
+        response = await self._serial.query('*IDN?')
+        return BoardIdentity(*response.split(':'))
+
+    async def status(self) -> ServoStatus:
+        """
+        Get the board's status.
+
+        :return: A named tuple of the watchdog fail and pgood status.
+        """
+        response = await self._serial.query('*STATUS?')
+        return ServoStatus.from_status_response(response)
+
+    async def query_multi(self, commands: list[str]) -> list[str]:
+        """
+        Send several raw commands to the board in a single exchange.
+
+        :param commands: The commands to send, without trailing newlines.
+        :raises RuntimeError: If the board returns a NACK to any of the commands.
+        :return: The responses to each of the commands, in order.
+        """
+        return await self._serial.query_multi(commands)
+
+    async def reset(self) -> None:
+        """
+        Reset the board.
+
+        This will disable all servos.
+        """
+        await self._serial.write('*RESET')
+
+    async def current(self) -> float:
+        """
+        Get the current draw of the board.
+
+        :return: The current draw of the board in amps.
+        """
+        response = await self._serial.query('SERVO:I?')
+        return float(response) / 1000
+
+    async def voltage(self) -> float:
+        """
+        Get the voltage of the on-board regulator.
+
+        :return: The voltage of the on-board regulator in volts.
+        """
+        response = await self._serial.query('SERVO:V?')
+        return float(response) / 1000
+
+    def close(self) -> None:
+        """Close the underlying serial port."""
+        self._serial.stop()
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__qualname__}: {self._serial}>"
+
+
+class AsyncServo:
+    """
+    A class representing a servo on the servo board.
+
+    :param serial: The serial wrapper to use to communicate with the board.
+    :param index: The index of the servo on the board.
+    """
+
+    def __init__(self, serial: AsyncSerialWrapper, index: int):
+        self._serial = serial
+        self._index = index
+
+        self._duty_min = START_DUTY_MIN
+        self._duty_max = START_DUTY_MAX
+
+    async def get_position(self) -> float | None:
+        """
+        Get the position of the servo.
+
+        :return: The position of the servo as a float between -1.0 and 1.0 or None if disabled.
+        """
+        response = await self._serial.query(f'SERVO:{self._index}:GET?')
+        data = int(response)
+        if data == 0:
+            return None
+        return map_to_float(data, self._duty_min, self._duty_max, -1.0, 1.0, precision=3)
+
+    async def set_position(self, value: float | None) -> None:
+        """
+        Set the position of the servo.
+
+        :param value: The position of the servo as a float between -1.0 and 1.0
+            or None to disable.
+        """
+        if value is None:
+            await self.disable()
+            return
+
+        setpoint = map_to_int(value, -1.0, 1.0, self._duty_min, self._duty_max)
+        await self._serial.write(f'SERVO:{self._index}:SET:{setpoint}')
+
+    async def disable(self) -> None:
+        """Disable the servo."""
+        await self._serial.write(f'SERVO:{self._index}:DISABLE')
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__qualname__} index={self._index} {self._serial}>"
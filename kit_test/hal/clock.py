@@ -0,0 +1,294 @@
+"""
+The clock used for the delays in the board tests and the HAL.
+
+Every fixed delay, such as waiting after connecting to a board, backing off before
+a retry or waiting for a measurement to settle, goes through the active clock.
+Normally this is the real clock, but when testing against simulated boards a
+VirtualClock can be used instead. Sleeping on a virtual clock advances its time
+and returns immediately, so a whole test sequence runs as fast as the simulated
+board can respond while still seeing the delays it asked for.
+
+Each thread has its own virtual time, so threads sleeping at the same time don't
+use up each other's delays, as they wouldn't on the real clock. A thread started
+in a copy of another thread's context, such as a StepRunner step, starts from
+that thread's time. A thread that waits for other threads to finish can catch up
+with them using wait_until.
+
+A background thread that samples the board alongside the test, such as a
+TelemetrySampler, waits for its next sample with pace instead of sleeping. On a
+virtual clock it then waits in real time for the other threads' time to reach
+its next sample, and their sleeps wait for it to catch up, as if it was sampling
+while they slept.
+
+Serial timeouts and latency measurements always use real time.
+"""
+from __future__ import annotations
+
+import contextlib
+import threading
+import time
+from contextvars import ContextVar
+from typing import Iterator
+
+# The longest real time a sleep on a virtual clock waits for paced threads to catch up,
+# in case a paced thread is blocked by the sleeping thread
+PACE_TIMEOUT = 1.0
+# The real time between checks of a paced thread's stop event
+PACE_POLL = 0.01
+
+
+class Clock:
+    """The real clock."""
+
+    def monotonic(self) -> float:
+        """Return the current time in seconds, which never goes backwards."""
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Wait for a length of time.
+
+        :param seconds: The time to wait, in seconds.
+        """
+        time.sleep(seconds)
+
+    def wait_until(self, timestamp: float) -> None:
+        """
+        Wait until the clock reaches a time, returning immediately if it has passed.
+
+        :param timestamp: The time to wait for, from monotonic.
+        """
+        self.sleep(max(0.0, timestamp - self.monotonic()))
+
+    def wait(self, event: threading.Event, seconds: float) -> bool:
+        """
+        Wait for an event to be set, for at most a length of time.
+
+        :param event: The event to wait for.
+        :param seconds: The maximum time to wait, in seconds.
+        :return: Whether the event was set.
+        """
+        return event.wait(seconds)
+
+    def follow(self, event: threading.Event) -> None:
+        """
+        Start pacing the current thread with the threads using the clock, see pace.
+
+        :param event: The event that stops the thread, the thread is paced until it is set.
+        """
+
+    def pace(self, event: threading.Event, timestamp: float) -> bool:
+        """
+        Wait for an event to be set or the clock to reach a time, in a background thread.
+
+        On the real clock this is the same as wait.
+
+        :param event: The event that stops the thread.
+        :param timestamp: The time to wait for, from monotonic.
+        :return: Whether the event was set.
+        """
+        return self.wait(event, max(0.0, timestamp - self.monotonic()))
+
+
+class VirtualClock(Clock):
+    """
+    A clock whose time only advances when something sleeps.
+
+    The time is held separately for each context, see the module docstring.
+
+    :param start: The initial time of the clock, in seconds.
+    """
+
+    def __init__(self, start: float = 0.0) -> None:
+        self._start = start
+        self._now: ContextVar[float] = ContextVar(f'virtual_time_{id(self)}', default=start)
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        # The furthest any thread has advanced the time
+        self._latest = start
+        # The time each paced thread is waiting for, keyed by its stop event,
+        # None while it is busy
+        self._paced: dict[threading.Event, float | None] = {}
+        # The stop event of the current thread, if it is paced
+        self._local = threading.local()
+
+    @property
+    def slept(self) -> float:
+        """The time the longest running thread slept, used to report the real time saved."""
+        with self._lock:
+            return self._latest - self._start
+
+    def monotonic(self) -> float:
+        """Return the virtual time of the current context in seconds."""
+        return self._now.get()
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Advance the virtual time without waiting.
+
+        :param seconds: The time to advance by, in seconds.
+        """
+        self.advance(seconds)
+        # Let any other threads run, as a real sleep would
+        time.sleep(0)
+
+    def wait(self, event: threading.Event, seconds: float) -> bool:
+        """
+        Advance the virtual time by the timeout, unless the event has been set.
+
+        :param event: The event to wait for.
+        :param seconds: The maximum time to wait, in seconds.
+        :return: Whether the event was set.
+        """
+        if not event.is_set():
+            self.sleep(seconds)
+        return event.is_set()
+
+    def advance(self, seconds: float) -> None:
+        """
+        Move the virtual time of the current context forwards.
+
+        :param seconds: The time to advance by, in seconds, negative values are ignored.
+        """
+        now = self._now.get() + max(0.0, seconds)
+        self._now.set(now)
+        own = getattr(self._local, 'event', None)
+        with self._condition:
+            self._latest = max(self._latest, now)
+            self._condition.notify_all()
+            # Let the paced threads catch up, as they would have while sleeping
+            self._condition.wait_for(lambda: self._caught_up(now, own), PACE_TIMEOUT)
+
+    def _caught_up(self, now: float, own: threading.Event | None) -> bool:
+        return all(
+            event is own or event.is_set() or (target is not None and target > now)
+            for event, target in self._paced.items())
+
+    def follow(self, event: threading.Event) -> None:
+        """
+        Start pacing the current thread with the threads using the clock.
+
+        From now on, the other threads' sleeps wait for this thread to be waiting in
+        pace for a later time, until the event is set.
+
+        :param event: The event that stops the thread, the thread is paced until it is set.
+        """
+        self._local.event = event
+        with self._condition:
+            self._paced[event] = None
+
+    def pace(self, event: threading.Event, timestamp: float) -> bool:
+        """
+        Wait in real time until another thread's time reaches a time, or the event is set.
+
+        The current thread's time then advances to the time waited for.
+
+        :param event: The event that stops the thread.
+        :param timestamp: The time to wait for, from monotonic.
+        :return: Whether the event was set.
+        """
+        if getattr(self._local, 'event', None) is not event:
+            self.follow(event)
+        with self._condition:
+            self._paced[event] = timestamp
+            self._condition.notify_all()
+            while not event.is_set() and self._latest < timestamp:
+                # Poll, so the thread stops soon after its event is set
+                self._condition.wait(PACE_POLL)
+            if event.is_set():
+                del self._paced[event]
+                return True
+            self._paced[event] = None
+        self._now.set(max(self._now.get(), timestamp))
+        return False
+
+
+_clock: Clock = Clock()
+
+
+def get_clock() -> Clock:
+    """Return the active clock."""
+    return _clock
+
+
+def set_clock(clock: Clock | None) -> None:
+    """
+    Set the active clock used by the board tests and the HAL.
+
+    :param clock: The clock to use, None for the real clock.
+    """
+    global _clock
+    _clock = clock if clock is not None else Clock()
+
+
+@contextlib.contextmanager
+def use_clock(clock: Clock) -> Iterator[Clock]:
+    """
+    Use a clock for the duration of a with block.
+
+    :param clock: The clock to use.
+    :return: The clock.
+    """
+    previous = _clock
+    set_clock(clock)
+    try:
+        yield clock
+    finally:
+        set_clock(previous)
+
+
+def monotonic() -> float:
+    """Return the current time of the active clock, in seconds."""
+    return _clock.monotonic()
+
+
+def sleep(seconds: float) -> None:
+    """
+    Wait for a length of time on the active clock.
+
+    :param seconds: The time to wait, in seconds.
+    """
+    _clock.sleep(seconds)
+
+
+def wait_until(timestamp: float) -> None:
+    """
+    Wait until the active clock reaches a time, returning immediately if it has passed.
+
+    :param timestamp: The time to wait for, from monotonic.
+    """
+    _clock.wait_until(timestamp)
+
+
+def wait(event: threading.Event, seconds: float) -> bool:
+    """
+    Wait for an event to be set, for at most a length of time on the active clock.
+
+    :param event: The event to wait for.
+    :param seconds: The maximum time to wait, in seconds.
+    :return: Whether the event was set.
+    """
+    return _clock.wait(event, seconds)
+
+
+def follow(event: threading.Event) -> None:
+    """
+    Start pacing the current thread with the threads using the active clock, see pace.
+
+    :param event: The event that stops the thread, the thread is paced until it is set.
+    """
+    _clock.follow(event)
+
+
+def pace(event: threading.Event, timestamp: float) -> bool:
+    """
+    Wait for an event to be set or the active clock to reach a time, in a background thread.
+
+    On a virtual clock the thread waits for the other threads' time to reach the time,
+    and their sleeps wait for it to catch up.
+
+    :param event: The event that stops the thread.
+    :param timestamp: The time to wait for, from monotonic.
+    :return: Whether the event was set.
+    """
+    return _clock.pace(event, timestamp)
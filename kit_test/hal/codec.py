@@ -0,0 +1,108 @@
+"""
+Encoding of commands and decoding of responses for the boards' text protocol.
+
+Commands that are sent repeatedly, such as 'OUT:3:I?', are encoded once when the
+board objects are created and sent as bytes. Responses are parsed directly from the
+bytes read from the board, avoiding decoding and stripping a string for every call.
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+
+NEWLINE = b'\n'
+NACK = b'NACK'
+
+
+@lru_cache(maxsize=1024)
+def encode_command(command: str) -> bytes:
+    """
+    Encode a command ready to be written to a board.
+
+    :param command: The command, without the trailing newline.
+    :return: The ASCII encoded command, including the trailing newline.
+    """
+    return command.encode('ascii') + NEWLINE
+
+
+def encode_set(prefix: bytes, value: int) -> bytes:
+    """
+    Encode a command that ends in an integer value.
+
+    :param prefix: The encoded command up to the value, e.g. b'SERVO:7:SET:'.
+    :param value: The value to append.
+    :return: The encoded command, including the trailing newline.
+    """
+    return b'%s%d\n' % (prefix, value)
+
+
+def is_query(command: bytes) -> bool:
+    """
+    Check whether an encoded command only reads from the board, such as 'OUT:0:I?'.
+
+    :param command: The encoded command, including the trailing newline.
+    :return: Whether the command is a query.
+    """
+    return command.endswith(b'?' + NEWLINE)
+
+
+def can_resend(commands: list[bytes]) -> bool:
+    """
+    Check whether the unanswered commands of a failed transaction can be sent again.
+
+    The board may have applied a write without its response arriving, so writes are
+    only sent again on their own, as a single failed command always has been.
+
+    :param commands: The encoded commands that weren't answered.
+    :return: Whether the commands can be retried.
+    """
+    return len(commands) <= 1 or all(is_query(command) for command in commands)
+
+
+def decode_command(command: bytes) -> str:
+    """
+    Decode an encoded command, used for logging and statistics.
+
+    :param command: The encoded command, including the trailing newline.
+    :return: The command without the trailing newline.
+    """
+    return command.decode('ascii').rstrip('\n')
+
+
+def decode_response(response: bytes) -> str:
+    """
+    Decode a response from a board.
+
+    :param response: The response, without the trailing newline.
+    :return: The response as a string.
+    """
+    return response.decode('ascii')
+
+
+def parse_milli(response: bytes) -> float:
+    """
+    Parse a response in milli-units, e.g. milliamps, into base units.
+
+    :param response: The response, without the trailing newline.
+    :return: The value divided by 1000.
+    """
+    return float(response) / 1000
+
+
+def parse_bool(response: bytes) -> bool:
+    """
+    Parse a response of '1' or '0'.
+
+    :param response: The response, without the trailing newline.
+    :return: Whether the response was '1'.
+    """
+    return response == b'1'
+
+
+def parse_fields(response: bytes) -> list[bytes]:
+    """
+    Split a response into its colon separated fields.
+
+    :param response: The response, without the trailing newline.
+    :return: The fields of the response.
+    """
+    return response.split(b':')
@@ -2,7 +2,15 @@
 from __future__ import annotations
 
 import logging
-from typing import NamedTuple
+import os
+import select
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from types import TracebackType
+from typing import Iterable, Iterator, NamedTuple
 
 from serial.tools.list_ports import comports
 from serial.tools.list_ports_common import ListPortInfo
@@ -11,6 +19,18 @@ from .utils import BoardIdentity
 
 logger = logging.getLogger(__name__)
 
+# The netlink protocol and multicast group of the kernel's device uevents
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_KERNEL_GROUP = 1
+# The time between rescans while waiting on netlink, in case events aren't delivered
+NETLINK_RESCAN_INTERVAL = 5.0
+
+# Where Linux lists tty devices, and the names used by USB serial devices
+SYSFS_TTY = Path('/sys/class/tty')
+SYSFS_USB_TTYS = ('ttyACM*', 'ttyUSB*')
+# How long the USB descriptor of a port found in sysfs is reused for, in seconds
+IDENTITY_CACHE_TTL = 2.0
+
 
 class VidPid(NamedTuple):
     """A named tuple containing the vendor ID and product ID of a USB device."""
@@ -32,16 +52,25 @@ class Port(NamedTuple):
         return f"{self.port} ({self.identity})"
 
 
-def discover_boards(pidvids: list[VidPid] | VidPid) -> list[Port]:
+def discover_boards(pidvids: Iterable[VidPid] | VidPid) -> list[Port]:
     """
     Discover boards connected to the system.
 
+    On Linux only the USB serial devices in sysfs are scanned, and their USB descriptors
+    are cached for IDENTITY_CACHE_TTL. Elsewhere every serial port from pyserial's
+    comports is checked.
+
     :param pidvids: A list of vendor ID and product ID pairs to search for.
         If a single pair is given, it will be used as a filter.
     :return: A list of ports for the discovered boards.
     """
     if isinstance(pidvids, VidPid):
-        pidvids = [pidvids]
+        pidvids = {pidvids}
+    else:
+        pidvids = set(pidvids)
+
+    if SYSFS_TTY.is_dir():
+        return _discover_sysfs(pidvids)
 
     boards: list[Port] = []
 
@@ -65,6 +94,125 @@ def discover_boards(pidvids: list[VidPid] | VidPid) -> list[Port]:
     return boards
 
 
+class _SysfsEntry(NamedTuple):
+    """The cached USB descriptor of a tty device."""
+
+    expires: float
+    usb_device: str
+    vidpid: VidPid
+    identity: BoardIdentity | None
+
+
+# The USB descriptors of tty devices, keyed by tty name and USB device number
+_sysfs_cache: dict[tuple[str, str], _SysfsEntry] = {}
+_sysfs_cache_lock = threading.Lock()
+
+
+def _read_sysfs(path: str, name: str) -> str | None:
+    try:
+        with open(os.path.join(path, name)) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _usb_device_path(tty: Path) -> str | None:
+    """
+    Find the sysfs directory of the USB device a tty belongs to.
+
+    This follows the same layout as pyserial's Linux port listing.
+
+    :param tty: The tty's directory in /sys/class/tty.
+    :return: The path of the USB device, or None if the tty isn't a USB device.
+    """
+    device = os.path.realpath(tty / 'device')
+    subsystem = os.path.basename(os.path.realpath(os.path.join(device, 'subsystem')))
+    if subsystem == 'usb-serial':
+        interface = os.path.dirname(device)
+    elif subsystem == 'usb':
+        interface = device
+    else:
+        return None
+    return os.path.dirname(interface)
+
+
+def _discover_sysfs(pidvids: set[VidPid]) -> list[Port]:
+    """
+    Discover boards by scanning the USB serial devices in sysfs.
+
+    Only the vendor and product IDs are read for devices that don't match.
+
+    :param pidvids: The vendor ID and product ID pairs to search for.
+    :return: A list of ports for the discovered boards.
+    """
+    now = time.monotonic()
+    ttys = sorted(tty for pattern in SYSFS_USB_TTYS for tty in SYSFS_TTY.glob(pattern))
+
+    boards: list[Port] = []
+    with _sysfs_cache_lock:
+        for tty in ttys:
+            key, entry = _cached_sysfs_entry(tty, now)
+            if entry is None or entry.vidpid not in pidvids:
+                continue
+
+            identity = entry.identity
+            if identity is None:
+                # Only read the rest of the descriptor for matching devices
+                identity = BoardIdentity(
+                    manufacturer=_read_sysfs(entry.usb_device, 'manufacturer') or "",
+                    board_type=_read_sysfs(entry.usb_device, 'product') or "",
+                    asset_tag=_read_sysfs(entry.usb_device, 'serial') or "",
+                )
+                _sysfs_cache[key] = entry._replace(identity=identity)
+            boards.append(Port(f'/dev/{tty.name}', identity))
+
+        for key in [key for key, cached in _sysfs_cache.items() if cached.expires < now]:
+            del _sysfs_cache[key]
+    return boards
+
+
+def _cached_sysfs_entry(
+    tty: Path, now: float,
+) -> tuple[tuple[str, str], _SysfsEntry | None]:
+    """
+    Get the USB descriptor of a tty, from the cache if it is still valid.
+
+    The USB device number changes whenever a device is reconnected,
+    so a different board on the same port is never given a cached identity.
+
+    :param tty: The tty's directory in /sys/class/tty.
+    :param now: The current monotonic time.
+    :return: The tty's cache key and entry, the entry is None if it isn't a USB device.
+    """
+    usb_device = _usb_device_path(tty)
+    if usb_device is None:
+        return (tty.name, ''), None
+    key = (tty.name, f"{usb_device}:{_read_sysfs(usb_device, 'devnum')}")
+
+    entry = _sysfs_cache.get(key)
+    if entry is not None and entry.expires >= now:
+        return key, entry
+
+    vendor_id = _read_sysfs(usb_device, 'idVendor')
+    product_id = _read_sysfs(usb_device, 'idProduct')
+    if vendor_id is None or product_id is None:
+        return key, None
+    try:
+        vidpid = VidPid(int(vendor_id, 16), int(product_id, 16))
+    except ValueError:
+        return key, None
+
+    entry = _sysfs_cache[key] = _SysfsEntry(
+        now + IDENTITY_CACHE_TTL, usb_device, vidpid, None)
+    return key, entry
+
+
+def clear_discovery_cache() -> None:
+    """Forget the cached USB descriptors, so the next discovery rereads them all."""
+    with _sysfs_cache_lock:
+        _sysfs_cache.clear()
+
+
 def get_USB_identity(port: ListPortInfo) -> BoardIdentity:
     """
     Generate an approximate identity for a board using the USB descriptor.
@@ -85,3 +233,170 @@ def get_USB_identity(port: ListPortInfo) -> BoardIdentity:
         logger.warning(
             f"Failed to pull identifying information from serial device {port.device}")
         return BoardIdentity()
+
+
+class BoardEvent(NamedTuple):
+    """A board being connected or disconnected."""
+
+    action: str  # 'add' or 'remove'
+    port: Port
+
+    def __str__(self) -> str:
+        return f"{self.action} {self.port}"
+
+
+class BoardWatcher:
+    """
+    Watch for boards being connected and disconnected.
+
+    On Linux the watcher sleeps on the kernel's netlink device events and rescans
+    the serial ports when a tty device changes, or every NETLINK_RESCAN_INTERVAL
+    in case events aren't delivered, such as in some containers. Elsewhere, or if the
+    netlink socket can't be opened, the serial ports are rescanned every poll_interval.
+
+    Boards already connected when the watcher is created are reported as added
+    by the first call to poll.
+
+    :param pidvids: The vendor ID and product ID pairs of the boards to watch for.
+    :param poll_interval: The time between rescans when netlink isn't available, in seconds.
+    """
+
+    def __init__(self, pidvids: list[VidPid] | VidPid, poll_interval: float = 0.5) -> None:
+        self.pidvids = pidvids
+        self.poll_interval = poll_interval
+        self._known: dict[str, Port] = {}
+        self._pending: list[BoardEvent] = []
+        self._first_scan = True
+        self._socket = self._open_uevent_socket()
+
+    @staticmethod
+    def _open_uevent_socket() -> socket.socket | None:
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            sock = socket.socket(
+                socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+            sock.bind((0, UEVENT_KERNEL_GROUP))
+        except OSError as e:
+            logger.debug(f"Netlink uevents unavailable, polling for boards instead: {e}")
+            return None
+        sock.setblocking(False)
+        return sock
+
+    def _scan(self) -> list[BoardEvent]:
+        """Rescan the serial ports and return the changes since the last scan."""
+        current = {port.port: port for port in discover_boards(self.pidvids)}
+        events = [
+            BoardEvent('remove', port)
+            for name, port in self._known.items() if name not in current
+        ] + [
+            BoardEvent('add', port)
+            for name, port in current.items() if name not in self._known
+        ]
+        self._known = current
+        return events
+
+    def _wait_for_uevent(self, timeout: float | None) -> bool:
+        """
+        Wait for a tty device to be added or removed.
+
+        :param timeout: The maximum time to wait, in seconds, or None to wait forever.
+        :return: True if a tty device changed, False if the timeout expired.
+        """
+        assert self._socket is not None
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            readable, _, _ = select.select([self._socket], [], [], remaining)
+            if not readable:
+                return False
+
+            changed = False
+            while True:
+                try:
+                    message = self._socket.recv(8192)
+                except BlockingIOError:
+                    break
+                # Messages are NUL separated KEY=value fields after an action@path header
+                if b'\0SUBSYSTEM=tty\0' in message:
+                    changed = True
+            if changed:
+                return True
+
+    def poll(self, timeout: float | None = None) -> list[BoardEvent]:
+        """
+        Wait for boards to be connected or disconnected.
+
+        :param timeout: The maximum time to wait, in seconds, or None to wait forever.
+        :return: The events that occurred, empty if the timeout expired first.
+        """
+        if self._pending:
+            events, self._pending = self._pending, []
+            return events
+        if self._first_scan:
+            self._first_scan = False
+            events = self._scan()
+            if events:
+                return events
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return []
+
+            if self._socket is not None:
+                self._wait_for_uevent(
+                    NETLINK_RESCAN_INTERVAL if remaining is None
+                    else min(NETLINK_RESCAN_INTERVAL, remaining))
+            else:
+                time.sleep(self.poll_interval if remaining is None
+                           else min(self.poll_interval, remaining))
+
+            events = self._scan()
+            if events:
+                return events
+
+    def wait_for(self, action: str, timeout: float | None = None) -> BoardEvent | None:
+        """
+        Wait for a board to be added or removed.
+
+        Events for the other action that occur while waiting are discarded.
+
+        :param action: The action to wait for, 'add' or 'remove'.
+        :param timeout: The maximum time to wait, in seconds, or None to wait forever.
+        :return: The first matching event, or None if the timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            events = self.poll(remaining)
+            if not events:
+                return None
+            for index, event in enumerate(events):
+                if event.action == action:
+                    # Keep the events after this one for the next call
+                    self._pending = events[index + 1:]
+                    return event
+
+    def __iter__(self) -> Iterator[BoardEvent]:
+        """Yield events forever as boards are connected and disconnected."""
+        while True:
+            yield from self.poll()
+
+    def close(self) -> None:
+        """Close the netlink socket, if open."""
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def __enter__(self) -> BoardWatcher:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,190 @@
+"""
+A flight recorder of the recent serial transactions with a board.
+
+When enabled, each SerialWrapper keeps the last few transactions with its board,
+along with any retries, timeouts and reconnections, in a ring buffer. The buffer
+is written to a file when a board test fails so the wire history around the
+failure is available without running the whole session with TRACE logging.
+
+The recorder is disabled by default and costs nothing while disabled.
+Use configure to enable it for every SerialWrapper created afterwards.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
+
+from .codec import decode_command
+
+logger = logging.getLogger(__name__)
+
+# The number of entries each new recorder keeps, 0 disables the recorders
+_capacity = 0
+# The directory recordings are written to
+_directory = Path('.')
+
+
+def configure(capacity: int, directory: Path | str = '.') -> None:
+    """
+    Set up the flight recorders of the SerialWrappers created after this call.
+
+    :param capacity: The number of entries to keep for each board, 0 disables recording.
+    :param directory: The directory to write recordings to.
+    """
+    global _capacity, _directory
+    _capacity = capacity
+    _directory = Path(directory)
+
+
+def create_recorder(name: str) -> FlightRecorder | None:
+    """
+    Create a flight recorder with the configured settings.
+
+    :param name: The name of the board being recorded.
+    :return: The new recorder, or None if recording is disabled.
+    """
+    if _capacity <= 0:
+        return None
+    return FlightRecorder(name, _capacity, _directory)
+
+
+class RecorderEntry(NamedTuple):
+    """
+    A single entry in a flight recording.
+
+    :param start: The monotonic time the event started.
+    :param end: The monotonic time the event ended, equal to start for instant events.
+    :param event: The type of event, e.g. 'transaction', 'timeout' or 'reconnect'.
+    :param commands: The encoded commands sent, if any.
+    :param responses: The responses received to the commands, if any.
+    :param detail: Any further information about the event.
+    """
+
+    start: float
+    end: float
+    event: str
+    commands: tuple[bytes, ...] = ()
+    responses: tuple[bytes, ...] = ()
+    detail: str = ''
+
+
+class FlightRecorder:
+    """
+    A ring buffer of the most recent serial events of a board.
+
+    :param name: The name of the board, used in the recording's filename.
+    :param capacity: The number of entries to keep.
+    :param directory: The directory to write recordings to.
+    """
+
+    def __init__(self, name: str, capacity: int, directory: Path | str = '.') -> None:
+        self.name = name
+        self.directory = Path(directory)
+        self._entries: deque[RecorderEntry] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+    def record_transaction(
+        self,
+        start: float,
+        commands: list[bytes],
+        responses: list[bytes],
+        event: str = 'transaction',
+        detail: str = '',
+    ) -> None:
+        """
+        Record a transaction with the board, ending now.
+
+        :param start: The monotonic time the commands were written.
+        :param commands: The encoded commands written to the board.
+        :param responses: The responses read from the board,
+            which may be fewer than the commands if the transaction failed.
+        :param event: The type of transaction, 'transaction' if it completed.
+        :param detail: Any further information about the transaction.
+        """
+        entry = RecorderEntry(
+            start, time.monotonic(), event, tuple(commands), tuple(responses), detail)
+        with self._lock:
+            self._entries.append(entry)
+
+    def record_event(self, event: str, detail: str = '') -> None:
+        """
+        Record an event that isn't a transaction, such as a retry or reconnection.
+
+        :param event: The type of event.
+        :param detail: Any further information about the event.
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._entries.append(RecorderEntry(now, now, event, detail=detail))
+
+    def entries(self) -> list[RecorderEntry]:
+        """Return the recorded entries, oldest first."""
+        with self._lock:
+            return list(self._entries)
+
+    def clear(self) -> None:
+        """Discard all the recorded entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def format(self) -> list[str]:
+        """
+        Format the recorded entries for writing to a file.
+
+        Times are given in seconds relative to the last entry,
+        followed by the duration of the event in milliseconds.
+
+        :return: The lines of the recording.
+        """
+        entries = self.entries()
+        if not entries:
+            return []
+        last = entries[-1].end
+
+        lines = []
+        for entry in entries:
+            prefix = (
+                f"{entry.start - last:+11.6f}s {(entry.end - entry.start) * 1000:8.3f}ms "
+                f"{entry.event:<12}")
+            if entry.detail:
+                lines.append(f"{prefix} {entry.detail}")
+            for index, command in enumerate(entry.commands):
+                if index < len(entry.responses):
+                    response = entry.responses[index].rstrip(b'\n')
+                    result = repr(response.decode('ascii', errors='backslashreplace'))
+                else:
+                    result = '<no response>'
+                lines.append(f"{prefix} {decode_command(command)!r} -> {result}")
+        return lines
+
+    def dump(self, reason: BaseException | str = '') -> Path | None:
+        """
+        Write the recording to a new file in the recorder's directory.
+
+        :param reason: The error or description of why the recording is being written.
+        :return: The path of the file written, or None if nothing has been recorded.
+        """
+        lines = self.format()
+        if not lines:
+            return None
+
+        timestamp = datetime.now().strftime('%Y%m%d-%H%M%S.%f')
+        safe_name = re.sub(r'[^\w.-]+', '_', self.name) or 'board'
+        path = self.directory / f"flight-{safe_name}-{timestamp}.log"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(f"# Flight recording of {self.name}\n")
+            if isinstance(reason, BaseException):
+                reason = f"{type(reason).__name__}: {reason}"
+            if reason:
+                f.write(f"# Reason: {reason}\n")
+            f.write('\n'.join(lines) + '\n')
+
+        logger.error(f"Serial flight recording of {self.name} saved to {path}")
+        return path
@@ -2,10 +2,14 @@
 from __future__ import annotations
 
 import logging
+import threading
 from enum import IntEnum
-from typing import NamedTuple
+from typing import Callable, NamedTuple
 
+from . import clock
+from .codec import decode_response, encode_command, encode_set, parse_fields, parse_milli
 from .discovery import VidPid
+from .flight_recorder import FlightRecorder
 from .serial_wrapper import SerialWrapper
 from .utils import (
     BoardIdentity,
@@ -17,6 +21,10 @@ logger = logging.getLogger(__name__)
 BAUDRATE = 115200
 VIDPID = VidPid(0x0403, 0x6001)  # FTDI FT232R chip used on the motor board
 
+CMD_STATUS = encode_command('*STATUS?')
+# The commands of a snapshot, the status then each motor's current
+CMD_SNAPSHOT = [CMD_STATUS, *(encode_command(f'MOT:{index}:I?') for index in range(2))]
+
 
 class MotorPower(IntEnum):
     """Special values for motor power."""
@@ -47,6 +55,27 @@ class MotorStatus(NamedTuple):
         return cls(output_faults, input_voltage, tuple(other))
 
 
+class MotorSnapshot(NamedTuple):
+    """
+    The state of the motor board, all read in a single exchange.
+
+    The motor board has no battery current sensor,
+    the battery voltage is the input voltage in the status.
+
+    :param timestamp: The monotonic time the snapshot was requested.
+    :param status: The status of the board.
+    :param motor_currents: The current draw of each motor, in amps.
+    """
+
+    timestamp: float
+    status: MotorStatus
+    motor_currents: tuple[float, ...]
+
+    def age(self) -> float:
+        """Return the time since the snapshot was taken, in seconds."""
+        return clock.monotonic() - self.timestamp
+
+
 class MotorBoard:
     """
     A class representing the motor board interface.
@@ -56,28 +85,52 @@ class MotorBoard:
 
     :param serial_port: The serial port to connect to.
     :param initial_identity: The identity of the board, as reported by the USB descriptor.
+    :param multiplexed: Share the serial port between threads through a dedicated I/O
+        thread, see SerialWrapper.
+    :param serial_wrapper: An existing connection to the board to use instead of
+        opening a new one, the other connection arguments are then ignored.
+    :param shadow_cache: Skip commands that set a channel to the value it already has,
+        see shadow_cache.ShadowCache.
+    :param identity: The identity the board has already reported to *IDN?,
+        to skip identifying it again.
     """
 
     def __init__(
         self,
         serial_port: str,
         initial_identity: BoardIdentity | None = None,
+        multiplexed: bool = False,
+        serial_wrapper: SerialWrapper | None = None,
+        shadow_cache: bool = False,
+        identity: BoardIdentity | None = None,
     ) -> None:
         if initial_identity is None:
             initial_identity = BoardIdentity()
-        self._serial = SerialWrapper(serial_port, BAUDRATE, identity=initial_identity)
+        if serial_wrapper is None:
+            serial_wrapper = SerialWrapper(
+                serial_port, BAUDRATE, identity=initial_identity, multiplexed=multiplexed,
+                shadow_cache=shadow_cache)
+        self._serial = serial_wrapper
+        self._snapshot_lock = threading.Lock()
+        self._snapshot: MotorSnapshot | None = None
 
         self.motors = (
-            Motor(self._serial, 0),
-            Motor(self._serial, 1)
+            Motor(self._serial, 0, self.snapshot),
+            Motor(self._serial, 1, self.snapshot)
         )
 
-        identity = self.identify()
+        if identity is None:
+            identity = self.identify()
         assert identity.board_type == 'MCv4B', \
             f"Expected board type 'MCv4B', got {identity.board_type!r} instead."
 
         self._serial.set_identity(identity)
 
+    @property
+    def identity(self) -> BoardIdentity:
+        """The identity the board reported when it was connected."""
+        return self._serial.identity
+
     def identify(self) -> BoardIdentity:
         """
         Get the identity of the board.
@@ -93,8 +146,55 @@ class MotorBoard:
 
         :return: The status of the board.
         """
-        response = self._serial.query('*STATUS?')
-        return MotorStatus.from_status_response(response)
+        response = self._serial.query_raw(CMD_STATUS)
+        return self._parse_status(response)
+
+    def _parse_status(self, response: bytes) -> MotorStatus:
+        status = MotorStatus.from_status_response(decode_response(response))
+        # The firmware may have disabled motors that are in a fault state
+        self._serial.shadow_cache.invalidate(*(
+            f'MOT:{index}' for index, fault in enumerate(status.output_faults) if fault))
+        return status
+
+    def snapshot(self, max_age: float = 0) -> MotorSnapshot:
+        """
+        Read the status and every motor current in one exchange.
+
+        This is much faster than reading each value separately,
+        and all the values are read at the same moment.
+
+        :param max_age: Reuse the last snapshot if it was taken at most this many
+            seconds ago, 0 always takes a new snapshot.
+        :return: The snapshot of the board.
+        """
+        with self._snapshot_lock:
+            last = self._snapshot
+        if last is not None and max_age > 0 and last.age() <= max_age:
+            return last
+
+        timestamp = clock.monotonic()
+        responses = self._serial.query_multi_raw(CMD_SNAPSHOT)
+        snapshot = MotorSnapshot(
+            timestamp=timestamp,
+            status=self._parse_status(responses[0]),
+            motor_currents=tuple(parse_milli(response) for response in responses[1:]),
+        )
+        with self._snapshot_lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def query_multi(self, commands: list[str]) -> list[str]:
+        """
+        Send several raw commands to the board in a single exchange.
+
+        The commands are sent in one write and the responses are read back in order,
+        which is much faster than sending each command separately.
+
+        :param commands: The commands to send, without trailing newlines.
+        :raises RuntimeError: If the board returns a NACK to any of the commands.
+        :return: The responses to each of the commands, in order.
+        """
+        return self._serial.query_multi(commands)
 
     def reset(self) -> None:
         """
@@ -102,7 +202,15 @@ class MotorBoard:
 
         This command disables the motors and clears all faults.
         """
-        self._serial.write('*RESET')
+        try:
+            self._serial.write('*RESET')
+        finally:
+            self._serial.shadow_cache.invalidate()
+
+    @property
+    def flight_recorder(self) -> FlightRecorder | None:
+        """The recorder of the board's recent serial transactions, None if disabled."""
+        return self._serial.flight_recorder
 
     def close(self) -> None:
         """Close the underlying serial port."""
@@ -121,11 +229,26 @@ class Motor:
 
     :param serial: The serial wrapper to use to communicate with the board.
     :param index: The index of the motor on the board.
+    :param snapshot: The function to get a snapshot of the board with a maximum age,
+        used when reading values from a snapshot.
     """
 
-    def __init__(self, serial: SerialWrapper, index: int):
+    def __init__(
+        self,
+        serial: SerialWrapper,
+        index: int,
+        snapshot: Callable[[float], MotorSnapshot] | None = None,
+    ):
         self._serial = serial
         self._index = index
+        self._snapshot = snapshot
+        self._key = f'MOT:{index}'
+
+        # Pre-encode the commands used by this motor
+        self._cmd_get = encode_command(f'MOT:{index}:GET?')
+        self._cmd_current = encode_command(f'MOT:{index}:I?')
+        self._cmd_disable = encode_command(f'MOT:{index}:DISABLE')
+        self._cmd_set_prefix = f'MOT:{index}:SET:'.encode('ascii')
 
     def get_power(self) -> float:
         """
@@ -134,10 +257,10 @@ class Motor:
         :return: The power of the motor as a float between -1.0 and 1.0
             or the special value MotorPower.COAST.
         """
-        response = self._serial.query(f'MOT:{self._index}:GET?')
+        response = self._serial.query_raw(self._cmd_get)
 
-        data = response.split(':')
-        enabled = (data[0] == '1')
+        data = parse_fields(response)
+        enabled = (data[0] == b'1')
         value = int(data[1])
 
         if not enabled:
@@ -155,29 +278,41 @@ class Motor:
             or the special values MotorPower.COAST and MotorPower.BRAKE.
         """
         if value == MotorPower.COAST:
-            self._serial.write(f'MOT:{self._index}:DISABLE')
+            self._serial.write_shadowed(self._key, MotorPower.COAST, self._cmd_disable)
             return
 
         setpoint = map_to_int(value, -1.0, 1.0, -1000, 1000)
-        self._serial.write(f'MOT:{self._index}:SET:{setpoint}')
+        self._serial.write_shadowed(
+            self._key, setpoint, encode_set(self._cmd_set_prefix, setpoint))
 
-    def current(self) -> float:
+    def current(self, max_age: float | None = None) -> float:
         """
         Read the current draw of the motor.
 
+        :param max_age: Read the value from a snapshot of the board at most this many
+            seconds old instead of querying the motor, see MotorBoard.snapshot.
         :return: The current draw of the motor in amps.
         """
-        response = self._serial.query(f'MOT:{self._index}:I?')
-        return float(response) / 1000
+        if max_age is not None and self._snapshot is not None:
+            return self._snapshot(max_age).motor_currents[self._index]
+        response = self._serial.query_raw(self._cmd_current)
+        return parse_milli(response)
 
-    def in_fault(self) -> bool:
+    def in_fault(self, max_age: float | None = None) -> bool:
         """
         Check if the motor is in a fault state.
 
+        :param max_age: Read the value from a snapshot of the board at most this many
+            seconds old instead of querying the status, see MotorBoard.snapshot.
         :return: True if the motor is in a fault state, False otherwise.
         """
-        response = self._serial.query('*STATUS?')
-        return MotorStatus.from_status_response(response).output_faults[self._index]
+        if max_age is not None and self._snapshot is not None:
+            return self._snapshot(max_age).status.output_faults[self._index]
+        response = decode_response(self._serial.query_raw(CMD_STATUS))
+        fault = MotorStatus.from_status_response(response).output_faults[self._index]
+        if fault:
+            self._serial.shadow_cache.invalidate(self._key)
+        return fault
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__qualname__} index={self._index} {self._serial}>"
@@ -2,10 +2,14 @@
 from __future__ import annotations
 
 import logging
+import threading
 from enum import IntEnum
-from typing import NamedTuple
+from typing import Callable, NamedTuple
 
+from . import clock
+from .codec import decode_response, encode_command, parse_bool, parse_milli
 from .discovery import VidPid
+from .flight_recorder import FlightRecorder
 from .serial_wrapper import SerialWrapper
 from .utils import BoardIdentity
 
@@ -13,6 +17,17 @@ logger = logging.getLogger(__name__)
 BAUDRATE = 115200  # Since the power board is a USB device, this is ignored
 VIDPID = VidPid(0x1BDA, 0x0010)
 
+CMD_BATT_VOLTAGE = encode_command('BATT:V?')
+CMD_BATT_CURRENT = encode_command('BATT:I?')
+CMD_STATUS = encode_command('*STATUS?')
+# The commands of a snapshot, the status then each output's current then the battery
+CMD_SNAPSHOT = [
+    CMD_STATUS,
+    *(encode_command(f'OUT:{index}:I?') for index in range(7)),
+    CMD_BATT_VOLTAGE,
+    CMD_BATT_CURRENT,
+]
+
 
 class PowerOutputPosition(IntEnum):
     """
@@ -58,6 +73,28 @@ class PowerStatus(NamedTuple):
         )
 
 
+class PowerSnapshot(NamedTuple):
+    """
+    The state of the power board, all read in a single exchange.
+
+    :param timestamp: The monotonic time the snapshot was requested.
+    :param status: The status of the board.
+    :param output_currents: The current draw of each output, in amps.
+    :param battery_voltage: The voltage of the battery, in volts.
+    :param battery_current: The current draw from the battery, in amps.
+    """
+
+    timestamp: float
+    status: PowerStatus
+    output_currents: tuple[float, ...]
+    battery_voltage: float
+    battery_current: float
+
+    def age(self) -> float:
+        """Return the time since the snapshot was taken, in seconds."""
+        return clock.monotonic() - self.timestamp
+
+
 # This output is always on, and cannot be controlled via the API.
 BRAIN_OUTPUT = PowerOutputPosition.L2
 
@@ -70,28 +107,52 @@ class PowerBoard:
 
     :param serial_port: The serial port to connect to.
     :param initial_identity: The identity of the board, as reported by the USB descriptor.
+    :param multiplexed: Share the serial port between threads through a dedicated I/O
+        thread, see SerialWrapper.
+    :param serial_wrapper: An existing connection to the board to use instead of
+        opening a new one, the other connection arguments are then ignored.
+    :param shadow_cache: Skip commands that set a channel to the value it already has,
+        see shadow_cache.ShadowCache.
+    :param identity: The identity the board has already reported to *IDN?,
+        to skip identifying it again.
     """
 
     def __init__(
         self,
         serial_port: str,
         initial_identity: BoardIdentity | None = None,
+        multiplexed: bool = False,
+        serial_wrapper: SerialWrapper | None = None,
+        shadow_cache: bool = False,
+        identity: BoardIdentity | None = None,
     ) -> None:
         if initial_identity is None:
             initial_identity = BoardIdentity()
-        self._serial = SerialWrapper(serial_port, BAUDRATE, identity=initial_identity)
-
-        self.outputs = tuple(Output(self._serial, i) for i in range(7))
-        self.battery_sensor = BatterySensor(self._serial)
+        if serial_wrapper is None:
+            serial_wrapper = SerialWrapper(
+                serial_port, BAUDRATE, identity=initial_identity, multiplexed=multiplexed,
+                shadow_cache=shadow_cache)
+        self._serial = serial_wrapper
+        self._snapshot_lock = threading.Lock()
+        self._snapshot: PowerSnapshot | None = None
+
+        self.outputs = tuple(Output(self._serial, i, self.snapshot) for i in range(7))
+        self.battery_sensor = BatterySensor(self._serial, self.snapshot)
         self.piezo = Piezo(self._serial)
         self.run_led = Led(self._serial, 'RUN')
         self.error_led = Led(self._serial, 'ERR')
 
-        identity = self.identify()
+        if identity is None:
+            identity = self.identify()
         assert identity.board_type == 'PBv4B', \
             f"Expected board type 'PBv4B', got {identity.board_type!r} instead."
         self._serial.set_identity(identity)
 
+    @property
+    def identity(self) -> BoardIdentity:
+        """The identity the board reported when it was connected."""
+        return self._serial.identity
+
     def identify(self) -> BoardIdentity:
         """
         Get the identity of the board.
@@ -107,8 +168,57 @@ class PowerBoard:
 
         :return: The status of the power board.
         """
-        response = self._serial.query('*STATUS?')
-        return PowerStatus.from_status_response(response)
+        response = self._serial.query_raw(CMD_STATUS)
+        return self._parse_status(response)
+
+    def _parse_status(self, response: bytes) -> PowerStatus:
+        status = PowerStatus.from_status_response(decode_response(response))
+        # The firmware disables outputs that draw too much current
+        self._serial.shadow_cache.invalidate(*(
+            f'OUT:{index}' for index, tripped in enumerate(status.overcurrent) if tripped))
+        return status
+
+    def snapshot(self, max_age: float = 0) -> PowerSnapshot:
+        """
+        Read the status, every output current and the battery sensor in one exchange.
+
+        This is much faster than reading each value separately,
+        and all the values are read at the same moment.
+
+        :param max_age: Reuse the last snapshot if it was taken at most this many
+            seconds ago, 0 always takes a new snapshot.
+        :return: The snapshot of the board.
+        """
+        with self._snapshot_lock:
+            last = self._snapshot
+        if last is not None and max_age > 0 and last.age() <= max_age:
+            return last
+
+        timestamp = clock.monotonic()
+        responses = self._serial.query_multi_raw(CMD_SNAPSHOT)
+        snapshot = PowerSnapshot(
+            timestamp=timestamp,
+            status=self._parse_status(responses[0]),
+            output_currents=tuple(parse_milli(response) for response in responses[1:8]),
+            battery_voltage=parse_milli(responses[8]),
+            battery_current=parse_milli(responses[9]),
+        )
+        with self._snapshot_lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def query_multi(self, commands: list[str]) -> list[str]:
+        """
+        Send several raw commands to the board in a single exchange.
+
+        The commands are sent in one write and the responses are read back in order,
+        which is much faster than sending each command separately.
+
+        :param commands: The commands to send, without trailing newlines.
+        :raises RuntimeError: If the board returns a NACK to any of the commands.
+        :return: The responses to each of the commands, in order.
+        """
+        return self._serial.query_multi(commands)
 
     def reset(self) -> None:
         """
@@ -116,10 +226,13 @@ class PowerBoard:
 
         This turns off all outputs except the brain output and stops any running tones.
         """
-        self._serial.write('*RESET')
-        # Additionally, the brain output is always on, so we need to turn it off
-        # manually.
-        self._serial.write('*SYS:BRAIN:SET:0')
+        try:
+            self._serial.write('*RESET')
+            # Additionally, the brain output is always on, so we need to turn it off
+            # manually.
+            self._serial.write('*SYS:BRAIN:SET:0')
+        finally:
+            self._serial.shadow_cache.invalidate()
 
     def start_button(self) -> bool:
         """
@@ -142,6 +255,11 @@ class PowerBoard:
         """
         self._serial.write(f'*SYS:FAN:SET:{bool(value):d}')
 
+    @property
+    def flight_recorder(self) -> FlightRecorder | None:
+        """The recorder of the board's recent serial transactions, None if disabled."""
+        return self._serial.flight_recorder
+
     def close(self) -> None:
         """Close the underlying serial port."""
         self._serial.stop()
@@ -156,11 +274,31 @@ class Output:
 
     :param serial: The serial wrapper to use for communication.
     :param index: The index of the output to represent.
+    :param snapshot: The function to get a snapshot of the board with a maximum age,
+        used when reading values from a snapshot.
     """
 
-    def __init__(self, serial: SerialWrapper, index: int):
+    def __init__(
+        self,
+        serial: SerialWrapper,
+        index: int,
+        snapshot: Callable[[float], PowerSnapshot] | None = None,
+    ):
         self._serial = serial
         self._index = index
+        self._snapshot = snapshot
+        self._key = f'OUT:{index}'
+
+        # Pre-encode the commands used by this output
+        self._cmd_get = encode_command(f'OUT:{index}:GET?')
+        self._cmd_current = encode_command(f'OUT:{index}:I?')
+        if index == BRAIN_OUTPUT:
+            # Changing the brain output will also raise a NACK from the firmware
+            self._cmd_set = (
+                encode_command('*SYS:BRAIN:SET:0'), encode_command('*SYS:BRAIN:SET:1'))
+        else:
+            self._cmd_set = (
+                encode_command(f'OUT:{index}:SET:0'), encode_command(f'OUT:{index}:SET:1'))
 
     def is_enabled(self) -> bool:
         """
@@ -171,8 +309,8 @@ class Output:
 
         :return: Whether the output is enabled.
         """
-        response = self._serial.query(f'OUT:{self._index}:GET?')
-        return response == '1'
+        response = self._serial.query_raw(self._cmd_get)
+        return parse_bool(response)
 
     def enable(self, value: bool) -> None:
         """
@@ -183,34 +321,41 @@ class Output:
 
         :param value: Whether the output should be enabled.
         """
-        if self._index == BRAIN_OUTPUT:
-            # Changing the brain output will also raise a NACK from the firmware
-            self._serial.write(f'*SYS:BRAIN:SET:{bool(value):d}')
-        else:
-            self._serial.write(f'OUT:{self._index}:SET:{bool(value):d}')
+        self._serial.write_shadowed(self._key, int(bool(value)), self._cmd_set[bool(value)])
 
-    def current(self) -> float:
+    def current(self, max_age: float | None = None) -> float:
         """
         Return the current draw of the output.
 
         This current measurement has a 10% tolerance.
 
+        :param max_age: Read the value from a snapshot of the board at most this many
+            seconds old instead of querying the output, see PowerBoard.snapshot.
         :return: The current draw of the output, in amps.
         """
-        response = self._serial.query(f'OUT:{self._index}:I?')
-        return float(response) / 1000
+        if max_age is not None and self._snapshot is not None:
+            return self._snapshot(max_age).output_currents[self._index]
+        response = self._serial.query_raw(self._cmd_current)
+        return parse_milli(response)
 
-    def overcurrent(self) -> bool:
+    def overcurrent(self, max_age: float | None = None) -> bool:
         """
         Return whether the output is in an overcurrent state.
 
         This is set when the output draws more than its maximum current.
         Resetting the power board will clear this state.
 
+        :param max_age: Read the value from a snapshot of the board at most this many
+            seconds old instead of querying the status, see PowerBoard.snapshot.
         :return: Whether the output is in an overcurrent state.
         """
-        response = self._serial.query('*STATUS?')
-        return PowerStatus.from_status_response(response).overcurrent[self._index]
+        if max_age is not None and self._snapshot is not None:
+            return self._snapshot(max_age).status.overcurrent[self._index]
+        response = decode_response(self._serial.query_raw(CMD_STATUS))
+        overcurrent = PowerStatus.from_status_response(response).overcurrent[self._index]
+        if overcurrent:
+            self._serial.shadow_cache.invalidate(self._key)
+        return overcurrent
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__qualname__} index={self._index} {self._serial}>"
@@ -227,18 +372,23 @@ class Led:
     def __init__(self, serial: SerialWrapper, led: str):
         self._serial = serial
         self._led = led
+        self._key = f'LED:{led}'
+
+        self._cmd_on = encode_command(f'LED:{led}:SET:1')
+        self._cmd_off = encode_command(f'LED:{led}:SET:0')
+        self._cmd_flash = encode_command(f'LED:{led}:SET:F')
 
     def on(self) -> None:
         """Turn on the LED."""
-        self._serial.write(f'LED:{self._led}:SET:1')
+        self._serial.write_shadowed(self._key, 1, self._cmd_on)
 
     def off(self) -> None:
         """Turn off the LED."""
-        self._serial.write(f'LED:{self._led}:SET:0')
+        self._serial.write_shadowed(self._key, 0, self._cmd_off)
 
     def flash(self) -> None:
         """Set the LED to flash at 1Hz."""
-        self._serial.write(f'LED:{self._led}:SET:F')
+        self._serial.write_shadowed(self._key, 2, self._cmd_flash)
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__qualname__} led={self._led} {self._serial}>"
@@ -251,28 +401,43 @@ class BatterySensor:
     This is implemented using an INA219 current sensor on the power board.
 
     :param serial: The serial wrapper to use for communication.
+    :param snapshot: The function to get a snapshot of the board with a maximum age,
+        used when reading values from a snapshot.
     """
 
-    def __init__(self, serial: SerialWrapper):
+    def __init__(
+        self,
+        serial: SerialWrapper,
+        snapshot: Callable[[float], PowerSnapshot] | None = None,
+    ):
         self._serial = serial
+        self._snapshot = snapshot
 
-    def voltage(self) -> float:
+    def voltage(self, max_age: float | None = None) -> float:
         """
         Return the voltage of the battery.
 
+        :param max_age: Read the value from a snapshot of the board at most this many
+            seconds old instead of querying the sensor, see PowerBoard.snapshot.
         :return: The voltage of the battery, in volts.
         """
-        response = self._serial.query('BATT:V?')
-        return float(response) / 1000
+        if max_age is not None and self._snapshot is not None:
+            return self._snapshot(max_age).battery_voltage
+        response = self._serial.query_raw(CMD_BATT_VOLTAGE)
+        return parse_milli(response)
 
-    def current(self) -> float:
+    def current(self, max_age: float | None = None) -> float:
         """
         Return the current draw from the battery.
 
+        :param max_age: Read the value from a snapshot of the board at most this many
+            seconds old instead of querying the sensor, see PowerBoard.snapshot.
         :return: The current draw from the battery, in amps.
         """
-        response = self._serial.query('BATT:I?')
-        return float(response) / 1000
+        if max_age is not None and self._snapshot is not None:
+            return self._snapshot(max_age).battery_current
+        response = self._serial.query_raw(CMD_BATT_CURRENT)
+        return parse_milli(response)
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__qualname__}: {self._serial}>"
@@ -0,0 +1,98 @@
+"""
+Identify every connected board at once.
+
+Each port is opened and sent *IDN? from its own thread, so probing a rig of
+boards takes about as long as probing one. Boards that identify as a known board
+type are returned as the matching board object, anything else, such as an Arduino,
+is returned as the port it was found on.
+"""
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union
+
+from .discovery import Port, discover_boards
+from .motor_board import VIDPID as MOTOR_VIDPID
+from .motor_board import MotorBoard
+from .power_board import VIDPID as POWER_VIDPID
+from .power_board import PowerBoard
+from .retry_policy import DEFAULT_RETRY_POLICY, RetryPolicy
+from .serial_wrapper import SerialWrapper
+from .servo_board import VIDPID as SERVO_VIDPID
+from .servo_board import ServoBoard
+from .utils import BoardDisconnectionError, BoardIdentity
+
+logger = logging.getLogger(__name__)
+
+Board = Union[PowerBoard, MotorBoard, ServoBoard]
+
+# The board class for each board type reported by *IDN?
+BOARD_TYPES: dict[str, type[Board]] = {
+    'PBv4B': PowerBoard,
+    'MCv4B': MotorBoard,
+    'SBv4B': ServoBoard,
+}
+BOARD_VIDPIDS = [POWER_VIDPID, MOTOR_VIDPID, SERVO_VIDPID]
+BAUDRATE = 115200
+
+# Ports that don't respond are given up on after a single attempt
+PROBE_RETRY_POLICY = RetryPolicy(attempts=1)
+
+
+def probe_boards(
+    ports: list[Port] | None = None,
+    max_workers: int | None = None,
+) -> list[Board | Port]:
+    """
+    Identify the boards on several ports concurrently.
+
+    Opening a port resets some devices, such as Arduinos,
+    so only include ports that are expected to be boards.
+
+    :param ports: The ports to probe, defaults to every port with
+        the VID and PID of a power, motor or servo board.
+    :param max_workers: The maximum number of ports to probe at once,
+        defaults to all of them.
+    :return: The board object for each port that identified as a known board,
+        otherwise the port itself, in the same order as the ports.
+    """
+    if ports is None:
+        ports = discover_boards(BOARD_VIDPIDS)
+    if not ports:
+        return []
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers or len(ports), thread_name_prefix='probe',
+    ) as executor:
+        return list(executor.map(_probe, ports))
+
+
+def _probe(port: Port) -> Board | Port:
+    """
+    Identify the board on a single port.
+
+    :param port: The port to probe.
+    :return: The board object if it identified as a known board, otherwise the port.
+    """
+    serial = SerialWrapper(
+        port.port, BAUDRATE, identity=port.identity, retry_policy=PROBE_RETRY_POLICY)
+    try:
+        identity = BoardIdentity(*serial.query('*IDN?').split(':'))
+        board_class = BOARD_TYPES[identity.board_type]
+    except (BoardDisconnectionError, UnicodeDecodeError, RuntimeError) as e:
+        logger.debug(f"No response to *IDN? from {port}: {e}")
+    except (TypeError, KeyError):
+        logger.debug(f"Unrecognised board on {port}")
+    else:
+        logger.info(f"Found {identity.board_type}:{identity.asset_tag} on {port.port}")
+        # The board has responded so further transactions can be retried as normal
+        serial.retry_policy = DEFAULT_RETRY_POLICY
+        try:
+            return board_class(
+                port.port, port.identity, serial_wrapper=serial, identity=identity)
+        except AssertionError as e:
+            logger.warning(f"Board on {port.port} failed to identify: {e}")
+
+    serial.stop()
+    return port
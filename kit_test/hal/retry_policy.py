@@ -0,0 +1,320 @@
+"""
+Retry policies and circuit breakers for board communication.
+
+A RetryPolicy decides how many times, and how quickly, a failed serial transaction
+is retried. A CircuitBreaker tracks the failures of a single board so that once the
+board has stopped responding, further calls fail immediately instead of waiting
+for every retry to time out.
+
+Boards only use a circuit breaker if one is given to their SerialWrapper. Tests
+that expect a board to disconnect and come back, such as the power board's UVLO
+test, shouldn't use one, as it would stop them noticing when the board returns.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import threading
+from typing import Awaitable, Callable, TypeVar
+
+from . import clock
+from .utils import BoardDisconnectionError
+
+logger = logging.getLogger(__name__)
+
+RetType = TypeVar("RetType")
+
+
+class CircuitOpenError(BoardDisconnectionError):
+    """Raised without contacting the board when its circuit breaker is open."""
+
+    pass
+
+
+class CircuitBreaker:
+    """
+    Track consecutive failed calls to a board and fail fast once it has stopped responding.
+
+    After failure_threshold consecutive failed calls the breaker opens and all calls
+    fail immediately. Once reset_timeout has elapsed a single call is allowed through
+    to probe the board, other calls keep failing until it has finished. If the probe
+    succeeds the breaker closes again, otherwise it reopens.
+
+    :param name: The name of the board, used in error messages.
+    :param failure_threshold: The number of consecutive failed calls that opens the
+        breaker, 0 disables the breaker.
+    :param reset_timeout: The time to wait after opening before allowing another
+        attempt, in seconds.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(
+        self,
+        name: str = '',
+        failure_threshold: int = 2,
+        reset_timeout: float = 1.0,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        # Whether a call is probing the board while half-open
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """The current state of the breaker: closed, open or half-open."""
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if not self.failure_threshold or self._failures < self.failure_threshold:
+            return self.CLOSED
+        if clock.monotonic() - self._opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def check(self) -> str:
+        """
+        Check whether a call may be made.
+
+        When half-open, the call becomes the probe and must be followed by
+        record_success, record_failure or release.
+
+        :raises CircuitOpenError: If the breaker is open, or half-open while
+            another call is probing the board.
+        :return: The state of the breaker, closed or half-open.
+        """
+        with self._lock:
+            state = self._state()
+            if state == self.OPEN:
+                remaining = self.reset_timeout - (clock.monotonic() - self._opened_at)
+                raise CircuitOpenError(
+                    f'Board {self.name} failed to respond {self._failures} times in a row, '
+                    f'not retrying for another {remaining:.1f}s')
+            if state == self.HALF_OPEN:
+                if self._probing:
+                    raise CircuitOpenError(
+                        f'Board {self.name} failed to respond {self._failures} times '
+                        'in a row, waiting for another call to check it is responding')
+                self._probing = True
+            return state
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the breaker."""
+        with self._lock:
+            if self._failures >= self.failure_threshold > 0:
+                logger.info(f'Board {self.name} is responding again')
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker if the threshold is reached."""
+        with self._lock:
+            self._failures += 1
+            if self.failure_threshold and self._failures >= self.failure_threshold:
+                if self._failures == self.failure_threshold:
+                    logger.warning(
+                        f'Board {self.name} stopped responding, '
+                        f'failing calls for {self.reset_timeout:.1f}s')
+                self._opened_at = clock.monotonic()
+            self._probing = False
+
+    def release(self) -> None:
+        """Let another call probe the board, after a call ended without a result."""
+        with self._lock:
+            self._probing = False
+
+    def reset(self) -> None:
+        """Close the breaker, forgetting any previous failures."""
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+
+
+class RetryPolicy:
+    """
+    A policy for retrying failed calls with bounded exponential backoff.
+
+    The delay before retry n (starting from 0) is base_delay * multiplier ** n,
+    limited to max_delay. A random fraction of each delay, up to jitter, is removed
+    so boards that fail together don't retry in lockstep.
+
+    :param attempts: The maximum number of attempts, including the first.
+    :param base_delay: The delay before the first retry, in seconds.
+    :param max_delay: The maximum delay between attempts, in seconds.
+    :param multiplier: The factor the delay grows by after each retry.
+    :param jitter: The maximum fraction of each delay to randomly remove, between 0 and 1.
+    :param deadline: The maximum total time to spend on a call before giving up,
+        in seconds. No retry is started if it would overrun the deadline.
+    :param exceptions: The exceptions that cause a call to be retried.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 4,
+        base_delay: float = 0.1,
+        max_delay: float = 1.0,
+        multiplier: float = 2.0,
+        jitter: float = 0.2,
+        deadline: float | None = None,
+        exceptions: tuple[type[BaseException], ...] = (
+            BoardDisconnectionError, UnicodeDecodeError),
+    ) -> None:
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.multiplier = multiplier
+        self.jitter = jitter
+        self.deadline = deadline
+        self.exceptions = exceptions
+
+    def delay(self, retry: int) -> float:
+        """
+        Calculate the delay before a retry.
+
+        :param retry: The number of retries already made.
+        :return: The time to wait before retrying, in seconds.
+        """
+        delay = min(self.base_delay * self.multiplier ** retry, self.max_delay)
+        if self.jitter:
+            delay *= 1 - random.uniform(0, self.jitter)
+        return delay
+
+    def call(
+        self,
+        func: Callable[[], RetType],
+        breaker: CircuitBreaker | None = None,
+        on_retry: Callable[[BaseException], None] | None = None,
+        should_retry: Callable[[BaseException], bool] | None = None,
+    ) -> RetType:
+        """
+        Call a function, retrying it according to this policy.
+
+        If the breaker is half-open, only a single attempt is made.
+
+        :param func: The function to call.
+        :param breaker: The circuit breaker of the board being called.
+        :param on_retry: A function called with the exception each time the call is retried.
+        :param should_retry: A function called with the exception of each failed attempt,
+            returning whether the call may be retried, defaults to always.
+        :raises CircuitOpenError: If the breaker is open.
+        :return: The return value of the function.
+        """
+        attempts = self._attempts(breaker)
+        start = clock.monotonic()
+        retries = 0
+        while True:
+            try:
+                result = func()
+            except self.exceptions as e:
+                delay = self._retry_delay(e, retries, attempts, start, breaker, should_retry)
+                if delay is None:
+                    raise
+                if on_retry is not None:
+                    on_retry(e)
+                clock.sleep(delay)
+                retries += 1
+            except BaseException:
+                # Neither a success nor a failure of the board
+                if breaker is not None:
+                    breaker.release()
+                raise
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+                return result
+
+    async def call_async(
+        self,
+        func: Callable[[], Awaitable[RetType]],
+        breaker: CircuitBreaker | None = None,
+        on_retry: Callable[[BaseException], None] | None = None,
+        should_retry: Callable[[BaseException], bool] | None = None,
+    ) -> RetType:
+        """
+        Await a coroutine function, retrying it according to this policy.
+
+        This is the same as call, but the delays between attempts don't block
+        the event loop.
+
+        :param func: The coroutine function to await.
+        :param breaker: The circuit breaker of the board being called.
+        :param on_retry: A function called with the exception each time the call is retried.
+        :param should_retry: A function called with the exception of each failed attempt,
+            returning whether the call may be retried, defaults to always.
+        :raises CircuitOpenError: If the breaker is open.
+        :return: The return value of the coroutine.
+        """
+        attempts = self._attempts(breaker)
+        start = clock.monotonic()
+        retries = 0
+        while True:
+            try:
+                result = await func()
+            except self.exceptions as e:
+                delay = self._retry_delay(e, retries, attempts, start, breaker, should_retry)
+                if delay is None:
+                    raise
+                if on_retry is not None:
+                    on_retry(e)
+                await asyncio.sleep(delay)
+                retries += 1
+            except BaseException:
+                # Neither a success nor a failure of the board
+                if breaker is not None:
+                    breaker.release()
+                raise
+            else:
+                if breaker is not None:
+                    breaker.record_success()
+                return result
+
+    def _attempts(self, breaker: CircuitBreaker | None) -> int:
+        """Return the number of attempts for a call, only one if the breaker is half-open."""
+        if breaker is not None and breaker.check() == CircuitBreaker.HALF_OPEN:
+            return 1
+        return self.attempts
+
+    def _retry_delay(
+        self,
+        error: BaseException,
+        retries: int,
+        attempts: int,
+        start: float,
+        breaker: CircuitBreaker | None,
+        should_retry: Callable[[BaseException], bool] | None,
+    ) -> float | None:
+        """
+        Decide whether to retry a failed attempt.
+
+        :param error: The exception the attempt failed with.
+        :param retries: The number of retries already made.
+        :param attempts: The maximum number of attempts for the call.
+        :param start: The clock time the call started.
+        :param breaker: The circuit breaker of the board, which records the failure
+            if the call gives up.
+        :param should_retry: The caller's check of whether the call may be retried.
+        :return: The delay before retrying, or None to give up.
+        """
+        delay = self.delay(retries)
+        out_of_time = (
+            self.deadline is not None
+            and clock.monotonic() - start + delay > self.deadline
+        )
+        refused = should_retry is not None and not should_retry(error)
+        if retries + 1 >= attempts or out_of_time or refused:
+            if breaker is not None:
+                breaker.record_failure()
+            return None
+        return delay
+
+
+# The policy used by SerialWrapper unless another is given
+DEFAULT_RETRY_POLICY = RetryPolicy()
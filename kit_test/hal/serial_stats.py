@@ -0,0 +1,243 @@
+"""
+Statistics of the serial transactions with each board.
+
+Every SerialWrapper records the latency of each command it sends along with
+any retries, timeouts, NACKs and reconnections. Commands are grouped by their
+verb, with the numeric arguments and set values removed, e.g. 'OUT:*:I?'.
+"""
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Any
+
+# Upper bounds of the latency histogram buckets in seconds, ~19% wide from 50us to 30s
+LATENCY_BUCKETS = tuple(50e-6 * 2 ** (i / 4) for i in range(78))
+
+
+@lru_cache(maxsize=1024)
+def command_verb(command: str | bytes) -> str:
+    """
+    Reduce a command to the verb used to group its statistics.
+
+    Numeric arguments are replaced with '*' and anything after SET is removed,
+    so 'OUT:3:SET:1' becomes 'OUT:*:SET'.
+
+    :param command: The command sent to the board, either as a string or encoded.
+    :return: The verb of the command.
+    """
+    if isinstance(command, bytes):
+        command = command.decode('ascii', errors='replace').rstrip('\n')
+    verb = []
+    for field in command.split(':'):
+        if field.lstrip('-').isdigit():
+            verb.append('*')
+        else:
+            verb.append(field)
+        if field == 'SET':
+            break
+    return ':'.join(verb)
+
+
+class LatencyHistogram:
+    """A histogram of latencies with logarithmically spaced buckets."""
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, latency: float) -> None:
+        """
+        Add a latency to the histogram.
+
+        :param latency: The latency in seconds.
+        """
+        self.counts[bisect_left(LATENCY_BUCKETS, latency)] += 1
+        self.count += 1
+        self.total += latency
+        if latency > self.max:
+            self.max = latency
+
+    @property
+    def mean(self) -> float:
+        """The mean latency in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Estimate a percentile of the recorded latencies.
+
+        The upper bound of the bucket containing the percentile is returned,
+        limited to the largest latency recorded.
+
+        :param fraction: The percentile as a fraction between 0 and 1.
+        :return: The estimated latency in seconds.
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        cumulative = 0
+        for bucket, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank and count:
+                if bucket < len(LATENCY_BUCKETS):
+                    return min(LATENCY_BUCKETS[bucket], self.max)
+                break
+        return self.max
+
+
+class CommandStats:
+    """The statistics of a single command verb on a board."""
+
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.retries = 0
+        self.timeouts = 0
+        self.nacks = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics as a dictionary, with latencies in milliseconds."""
+        return {
+            'count': self.latency.count,
+            'mean_ms': self.latency.mean * 1000,
+            'p50_ms': self.latency.percentile(0.5) * 1000,
+            'p95_ms': self.latency.percentile(0.95) * 1000,
+            'p99_ms': self.latency.percentile(0.99) * 1000,
+            'max_ms': self.latency.max * 1000,
+            'retries': self.retries,
+            'timeouts': self.timeouts,
+            'nacks': self.nacks,
+        }
+
+
+class BoardStats:
+    """
+    The statistics of all the commands sent to a single board.
+
+    :param board_type: The type of the board, used when reporting.
+    """
+
+    def __init__(self, board_type: str = '') -> None:
+        self.board_type = board_type
+        self.commands: dict[str, CommandStats] = {}
+        self.reconnects = 0
+
+    def command(self, command: str | bytes) -> CommandStats:
+        """
+        Get the statistics for a command's verb, creating them if needed.
+
+        :param command: The command sent to the board.
+        :return: The statistics of the command's verb.
+        """
+        verb = command_verb(command)
+        try:
+            return self.commands[verb]
+        except KeyError:
+            stats = self.commands[verb] = CommandStats()
+            return stats
+
+
+class SerialStats:
+    """The statistics of the serial transactions with every board, keyed by board."""
+
+    def __init__(self) -> None:
+        # Boards may be used from multiple threads
+        self._lock = threading.Lock()
+        self._boards: dict[str, BoardStats] = {}
+
+    def _board(self, board: str, board_type: str) -> BoardStats:
+        try:
+            stats = self._boards[board]
+        except KeyError:
+            stats = self._boards[board] = BoardStats()
+        if board_type:
+            stats.board_type = board_type
+        return stats
+
+    def record_latency(
+        self, board: str, board_type: str, command: str | bytes, latency: float,
+    ) -> None:
+        """
+        Record the round trip time of a command.
+
+        :param board: The asset tag or port of the board.
+        :param board_type: The type of the board.
+        :param command: The command sent to the board.
+        :param latency: The time from sending the command to receiving the response,
+            in seconds.
+        """
+        with self._lock:
+            self._board(board, board_type).command(command).latency.record(latency)
+
+    def record_retry(self, board: str, board_type: str, command: str | bytes) -> None:
+        """Record that a command is being retried."""
+        with self._lock:
+            self._board(board, board_type).command(command).retries += 1
+
+    def record_timeout(self, board: str, board_type: str, command: str | bytes) -> None:
+        """Record that the board did not respond to a command in time."""
+        with self._lock:
+            self._board(board, board_type).command(command).timeouts += 1
+
+    def record_nack(self, board: str, board_type: str, command: str | bytes) -> None:
+        """Record that the board rejected a command."""
+        with self._lock:
+            self._board(board, board_type).command(command).nacks += 1
+
+    def record_reconnect(self, board: str, board_type: str) -> None:
+        """Record that the serial port of a board was reopened after being closed."""
+        with self._lock:
+            self._board(board, board_type).reconnects += 1
+
+    def reset(self) -> None:
+        """Discard all the recorded statistics."""
+        with self._lock:
+            self._boards.clear()
+
+    def as_dict(self) -> dict[str, dict[str, Any]]:
+        """
+        Return the statistics of every board.
+
+        :return: A dictionary keyed by board, containing the board type,
+            reconnection count and the statistics of each command verb.
+        """
+        with self._lock:
+            return {
+                board: {
+                    'board_type': stats.board_type,
+                    'reconnects': stats.reconnects,
+                    'commands': {
+                        verb: command.as_dict()
+                        for verb, command in sorted(stats.commands.items())
+                    },
+                }
+                for board, stats in sorted(self._boards.items())
+            }
+
+    def format(self) -> list[str]:
+        """
+        Format the statistics as a table for logging.
+
+        :return: The lines of the table.
+        """
+        lines = []
+        for board, stats in self.as_dict().items():
+            name = f"{stats['board_type']}:{board}" if stats['board_type'] else board
+            lines.append(f"{name} - reconnects: {stats['reconnects']}")
+            lines.append(
+                f"  {'command':<16} {'count':>7} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8} "
+                f"{'maxms':>8} {'retry':>6} {'tmout':>6} {'nack':>6}")
+            for verb, command in stats['commands'].items():
+                lines.append(
+                    f"  {verb:<16} {command['count']:>7} {command['p50_ms']:>8.2f} "
+                    f"{command['p95_ms']:>8.2f} {command['p99_ms']:>8.2f} "
+                    f"{command['max_ms']:>8.2f} {command['retries']:>6} "
+                    f"{command['timeouts']:>6} {command['nacks']:>6}")
+        return lines
+
+
+# The statistics of every SerialWrapper in this process
+STATS = SerialStats()
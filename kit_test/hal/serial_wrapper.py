@@ -3,75 +3,130 @@ SerialWrapper class for communicating with boards over serial.
 
 This class is responsible for opening and closing the serial port,
 and for handling port timeouts and disconnections.
+
+In multiplexed mode each wrapper owns an I/O thread that serves a queue of requests.
+Callers receive futures, and requests queued while a transaction is in progress are
+sent together in the next write, so several threads can share a board without
+each waiting for the others' full round trips.
+
+Multiplexing is off by default and none of the boards enable it. Against the
+simulated boards the I/O thread's hand-offs cost more than the round trips it
+saves, so the multiplexed benchmark is slower than several threads sharing the lock.
 """
 from __future__ import annotations
 
 import logging
-import sys
+import queue
 import threading
 import time
-from functools import wraps
-from typing import Callable, TypeVar
+from concurrent.futures import Future
+from typing import Callable, NamedTuple, TypeVar
 
 import serial
 
+from . import clock, flight_recorder
+from .codec import (
+    NACK,
+    NEWLINE,
+    can_resend,
+    decode_command,
+    decode_response,
+    encode_command,
+)
+from .flight_recorder import FlightRecorder
+from .retry_policy import DEFAULT_RETRY_POLICY, CircuitBreaker, RetryPolicy
+from .serial_stats import STATS
+from .session_recorder import active_recorder
+from .shadow_cache import ShadowCache
 from .utils import TRACE, BoardDisconnectionError, BoardIdentity
 
 logger = logging.getLogger(__name__)
 
-if sys.version_info < (3, 10):
-    from typing_extensions import ParamSpec
-else:
-    from typing import ParamSpec
-Param = ParamSpec("Param")
-RetType = TypeVar("RetType")
-
-E = TypeVar("E", bound=BaseException)
 BASE_TIMEOUT: float | None = 0.5
+# The maximum number of commands the multiplexer combines into a single write,
+# to avoid overrunning the firmware's receive buffer
+MAX_BATCH_COMMANDS = 16
+
+T = TypeVar("T")
+U = TypeVar("U")
 
 
-def retry(
-    times: int, exceptions: type[E] | tuple[type[E], ...]
-) -> Callable[[Callable[Param, RetType]], Callable[Param, RetType]]:
+class _Request(NamedTuple):
+    """A request queued for the multiplexer's I/O thread."""
+
+    commands: list[bytes]
+    future: Future[list[bytes]]
+
+
+def stats_key(identity: BoardIdentity, port: str | None) -> tuple[str, str]:
     """
-    Decorator to retry a function a number of times on a given exception.
+    Return the board name and type that a board's serial statistics are recorded under.
 
-    If the function fails on the last attempt the exception is raised.
-    This outer function is used to pass arguments to the decorator.
+    :param identity: The identity of the board.
+    :param port: The serial port of the board, used as the name if it has no asset tag.
+    :return: The board name and board type.
+    """
+    return (identity.asset_tag or str(port)), identity.board_type
 
-    :param times: The number of times to retry the function.
-    :param exceptions: The exception to catch and retry on.
-    :return: The templated decorator function.
+
+def check_nacks(
+    identity: BoardIdentity,
+    key: tuple[str, str],
+    commands: list[bytes],
+    responses: list[bytes],
+) -> None:
     """
-    def decorator(func: Callable[Param, RetType]) -> Callable[Param, RetType]:
-        """
-        The actual decorator function that is returned by the decorator.
+    Check the responses to a set of commands for NACKs, logging each one.
+
+    :param identity: The identity of the board, used in log messages.
+    :param key: The board name and type the NACKs are recorded under, from stats_key.
+    :param commands: The encoded commands that were sent.
+    :param responses: The responses to the commands.
+    :raises RuntimeError: If any of the responses are a NACK, with the firmware's
+        error message for the first failing command.
+    """
+    nack_error = None
+    for command, response in zip(commands, responses):
+        if response.startswith(NACK):
+            STATS.record_nack(*key, command)
+            _, error_msg = decode_response(response).split(':', maxsplit=1)
+            logger.error((
+                f'Board {identity.board_type}:{identity.asset_tag} '
+                f'returned NACK on command {decode_command(command)!r}: {error_msg}'
+            ))
+            if nack_error is None:
+                nack_error = error_msg
+    if nack_error is not None:
+        # Report the first failing command, the others have already been logged
+        raise RuntimeError(nack_error)
 
-        The decorator retries the function a number of times on a given exception.
-        If the function fails on the last attempt the exception is raised.
 
-        :param func: The function to decorate.
-        :return: The decorated function.
-        """
-        @wraps(func)
-        def retryfn(*args: Param.args, **kwargs: Param.kwargs) -> RetType:
-            """
-            The function that wraps the original function.
+def _chain(future: Future[T], transform: Callable[[T], U]) -> Future[U]:
+    """
+    Create a future that resolves to the transformed result of another future.
 
-            This function retries the original function a number of times on a given exception.
+    :param future: The future to transform the result of.
+    :param transform: The function applied to the result.
+    :return: The new future, any exception from the original future is passed through.
+    """
+    chained: Future[U] = Future()
+
+    def done(source: Future[T]) -> None:
+        if source.cancelled():
+            chained.cancel()
+            chained.set_running_or_notify_cancel()
+            return
+        error = source.exception()
+        if error is not None:
+            chained.set_exception(error)
+            return
+        try:
+            chained.set_result(transform(source.result()))
+        except Exception as e:
+            chained.set_exception(e)
 
-            :return: The return value of the original function.
-            """
-            attempt = 0
-            while attempt < times:
-                try:
-                    return func(*args, **kwargs)
-                except exceptions:
-                    time.sleep(attempt * 0.5)
-                    attempt += 1
-            return func(*args, **kwargs)
-        return retryfn
-    return decorator
+    future.add_done_callback(done)
+    return chained
 
 
 class SerialWrapper:
@@ -87,6 +142,18 @@ class SerialWrapper:
     :param identity: The identity of the board this serial wrapper is connected to.
     :param delay_after_connect: The time to wait after connecting to the board before sending
                                 data.
+    :param retry_policy: The policy for retrying failed transactions,
+        defaults to DEFAULT_RETRY_POLICY.
+    :param circuit_breaker: The circuit breaker tracking this board's failures,
+        defaults to None to retry every transaction according to the retry policy.
+    :param multiplexed: Serve all requests from a dedicated I/O thread,
+        combining requests from different threads into single writes.
+        Off by default, see the module docstring.
+    :param recorder: The flight recorder to record this board's transactions in,
+        defaults to a new recorder if recording has been enabled with
+        flight_recorder.configure.
+    :param shadow_cache: Skip commands that set a channel to the value it already has,
+        see shadow_cache.ShadowCache.
     """
 
     def __init__(
@@ -96,6 +163,11 @@ class SerialWrapper:
         timeout: float | None = BASE_TIMEOUT,
         identity: BoardIdentity = BoardIdentity(),
         delay_after_connect: float = 0,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        multiplexed: bool = False,
+        recorder: FlightRecorder | None = None,
+        shadow_cache: bool = False,
     ):
         # Mutex serial port access to allow for multiple threads to use the same serial port
         self._lock = threading.Lock()
@@ -103,6 +175,30 @@ class SerialWrapper:
 
         # Time to wait before sending data after connecting to a board
         self.delay_after_connect = delay_after_connect
+        # Used to count reconnections in the serial statistics
+        self._has_connected = False
+
+        # Bytes received from the board that are not yet part of a complete line
+        self._rx_buffer = bytearray()
+
+        self.retry_policy = retry_policy or DEFAULT_RETRY_POLICY
+        # Fail fast once the board has stopped responding, if enabled
+        self.circuit_breaker = circuit_breaker
+        # Keeps the recent transactions to write out if a test fails, None when disabled
+        self.flight_recorder = recorder or flight_recorder.create_recorder(port)
+        # The last value set on each of the board's channels, shared by the board's objects
+        self.shadow_cache = ShadowCache(shadow_cache)
+        # The name this wrapper's transactions are recorded under when recording the session
+        session = active_recorder()
+        self._session_port = session.new_stream(port) if session is not None else port
+
+        # The multiplexer's request queue and I/O thread, started on the first request
+        self.multiplexed = multiplexed
+        self._mux_lock = threading.Lock()
+        self._requests: queue.Queue[_Request | None] = queue.Queue()
+        self._io_thread: threading.Thread | None = None
+        # The first failure of a fire-and-forget write, raised by flush
+        self._write_error: BaseException | None = None
 
         # pyserial serial port, the port will be opened on the first message
         self.serial = serial.serial_for_url(
@@ -126,56 +222,353 @@ class SerialWrapper:
         Helper method to close the serial port.
 
         This is not usually needed as the port will be closed on garbage collection.
+        In multiplexed mode, any queued requests are completed before the port is closed.
         """
-        self._disconnect()
+        with self._mux_lock:
+            io_thread, self._io_thread = self._io_thread, None
+            if io_thread is not None:
+                self._requests.put(None)
+        if io_thread is not None:
+            io_thread.join()
+        with self._lock:
+            self._disconnect()
 
-    @retry(times=3, exceptions=(BoardDisconnectionError, UnicodeDecodeError))
     def query(self, data: str) -> str:
         """
         Send a command to the board and return the response.
 
         This method will automatically reconnect to the board and retry the command
-        up to 3 times on serial errors.
+        on serial errors, according to the retry policy.
 
         :param data: The data to write to the board.
         :raises BoardDisconnectionError: If the serial connection fails during the transaction,
             including failing to respond to the command.
+        :raises CircuitOpenError: If the board has repeatedly failed to respond
+            and its circuit breaker is open.
         :return: The response from the board with the trailing newline removed.
         """
+        return decode_response(self.query_multi_raw([encode_command(data)])[0])
+
+    def query_multi(self, commands: list[str]) -> list[str]:
+        """
+        Send multiple commands to the board and return the responses.
+
+        All the commands are sent in a single write, then a response is read for each
+        command in turn. This avoids paying the USB round trip for every command.
+
+        This method will automatically reconnect to the board and retry the commands
+        on serial errors, according to the retry policy.
+
+        :param commands: The commands to write to the board.
+        :raises BoardDisconnectionError: If the serial connection fails during the transaction,
+            including failing to respond to any of the commands.
+        :raises CircuitOpenError: If the board has repeatedly failed to respond
+            and its circuit breaker is open.
+        :raises RuntimeError: If the board returns a NACK response to any of the commands,
+            the firmware's error message is raised. This is only raised after all
+            the responses have been read.
+        :return: The responses from the board with the trailing newlines removed,
+            in the same order as the commands.
+        """
+        responses = self.query_multi_raw([encode_command(command) for command in commands])
+        return [decode_response(response) for response in responses]
+
+    def query_raw(self, command: bytes) -> bytes:
+        """
+        Send a pre-encoded command to the board and return the raw response.
+
+        This is the same as query, but skips encoding the command and decoding
+        the response. Use codec.encode_command to encode the command.
+
+        :param command: The encoded command, including the trailing newline.
+        :return: The response from the board with the trailing newline removed.
+        """
+        return self.query_multi_raw([command])[0]
+
+    def query_multi_raw(self, commands: list[bytes]) -> list[bytes]:
+        """
+        Send multiple pre-encoded commands to the board and return the raw responses.
+
+        This is the same as query_multi, but skips encoding the commands and decoding
+        the responses.
+
+        :param commands: The encoded commands, each including the trailing newline.
+        :return: The responses from the board with the trailing newlines removed.
+        """
+        if not commands:
+            return []
+        if self.multiplexed:
+            return self.submit(commands).result()
+
+        responses = self._transact_with_retry(commands)
+        self._check_nacks(commands, responses)
+        return responses
+
+    def submit(self, commands: list[bytes]) -> Future[list[bytes]]:
+        """
+        Queue pre-encoded commands to send to the board, returning a future of the responses.
+
+        In multiplexed mode the commands are sent by the I/O thread, along with any other
+        requests queued by then, and this returns immediately. Otherwise the commands
+        are sent before returning and the future is already complete.
+
+        The future raises the same exceptions as query_multi_raw, a NACK response only
+        fails the request containing the rejected command.
+
+        :param commands: The encoded commands, each including the trailing newline.
+        :return: A future of the responses with the trailing newlines removed.
+        """
+        future: Future[list[bytes]] = Future()
+        if not self.multiplexed:
+            future.set_running_or_notify_cancel()
+            try:
+                future.set_result(self.query_multi_raw(commands))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        with self._mux_lock:
+            if self._io_thread is None:
+                self._io_thread = threading.Thread(
+                    target=self._serve_requests,
+                    name=f'serial-{self.serial.port}',
+                    daemon=True,
+                )
+                self._io_thread.start()
+            self._requests.put(_Request(commands, future))
+        return future
+
+    def submit_query(self, data: str) -> Future[str]:
+        """
+        Queue a command to be sent to the board and return a future of the response.
+
+        :param data: The data to write to the board.
+        :return: A future of the response from the board with the trailing newline removed.
+        """
+        future = self.submit([encode_command(data)])
+        return _chain(future, lambda responses: decode_response(responses[0]))
+
+    def submit_write(self, data: str) -> Future[None]:
+        """
+        Queue a command that does not require a response, without waiting for it to be sent.
+
+        The board's acknowledgement is checked by the I/O thread. A NACK is logged when it
+        is received and the first failed write is raised by the next call to flush.
+
+        :param data: The data to write to the board.
+        :return: A future that completes when the board has acknowledged the command.
+        """
+        future = self.submit([encode_command(data)])
+        future.add_done_callback(self._check_write)
+        return _chain(future, lambda _: None)
+
+    def _check_write(self, future: Future[list[bytes]]) -> None:
+        """Keep the first failure of a fire-and-forget write to be raised by flush."""
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            with self._mux_lock:
+                if self._write_error is None:
+                    self._write_error = error
+
+    def flush(self) -> None:
+        """
+        Wait for every queued request to complete.
+
+        :raises RuntimeError: If a write queued with submit_write was NACKed.
+        :raises BoardDisconnectionError: If the board disconnected during a queued write.
+        """
+        self.submit([]).result()
+        with self._mux_lock:
+            error, self._write_error = self._write_error, None
+        if error is not None:
+            raise error
+
+    def _serve_requests(self) -> None:
+        """
+        Send queued requests to the board until stopped, run by the I/O thread.
+
+        All the requests waiting in the queue, up to MAX_BATCH_COMMANDS commands,
+        are sent in a single transaction.
+        """
+        stopping = False
+        while not stopping:
+            request = self._requests.get()
+            if request is None:
+                break
+
+            batch = [request]
+            batch_size = len(request.commands)
+            while batch_size < MAX_BATCH_COMMANDS:
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+                if request is None:
+                    # Finish the queued requests before stopping
+                    stopping = True
+                    break
+                batch.append(request)
+                batch_size += len(request.commands)
+
+            self._send_batch([
+                request for request in batch
+                if request.future.set_running_or_notify_cancel()
+            ])
+
+    def _send_batch(self, batch: list[_Request]) -> None:
+        """
+        Send a batch of requests to the board and complete their futures.
+
+        :param batch: The requests to send, which have not been cancelled.
+        """
+        commands = [command for request in batch for command in request.commands]
+        responses: list[bytes] = []
+        try:
+            if commands:
+                responses = self._transact_with_retry(commands)
+        except Exception as e:
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        offset = 0
+        for request in batch:
+            request_responses = responses[offset:offset + len(request.commands)]
+            offset += len(request.commands)
+            try:
+                self._check_nacks(request.commands, request_responses)
+            except RuntimeError as e:
+                request.future.set_exception(e)
+            else:
+                request.future.set_result(request_responses)
+
+    def _record_retry(self, commands: list[bytes]) -> None:
+        """Record a retry of each of the commands in the serial statistics."""
+        board, board_type = self._stats_key()
+        for command in commands:
+            STATS.record_retry(board, board_type, command)
+        if self.flight_recorder is not None:
+            self.flight_recorder.record_event('retry', f'{len(commands)} commands')
+
+    def _transact_with_retry(self, commands: list[bytes]) -> list[bytes]:
+        """
+        Write the commands to the board and read a response to each, retrying on failure.
+
+        A retry only sends the commands that weren't answered, and only if they can be
+        sent again safely, see codec.can_resend. NACK responses are returned like any
+        other response.
+
+        :param commands: The encoded commands to write to the board.
+        :raises BoardDisconnectionError: If the serial connection fails during the transaction
+            and it can't be retried.
+        :return: The responses from the board with the trailing newlines removed.
+        """
+        received: list[bytes] = []
+
+        def unanswered() -> list[bytes]:
+            return commands[len(received):]
+
+        self.retry_policy.call(
+            lambda: self._transact(unanswered(), received),
+            breaker=self.circuit_breaker,
+            on_retry=lambda _: self._record_retry(unanswered()),
+            should_retry=lambda _: can_resend(unanswered()),
+        )
+        return received
+
+    def _transact(
+        self,
+        commands: list[bytes],
+        received: list[bytes] | None = None,
+    ) -> list[bytes]:
+        """
+        Write the commands to the board and read a response to each, without retrying.
+
+        NACK responses are returned like any other response.
+
+        :param commands: The encoded commands to write to the board.
+        :param received: A list each response is also appended to as it is read,
+            so the responses read before a failure are kept.
+        :raises BoardDisconnectionError: If the serial connection fails during the transaction.
+        :return: The responses from the board with the trailing newlines removed.
+        """
         with self._lock:
             if not self.serial.is_open:
                 if not self._connect():
                     # If the serial port cannot be opened raise an error,
-                    # this will be caught by the retry decorator
+                    # this will be caught by the retry policy
                     raise BoardDisconnectionError((
                         f'Connection to board {self.identity.board_type}:'
                         f'{self.identity.asset_tag} could not be established',
                     ))
 
+            if self._rx_buffer:
+                # Anything left over from a previous transaction can't be a response
+                # to these commands, discard it so the responses stay in step
+                logger.debug(f'Discarding unexpected serial data: {bytes(self._rx_buffer)!r}')
+                self._rx_buffer.clear()
+
+            trace = logger.isEnabledFor(TRACE)
+            recorder = self.flight_recorder
+            record_start = time.monotonic() if recorder is not None else 0.0
+            session = active_recorder()
+            responses: list[bytes] = []
+            latencies: list[float] = []
             try:
-                logger.log(TRACE, f'Serial write - {data!r}')
-                cmd = data + '\n'
-                self.serial.write(cmd.encode())
-
-                response = self.serial.readline()
-                try:
-                    response_str = response.decode().rstrip('\n')
-                except UnicodeDecodeError as e:
-                    logger.warning(
-                        f"Board {self.identity.board_type}:{self.identity.asset_tag} "
-                        f"returned invalid characters: {response!r}")
-                    raise e
-                logger.log(
-                    TRACE, f'Serial read  - {response_str!r}')
-
-                if b'\n' not in response:
-                    # If readline times out no error is raised, it returns an incomplete string
-                    logger.warning((
-                        f'Connection to board {self.identity.board_type}:'
-                        f'{self.identity.asset_tag} timed out waiting for response'
-                    ))
-                    raise serial.SerialException('Timeout on readline')
-            except serial.SerialException:
+                if trace:
+                    for command in commands:
+                        logger.log(TRACE, f'Serial write - {decode_command(command)!r}')
+                board, board_type = self._stats_key()
+                start_time = time.perf_counter()
+                self.serial.write(b''.join(commands))
+
+                for index, command in enumerate(commands):
+                    response = self._readline()
+                    if not response.isascii():
+                        logger.warning(
+                            f"Board {self.identity.board_type}:{self.identity.asset_tag} "
+                            f"returned invalid characters: {response!r}")
+                        # Consume the responses to the remaining commands so a retry
+                        # doesn't read them as its own responses
+                        for _ in range(len(commands) - index - 1):
+                            self._readline()
+                        if recorder is not None:
+                            recorder.record_transaction(
+                                record_start, commands, [*responses, response], 'invalid')
+                        if session is not None:
+                            latencies.append(time.perf_counter() - start_time)
+                            session.record_transaction(
+                                self._session_port, start_time, commands,
+                                [*responses, response.rstrip(NEWLINE)], latencies)
+                        # Raises UnicodeDecodeError
+                        response.decode('ascii')
+                    if trace:
+                        logger.log(TRACE, f'Serial read  - {decode_response(response)!r}')
+
+                    if not response.endswith(NEWLINE):
+                        # If the read times out no error is raised,
+                        # it returns an incomplete string
+                        logger.warning((
+                            f'Connection to board {self.identity.board_type}:'
+                            f'{self.identity.asset_tag} timed out waiting for response'
+                        ))
+                        STATS.record_timeout(board, board_type, command)
+                        raise serial.SerialException('Timeout on readline')
+                    latency = time.perf_counter() - start_time
+                    STATS.record_latency(board, board_type, command, latency)
+                    latencies.append(latency)
+                    responses.append(response[:-1])
+                    if received is not None:
+                        received.append(response[:-1])
+            except serial.SerialException as e:
+                if recorder is not None:
+                    recorder.record_transaction(
+                        record_start, commands, responses, 'failed', str(e))
+                if session is not None:
+                    session.record_transaction(
+                        self._session_port, start_time, commands, responses, latencies)
                 # Serial connection failed, close the port and raise an error
                 self._disconnect()
                 raise BoardDisconnectionError((
@@ -183,15 +576,55 @@ class SerialWrapper:
                     'disconnected during transaction'
                 ))
 
-            if response_str.startswith('NACK'):
-                _, error_msg = response_str.split(':', maxsplit=1)
-                logger.error((
-                    f'Board {self.identity.board_type}:{self.identity.asset_tag} '
-                    f'returned NACK on write command: {error_msg}'
-                ))
-                raise RuntimeError(error_msg)
+            if recorder is not None:
+                recorder.record_transaction(record_start, commands, responses)
+            if session is not None:
+                session.record_transaction(
+                    self._session_port, start_time, commands, responses, latencies)
+            return responses
+
+    def _check_nacks(self, commands: list[bytes], responses: list[bytes]) -> None:
+        """
+        Check the responses to a set of commands for NACKs, logging each one.
+
+        :param commands: The encoded commands that were sent.
+        :param responses: The responses to the commands.
+        :raises RuntimeError: If any of the responses are a NACK, with the firmware's
+            error message for the first failing command.
+        """
+        check_nacks(self.identity, self._stats_key(), commands, responses)
+
+    def _readline(self) -> bytes:
+        """
+        Read a single line from the board.
 
-            return response_str
+        Rather than reading a byte at a time, everything the port has received is read
+        in one go and split into lines here. Any bytes after the end of the line are
+        kept for the next call.
+
+        Like pyserial's readline, no error is raised on timeout and the incomplete
+        line is returned instead.
+
+        :raises serial.SerialException: If the serial port fails.
+        :return: The line read from the board, including the trailing newline.
+        """
+        timeout = self.serial.timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            end = self._rx_buffer.find(NEWLINE)
+            if end >= 0:
+                line = bytes(self._rx_buffer[:end + 1])
+                del self._rx_buffer[:end + 1]
+                return line
+
+            if deadline is not None and time.monotonic() >= deadline:
+                line = bytes(self._rx_buffer)
+                self._rx_buffer.clear()
+                return line
+
+            # Block until at least one byte arrives, collecting anything else already received
+            self._rx_buffer += self.serial.read(max(1, self.serial.in_waiting))
 
     def write(self, data: str) -> None:
         """
@@ -203,6 +636,39 @@ class SerialWrapper:
         """
         _ = self.query(data)
 
+    def write_raw(self, command: bytes) -> None:
+        """
+        Send a pre-encoded command to the board that does not require a response.
+
+        :param command: The encoded command, including the trailing newline.
+        :raises RuntimeError: If the board returns a NACK response,
+            the firmware's error message is raised.
+        """
+        _ = self.query_multi_raw([command])
+
+    def write_shadowed(self, key: str, value: int, command: bytes) -> None:
+        """
+        Send a pre-encoded command that sets a channel, unless it is already set to the value.
+
+        The shadow cache is updated once the board has accepted the command.
+
+        :param key: The name of the channel in the shadow cache.
+        :param value: The value the command sets the channel to.
+        :param command: The encoded command, including the trailing newline.
+        :raises RuntimeError: If the board returns a NACK response,
+            the firmware's error message is raised.
+        """
+        cache = self.shadow_cache
+        if cache.enabled and cache.get(key) == value:
+            return
+        try:
+            self.write_raw(command)
+        except BaseException:
+            # The command may or may not have reached the board
+            cache.invalidate(key)
+            raise
+        cache.set(key, value)
+
     def _connect(self) -> bool:
         """
         Connect to the class's serial port.
@@ -215,19 +681,30 @@ class SerialWrapper:
         """
         try:
             self.serial.open()
+            self._rx_buffer.clear()
             # Wait for the board to be ready to receive data
             # Certain boards will reset when the serial port is opened
-            time.sleep(self.delay_after_connect)
-        except serial.SerialException:
+            clock.sleep(self.delay_after_connect)
+        except serial.SerialException as e:
             logger.error((
                 'Failed to connect to board '
                 f'{self.identity.board_type}:{self.identity.asset_tag}'
             ))
+            if self.flight_recorder is not None:
+                self.flight_recorder.record_event('connect failed', str(e))
             return False
 
         logger.info(
             f'Connected to board {self.identity.board_type}:{self.identity.asset_tag}'
         )
+        if self._has_connected:
+            STATS.record_reconnect(*self._stats_key())
+        # The board may have been reset while disconnected
+        self.shadow_cache.invalidate()
+        if self.flight_recorder is not None:
+            self.flight_recorder.record_event(
+                'reconnect' if self._has_connected else 'connect', str(self.serial.port))
+        self._has_connected = True
         return True
 
     def _disconnect(self) -> None:
@@ -238,10 +715,17 @@ class SerialWrapper:
         The serial port will be reopened on the next message.
         """
         self.serial.close()
+        self._rx_buffer.clear()
+        if self.flight_recorder is not None:
+            self.flight_recorder.record_event('disconnect')
         logger.warning(
             f'Board {self.identity.board_type}:{self.identity.asset_tag} disconnected'
         )
 
+    def _stats_key(self) -> tuple[str, str]:
+        """Return the board name and type that the serial statistics are recorded under."""
+        return stats_key(self.identity, self.serial.port)
+
     def set_identity(self, identity: BoardIdentity) -> None:
         """
         Stores the identity of the board this serial wrapper is connected to.
@@ -251,6 +735,14 @@ class SerialWrapper:
         :param identity: The identity of the board this serial wrapper is connected to.
         """
         self.identity = identity
+        name = f'{identity.board_type}:{identity.asset_tag}'
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.name = name
+        if self.flight_recorder is not None:
+            self.flight_recorder.name = name
+        session = active_recorder()
+        if session is not None:
+            session.record_identity(self._session_port, identity)
 
     def __str__(self) -> str:
         return (
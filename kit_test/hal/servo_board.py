@@ -4,7 +4,9 @@ from __future__ import annotations
 import logging
 from typing import NamedTuple
 
+from .codec import decode_response, encode_command, encode_set, parse_milli
 from .discovery import VidPid
+from .flight_recorder import FlightRecorder
 from .serial_wrapper import SerialWrapper
 from .utils import (
     BoardIdentity,
@@ -21,6 +23,10 @@ logger = logging.getLogger(__name__)
 BAUDRATE = 115200  # Since the servo board is a USB device, this is ignored
 VIDPID = VidPid(0x1BDA, 0x0011)
 
+CMD_CURRENT = encode_command('SERVO:I?')
+CMD_VOLTAGE = encode_command('SERVO:V?')
+CMD_STATUS = encode_command('*STATUS?')
+
 
 class ServoStatus(NamedTuple):
     """A named tuple containing the values of the servo status output."""
@@ -53,27 +59,49 @@ class ServoBoard:
 
     :param serial_port: The serial port to connect to.
     :param initial_identity: The identity of the board, as reported by the USB descriptor.
+    :param multiplexed: Share the serial port between threads through a dedicated I/O
+        thread, see SerialWrapper.
+    :param serial_wrapper: An existing connection to the board to use instead of
+        opening a new one, the other connection arguments are then ignored.
+    :param shadow_cache: Skip commands that set a channel to the value it already has,
+        see shadow_cache.ShadowCache.
+    :param identity: The identity the board has already reported to *IDN?,
+        to skip identifying it again.
     """
 
     def __init__(
         self,
         serial_port: str,
         initial_identity: BoardIdentity | None = None,
+        multiplexed: bool = False,
+        serial_wrapper: SerialWrapper | None = None,
+        shadow_cache: bool = False,
+        identity: BoardIdentity | None = None,
     ) -> None:
         if initial_identity is None:
             initial_identity = BoardIdentity()
-        self._serial = SerialWrapper(serial_port, BAUDRATE, identity=initial_identity)
+        if serial_wrapper is None:
+            serial_wrapper = SerialWrapper(
+                serial_port, BAUDRATE, identity=initial_identity, multiplexed=multiplexed,
+                shadow_cache=shadow_cache)
+        self._serial = serial_wrapper
 
         self.servos = tuple(
             Servo(self._serial, index) for index in range(12)
         )
 
-        identity = self.identify()
+        if identity is None:
+            identity = self.identify()
         assert identity.board_type == 'SBv4B', \
             f"Expected board type 'SBv4B', got {identity.board_type!r} instead."
 
         self._serial.set_identity(identity)
 
+    @property
+    def identity(self) -> BoardIdentity:
+        """The identity the board reported when it was connected."""
+        return self._serial.identity
+
     def identify(self) -> BoardIdentity:
         """
         Get the identity of the board.
@@ -89,9 +117,25 @@ class ServoBoard:
 
         :return: A named tuple of the watchdog fail and pgood status.
         """
-        response = self._serial.query('*STATUS?')
+        response = decode_response(self._serial.query_raw(CMD_STATUS))
+        status = ServoStatus.from_status_response(response)
+        if status.watchdog_failed or not status.power_good:
+            # The servo outputs may have been reset
+            self._serial.shadow_cache.invalidate()
+        return status
+
+    def query_multi(self, commands: list[str]) -> list[str]:
+        """
+        Send several raw commands to the board in a single exchange.
 
-        return ServoStatus.from_status_response(response)
+        The commands are sent in one write and the responses are read back in order,
+        which is much faster than sending each command separately.
+
+        :param commands: The commands to send, without trailing newlines.
+        :raises RuntimeError: If the board returns a NACK to any of the commands.
+        :return: The responses to each of the commands, in order.
+        """
+        return self._serial.query_multi(commands)
 
     def reset(self) -> None:
         """
@@ -99,7 +143,10 @@ class ServoBoard:
 
         This will disable all servos.
         """
-        self._serial.write('*RESET')
+        try:
+            self._serial.write('*RESET')
+        finally:
+            self._serial.shadow_cache.invalidate()
 
     def current(self) -> float:
         """
@@ -109,8 +156,8 @@ class ServoBoard:
 
         :return: The current draw of the board in amps.
         """
-        response = self._serial.query('SERVO:I?')
-        return float(response) / 1000
+        response = self._serial.query_raw(CMD_CURRENT)
+        return parse_milli(response)
 
     def voltage(self) -> float:
         """
@@ -118,8 +165,13 @@ class ServoBoard:
 
         :return: The voltage of the on-board regulator in volts.
         """
-        response = self._serial.query('SERVO:V?')
-        return float(response) / 1000
+        response = self._serial.query_raw(CMD_VOLTAGE)
+        return parse_milli(response)
+
+    @property
+    def flight_recorder(self) -> FlightRecorder | None:
+        """The recorder of the board's recent serial transactions, None if disabled."""
+        return self._serial.flight_recorder
 
     def close(self) -> None:
         """Close the underlying serial port."""
@@ -140,10 +192,16 @@ class Servo:
     def __init__(self, serial: SerialWrapper, index: int):
         self._serial = serial
         self._index = index
+        self._key = f'SERVO:{index}'
 
         self._duty_min = START_DUTY_MIN
         self._duty_max = START_DUTY_MAX
 
+        # Pre-encode the commands used by this servo
+        self._cmd_get = encode_command(f'SERVO:{index}:GET?')
+        self._cmd_disable = encode_command(f'SERVO:{index}:DISABLE')
+        self._cmd_set_prefix = f'SERVO:{index}:SET:'.encode('ascii')
+
     def get_position(self) -> float | None:
         """
         Get the position of the servo.
@@ -152,8 +210,11 @@ class Servo:
 
         :return: The position of the servo as a float between -1.0 and 1.0 or None if disabled.
         """
-        response = self._serial.query(f'SERVO:{self._index}:GET?')
-        data = int(response)
+        # The firmware never moves a servo on its own, so the last position set is current
+        data = self._serial.shadow_cache.get(self._key)
+        if data is None:
+            data = int(self._serial.query_raw(self._cmd_get))
+            self._serial.shadow_cache.set(self._key, data)
         if data == 0:
             return None
         return map_to_float(data, self._duty_min, self._duty_max, -1.0, 1.0, precision=3)
@@ -173,7 +234,8 @@ class Servo:
             return
 
         setpoint = map_to_int(value, -1.0, 1.0, self._duty_min, self._duty_max)
-        self._serial.write(f'SERVO:{self._index}:SET:{setpoint}')
+        self._serial.write_shadowed(
+            self._key, setpoint, encode_set(self._cmd_set_prefix, setpoint))
 
     def disable(self) -> None:
         """
@@ -181,7 +243,7 @@ class Servo:
 
         This will cause this channel to output a 0% duty cycle.
         """
-        self._serial.write(f'SERVO:{self._index}:DISABLE')
+        self._serial.write_shadowed(self._key, 0, self._cmd_disable)
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__qualname__} index={self._index} {self._serial}>"
@@ -0,0 +1,148 @@
+"""
+A pool of open board connections that persists between tests.
+
+Each board is keyed by its USB serial number, so testing the same board again,
+or a board that stays connected between tests, reuses the already-open and
+already-identified SerialWrapper and board object instead of reconnecting.
+Only one SerialWrapper is ever open for each port.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from types import TracebackType
+from typing import Any, TypeVar, Union, cast
+
+from .discovery import Port
+from .motor_board import MotorBoard
+from .power_board import PowerBoard
+from .serial_wrapper import SerialWrapper
+from .servo_board import ServoBoard
+
+logger = logging.getLogger(__name__)
+
+BoardT = TypeVar('BoardT', PowerBoard, MotorBoard, ServoBoard)
+Board = Union[PowerBoard, MotorBoard, ServoBoard]
+
+
+class _Session:
+    """An open connection to a board and the board objects using it."""
+
+    def __init__(self, port: str, serial: SerialWrapper) -> None:
+        self.port = port
+        self.serial = serial
+        self.boards: dict[type, Board] = {}
+
+
+class SessionPool:
+    """
+    Keep boards connected between tests, keyed by their USB serial number.
+
+    Boards without a serial number are keyed by their port.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sessions: dict[str, _Session] = {}
+        # The key of the session using each port
+        self._ports: dict[str, str] = {}
+
+    @staticmethod
+    def _key(port: Port) -> str:
+        return port.identity.asset_tag or port.port
+
+    def serial(self, port: Port, baud: int = 115200, **kwargs: Any) -> SerialWrapper:
+        """
+        Get an open SerialWrapper for a board, reusing the existing one if possible.
+
+        If a different board was previously connected to the same port,
+        or this board has moved to a different port, the old connection is closed.
+
+        :param port: The discovered port of the board.
+        :param baud: The baud rate to use if a new connection is made.
+        :param kwargs: Other arguments to SerialWrapper if a new connection is made.
+        :return: The board's serial connection.
+        """
+        with self._lock:
+            return self._session(port, baud, kwargs).serial
+
+    def board(self, board_class: type[BoardT], port: Port, **kwargs: Any) -> BoardT:
+        """
+        Get a board object for a board, reusing the existing one if possible.
+
+        A new board object is created, and the board identified, only the first time
+        a board is seen on a port.
+
+        :param board_class: The class of the board, e.g. PowerBoard.
+        :param port: The discovered port of the board.
+        :param kwargs: Other arguments to SerialWrapper if a new connection is made.
+        :return: The board object.
+        """
+        with self._lock:
+            session = self._session(port, 115200, kwargs)
+            board = session.boards.get(board_class)
+        if board is not None:
+            return cast(BoardT, board)
+
+        # Identifying the board blocks on the serial port, so don't hold up other boards
+        board = board_class(port.port, port.identity, serial_wrapper=session.serial)
+        with self._lock:
+            # Keep the first board object if another worker created one meanwhile
+            return cast(BoardT, session.boards.setdefault(board_class, board))
+
+    def _session(self, port: Port, baud: int, kwargs: dict[str, Any]) -> _Session:
+        key = self._key(port)
+        session = self._sessions.get(key)
+        if session is not None and session.port == port.port:
+            return session
+        if session is not None:
+            # The board has been re-enumerated on a different port
+            self._close(key)
+
+        other = self._ports.get(port.port)
+        if other is not None:
+            # A different board was connected to this port
+            self._close(other)
+
+        serial = SerialWrapper(port.port, baud, identity=port.identity, **kwargs)
+        serial.start()
+        session = self._sessions[key] = _Session(port.port, serial)
+        self._ports[port.port] = key
+        logger.debug(f"Opened pooled connection to {port}")
+        return session
+
+    def prune(self, ports: list[Port]) -> None:
+        """
+        Close the connections to any boards that are no longer connected.
+
+        :param ports: The ports of all the currently connected boards.
+        """
+        present = {self._key(port) for port in ports}
+        with self._lock:
+            for key in list(self._sessions):
+                if key not in present:
+                    self._close(key)
+
+    def _close(self, key: str) -> None:
+        session = self._sessions.pop(key)
+        if self._ports.get(session.port) == key:
+            del self._ports[session.port]
+        session.serial.stop()
+        logger.debug(f"Closed pooled connection to {key}")
+
+    def close(self) -> None:
+        """Close every connection in the pool."""
+        with self._lock:
+            for key in list(self._sessions):
+                self._close(key)
+
+    def __enter__(self) -> SessionPool:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,164 @@
+"""
+Record every serial transaction of a session to a file for later replay.
+
+Each line of the recording is a JSON object. Transactions record the port,
+numbered if it has already been used by another board, the time since the
+recording started, the commands sent, the responses received
+and the latency of each response from when the commands were written.
+When a board is identified a line mapping its port to its identity is written.
+Recordings with a .gz suffix are gzip compressed.
+
+The recordings can be played back with the simulator's replay:// serial URLs.
+"""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import IO, Any
+
+from .utils import BoardIdentity
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+# Commands and responses are stored as latin-1 so any bytes can be recorded
+ENCODING = 'latin-1'
+
+
+class SessionRecorder:
+    """
+    Write serial transactions to a recording file.
+
+    :param path: The file to write the recording to, compressed if it ends in .gz.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        # The number of SerialWrappers that have used each port
+        self._port_uses: dict[str, int] = {}
+        self._file: IO[str]
+        if self.path.suffix == '.gz':
+            self._file = gzip.open(self.path, 'wt', encoding='ascii')
+        else:
+            self._file = open(self.path, 'w', encoding='ascii')
+        self._write({'version': FORMAT_VERSION, 'created': time.time()})
+
+    def _write(self, entry: dict[str, Any]) -> None:
+        line = json.dumps(entry, separators=(',', ':'))
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + '\n')
+
+    def new_stream(self, port: str) -> str:
+        """
+        Get the name to record a new SerialWrapper's transactions under.
+
+        Boards tested one after another are often connected to the same port,
+        so each use of a port after the first is numbered, e.g. '/dev/ttyACM0#1'.
+
+        :param port: The port of the SerialWrapper.
+        :return: The name to record the transactions under.
+        """
+        with self._lock:
+            uses = self._port_uses.get(port, 0)
+            self._port_uses[port] = uses + 1
+        return port if uses == 0 else f'{port}#{uses}'
+
+    def record_identity(self, port: str, identity: BoardIdentity) -> None:
+        """
+        Record the identity of the board on a port.
+
+        :param port: The name of the port the board is recorded under.
+        :param identity: The identity reported by the board.
+        """
+        self._write({'port': port, 'identity': list(identity)})
+
+    def record_transaction(
+        self,
+        port: str,
+        start: float,
+        commands: list[bytes],
+        responses: list[bytes],
+        latencies: list[float],
+    ) -> None:
+        """
+        Record a transaction with a board.
+
+        :param port: The name of the port the board is recorded under.
+        :param start: The perf_counter time the commands were written.
+        :param commands: The encoded commands written to the board.
+        :param responses: The responses read from the board without the trailing
+            newlines, fewer than the commands if the transaction failed.
+        :param latencies: The time each response was received after the commands
+            were written, in seconds.
+        """
+        self._write({
+            'port': port,
+            't': round(start - self._start, 6),
+            'c': [command.decode(ENCODING) for command in commands],
+            'r': [response.decode(ENCODING) for response in responses],
+            'l': [round(latency, 6) for latency in latencies],
+        })
+
+    def close(self) -> None:
+        """Finish the recording and close the file."""
+        with self._lock:
+            self._file.close()
+        logger.info(f"Serial session recorded to {self.path}")
+
+
+# The recorder used by every SerialWrapper, None when not recording
+_recorder: SessionRecorder | None = None
+
+
+def start_recording(path: Path | str) -> SessionRecorder:
+    """
+    Start recording the transactions of every SerialWrapper to a file.
+
+    :param path: The file to write the recording to, compressed if it ends in .gz.
+    :return: The active recorder.
+    """
+    global _recorder
+    stop_recording()
+    _recorder = SessionRecorder(path)
+    return _recorder
+
+
+def stop_recording() -> None:
+    """Stop recording and close the recording file, if recording."""
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        _recorder = None
+
+
+def active_recorder() -> SessionRecorder | None:
+    """Return the active recorder, or None if not recording."""
+    return _recorder
+
+
+def read_recording(path: Path | str) -> list[dict[str, Any]]:
+    """
+    Read all the entries of a recording.
+
+    :param path: The recording file, compressed if it ends in .gz.
+    :raises ValueError: If the file is not a recording of a supported version.
+    :return: The entries of the recording, starting with the header.
+    """
+    path = Path(path)
+    f: IO[str]
+    if path.suffix == '.gz':
+        f = gzip.open(path, 'rt', encoding='ascii')
+    else:
+        f = open(path, encoding='ascii')
+    with f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    if not entries or entries[0].get('version') != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} serial session recording")
+    return entries
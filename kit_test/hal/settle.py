@@ -0,0 +1,78 @@
+"""
+Wait for a measurement to stop changing.
+
+Test steps often need to wait after switching an output for the current
+or voltage to settle before checking it. Sleeping for a fixed time must
+allow for the slowest board, wait_until_settled instead reads the value
+repeatedly and returns as soon as the readings agree.
+
+The boards only update their measurements periodically, so readings taken close
+together can be copies of one measurement, possibly from before the change.
+The readings are spaced so those compared span at least one update.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Callable
+
+from . import clock
+
+logger = logging.getLogger(__name__)
+
+# The longest time the boards take to update a measurement, in seconds
+SENSOR_UPDATE_PERIOD = 0.1
+
+
+def wait_until_settled(
+    read: Callable[[], float],
+    tolerance: float,
+    timeout: float = 2.0,
+    interval: float = 0.05,
+    samples: int = 3,
+    min_time: float = SENSOR_UPDATE_PERIOD,
+    update_period: float = SENSOR_UPDATE_PERIOD,
+) -> float:
+    """
+    Read a value until consecutive readings agree within a tolerance.
+
+    The value is considered settled once the last few readings, the first taken
+    min_time after this was called, are all within the tolerance of each other.
+    If the value doesn't settle before the timeout, the last reading is returned
+    so the caller's checks can report the unsettled value.
+
+    The first reading is never taken sooner than update_period after this was called,
+    and the interval is lengthened if needed so the readings compared span at least
+    update_period, so repeated readings of a stale measurement don't count as settled.
+
+    :param read: The function that reads the value, e.g. board.outputs[0].current.
+    :param tolerance: The largest difference between the readings that counts as settled.
+    :param timeout: The longest time to wait for the value to settle, in seconds.
+    :param interval: The time between readings, in seconds.
+    :param samples: The number of consecutive readings that must agree.
+    :param min_time: The time to wait before the first reading,
+        to allow the measurement to respond to the change.
+    :param update_period: The time the board takes to update the measurement, in seconds.
+    :return: The last reading.
+    """
+    start = clock.monotonic()
+    deadline = start + timeout
+    readings: list[float] = []
+    interval = max(interval, update_period / max(1, samples - 1))
+
+    # Allow the measurement to respond to the change before reading it
+    clock.sleep(min(max(min_time, update_period), timeout))
+    while True:
+        now = clock.monotonic()
+        value = read()
+        readings.append(value)
+        recent = readings[-samples:]
+        if len(recent) >= samples and max(recent) - min(recent) <= tolerance:
+            logger.debug(f"Settled at {value:.3f} after {now - start:.3f}s")
+            return value
+
+        if now >= deadline:
+            logger.warning(
+                f"Reading didn't settle within {tolerance} after {timeout}s, "
+                f"last reading {value:.3f}")
+            return value
+        clock.sleep(max(0.0, min(now + interval, deadline) - clock.monotonic()))
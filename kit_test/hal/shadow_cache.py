@@ -0,0 +1,65 @@
+"""
+A write-through cache of the values last set on a board.
+
+When enabled, setting an output, LED, motor or servo to the value it was last set to
+skips the command entirely, and servo positions are read back from the cache
+since the firmware never changes them on its own.
+
+Each SerialWrapper has a single cache shared by every object controlling its board.
+The cache is cleared when the board is reset or reconnected, and a channel's entry is
+cleared when the board reports it is in an overcurrent or fault state, since the
+firmware may have disabled it. The cache is disabled by default.
+"""
+from __future__ import annotations
+
+import threading
+
+
+class ShadowCache:
+    """
+    The last value set on each channel of a board.
+
+    Values are stored as the integer setpoint sent to the firmware,
+    keyed by the channel's name, e.g. 'OUT:0' or 'SERVO:11'.
+
+    :param enabled: Whether to cache values, a disabled cache is always empty.
+    """
+
+    def __init__(self, enabled: bool = False) -> None:
+        self.enabled = enabled
+        self._values: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> int | None:
+        """
+        Get the last value set on a channel.
+
+        :param key: The name of the channel.
+        :return: The cached value, or None if it is unknown.
+        """
+        with self._lock:
+            return self._values.get(key)
+
+    def set(self, key: str, value: int) -> None:
+        """
+        Store the value just set on a channel.
+
+        :param key: The name of the channel.
+        :param value: The value the channel was set to.
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._values[key] = value
+
+    def invalidate(self, *keys: str) -> None:
+        """
+        Forget the values of some channels, or of every channel if none are given.
+
+        :param keys: The names of the channels to forget.
+        """
+        with self._lock:
+            if not keys:
+                self._values.clear()
+            for key in keys:
+                self._values.pop(key, None)
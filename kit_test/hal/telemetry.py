@@ -0,0 +1,345 @@
+"""
+Sample board measurements in the background.
+
+A TelemetrySampler polls a set of quantities, such as output currents or the battery
+voltage, at a fixed rate on its own thread. Each quantity is stored in a TimeSeries,
+a preallocated ring buffer of timestamps from the active clock (see clock) and values,
+which can be queried
+for the mean, minimum, maximum and slope over a recent window. This allows a test
+to capture a waveform while it actuates the board, for example the inrush current
+after enabling an output, rather than taking a single reading after a sleep.
+
+    with TelemetrySampler(rate=50) as sampler:
+        sampler.add_power_board(board)
+        board.outputs[0].enable(True)
+        clock.sleep(0.5)
+        print(sampler['power.H0.current'].max(0.5))
+"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import logging
+import threading
+from types import TracebackType
+from typing import Callable
+
+import numpy as np
+import numpy.typing as npt
+
+from . import clock
+from .motor_board import MotorBoard
+from .power_board import PowerBoard, PowerOutputPosition
+from .servo_board import ServoBoard
+
+logger = logging.getLogger(__name__)
+
+FloatArray = npt.NDArray[np.float64]
+
+
+class TimeSeries:
+    """
+    A ring buffer of timestamped samples of a single quantity.
+
+    Once the buffer is full the oldest samples are overwritten.
+
+    :param name: The name of the quantity.
+    :param capacity: The maximum number of samples to keep.
+    """
+
+    def __init__(self, name: str, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("A time series must hold at least one sample")
+        self.name = name
+        self.capacity = capacity
+        self._times: FloatArray = np.zeros(capacity)
+        self._values: FloatArray = np.zeros(capacity)
+        # The total number of samples ever appended, the next index is this mod capacity
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: float, value: float) -> None:
+        """
+        Add a sample, overwriting the oldest sample if the buffer is full.
+
+        :param timestamp: The monotonic time the sample was taken.
+        :param value: The value of the sample.
+        """
+        with self._lock:
+            index = self._count % self.capacity
+            self._times[index] = timestamp
+            self._values[index] = value
+            self._count += 1
+
+    def clear(self) -> None:
+        """Discard all the samples."""
+        with self._lock:
+            self._count = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return min(self._count, self.capacity)
+
+    def window(
+        self,
+        duration: float | None = None,
+        end: float | None = None,
+    ) -> tuple[FloatArray, FloatArray]:
+        """
+        Get a copy of the samples in a window of time, oldest first.
+
+        :param duration: The length of the window in seconds, defaults to every sample.
+        :param end: The monotonic time the window ends at, defaults to now.
+        :return: The timestamps and values of the samples in the window.
+        """
+        with self._lock:
+            count = min(self._count, self.capacity)
+            start = self._count - count
+            order = np.arange(start, self._count) % self.capacity
+            times = self._times[order]
+            values = self._values[order]
+
+        if end is None:
+            end = clock.monotonic()
+        mask = times <= end
+        if duration is not None:
+            mask &= times > end - duration
+        return times[mask], values[mask]
+
+    def _window_values(self, duration: float | None) -> FloatArray:
+        _, values = self.window(duration)
+        if len(values) == 0:
+            raise ValueError(f"{self.name} has no samples in the window")
+        return values
+
+    def latest(self) -> float:
+        """
+        Return the most recent value.
+
+        :raises ValueError: If there are no samples.
+        :return: The value of the newest sample.
+        """
+        with self._lock:
+            if self._count == 0:
+                raise ValueError(f"{self.name} has no samples")
+            return float(self._values[(self._count - 1) % self.capacity])
+
+    def mean(self, duration: float | None = None) -> float:
+        """
+        Return the mean value over a recent window.
+
+        :param duration: The length of the window in seconds, defaults to every sample.
+        :raises ValueError: If there are no samples in the window.
+        :return: The mean of the samples.
+        """
+        return float(np.mean(self._window_values(duration)))
+
+    def min(self, duration: float | None = None) -> float:
+        """
+        Return the minimum value over a recent window.
+
+        :param duration: The length of the window in seconds, defaults to every sample.
+        :raises ValueError: If there are no samples in the window.
+        :return: The smallest sample.
+        """
+        return float(np.min(self._window_values(duration)))
+
+    def max(self, duration: float | None = None) -> float:
+        """
+        Return the maximum value over a recent window.
+
+        :param duration: The length of the window in seconds, defaults to every sample.
+        :raises ValueError: If there are no samples in the window.
+        :return: The largest sample.
+        """
+        return float(np.max(self._window_values(duration)))
+
+    def slope(self, duration: float | None = None) -> float:
+        """
+        Return the rate of change over a recent window, from a least squares fit.
+
+        :param duration: The length of the window in seconds, defaults to every sample.
+        :raises ValueError: If there are fewer than two samples in the window.
+        :return: The slope of the samples, in units per second.
+        """
+        times, values = self.window(duration)
+        if len(values) < 2 or np.ptp(times) == 0:
+            raise ValueError(
+                f"{self.name} needs at least two samples at different times to fit a slope")
+        return float(np.polyfit(times - times[0], values, 1)[0])
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__qualname__} {self.name!r} samples={len(self)}>"
+
+
+class _Source:
+    """A quantity being sampled and where its samples are stored."""
+
+    def __init__(self, read: Callable[[], float], series: TimeSeries) -> None:
+        self.read = read
+        self.series = series
+        self.failing = False
+
+
+class TelemetrySampler:
+    """
+    Poll a set of quantities at a fixed rate on a background thread.
+
+    Every quantity is read once per period, in the order they were added.
+    If reading falls behind, the missed periods are skipped rather than
+    sampled in a burst.
+
+    :param rate: The number of times per second to sample every quantity.
+    :param history: The number of seconds of samples to keep for each quantity.
+    """
+
+    def __init__(self, rate: float = 20.0, history: float = 10.0) -> None:
+        if rate <= 0:
+            raise ValueError("The sample rate must be positive")
+        self.period = 1 / rate
+        self.capacity = max(1, int(rate * history))
+        self._sources: dict[str, _Source] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, name: str, read: Callable[[], float]) -> TimeSeries:
+        """
+        Start sampling a quantity.
+
+        :param name: The name of the quantity, used to look up its samples.
+        :param read: The function that reads the quantity.
+        :raises ValueError: If a quantity with the same name is already being sampled.
+        :return: The time series the samples are stored in.
+        """
+        series = TimeSeries(name, self.capacity)
+        with self._lock:
+            if name in self._sources:
+                raise ValueError(f"{name} is already being sampled")
+            self._sources[name] = _Source(read, series)
+        return series
+
+    def remove(self, name: str) -> None:
+        """
+        Stop sampling a quantity.
+
+        :param name: The name of the quantity.
+        """
+        with self._lock:
+            del self._sources[name]
+
+    def add_power_board(self, board: PowerBoard, name: str = 'power') -> None:
+        """
+        Sample every output current and the battery voltage and current of a power board.
+
+        The values are all read from one snapshot of the board each period.
+
+        :param board: The power board to sample.
+        :param name: The prefix of the quantities' names, e.g. 'power.H0.current'.
+        """
+        max_age = self.period / 2
+        for output in PowerOutputPosition:
+            self.add(
+                f'{name}.{output.name}.current',
+                functools.partial(board.outputs[output].current, max_age),
+            )
+        battery = board.battery_sensor
+        self.add(f'{name}.battery.voltage', functools.partial(battery.voltage, max_age))
+        self.add(f'{name}.battery.current', functools.partial(battery.current, max_age))
+
+    def add_motor_board(self, board: MotorBoard, name: str = 'motor') -> None:
+        """
+        Sample the current of each motor of a motor board.
+
+        The values are all read from one snapshot of the board each period.
+
+        :param board: The motor board to sample.
+        :param name: The prefix of the quantities' names, e.g. 'motor.0.current'.
+        """
+        max_age = self.period / 2
+        for index, motor in enumerate(board.motors):
+            self.add(f'{name}.{index}.current', functools.partial(motor.current, max_age))
+
+    def add_servo_board(self, board: ServoBoard, name: str = 'servo') -> None:
+        """
+        Sample the current draw and regulator voltage of a servo board.
+
+        :param board: The servo board to sample.
+        :param name: The prefix of the quantities' names, e.g. 'servo.current'.
+        """
+        self.add(f'{name}.current', board.current)
+        self.add(f'{name}.voltage', board.voltage)
+
+    def __getitem__(self, name: str) -> TimeSeries:
+        with self._lock:
+            return self._sources[name].series
+
+    def __contains__(self, name: object) -> bool:
+        with self._lock:
+            return name in self._sources
+
+    def start(self) -> None:
+        """Start sampling on a background thread, if not already started."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        started = threading.Event()
+        # Sample in a copy of the caller's context, so the samples' timestamps
+        # follow on from the caller's time when on a virtual clock
+        self._thread = threading.Thread(
+            target=contextvars.copy_context().run, args=(self._run, started),
+            name='telemetry-sampler', daemon=True)
+        self._thread.start()
+        # On a virtual clock, the caller's sleeps only wait for the sampler once it is paced
+        started.wait()
+
+    def stop(self) -> None:
+        """Stop sampling, keeping the samples already taken."""
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join()
+
+    def _run(self, started: threading.Event) -> None:
+        # Sample in step with the time of the test, see clock.pace
+        clock.follow(self._stop)
+        started.set()
+        next_sample = clock.monotonic()
+        while not self._stop.is_set():
+            self.sample()
+
+            next_sample += self.period
+            now = clock.monotonic()
+            if next_sample < now:
+                # Skip the periods that were missed
+                next_sample += (now - next_sample) // self.period * self.period + self.period
+            clock.pace(self._stop, next_sample)
+
+    def sample(self) -> None:
+        """Read every quantity once, this is called each period by the sampling thread."""
+        with self._lock:
+            sources = list(self._sources.values())
+        for source in sources:
+            timestamp = clock.monotonic()
+            try:
+                value = source.read()
+            except Exception as e:
+                # Only log the first failure of a run of failures
+                if not source.failing:
+                    logger.warning(f"Failed to sample {source.series.name}: {e}")
+                source.failing = True
+                continue
+            source.failing = False
+            source.series.append(timestamp, value)
+
+    def __enter__(self) -> TelemetrySampler:
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.stop()
@@ -0,0 +1,201 @@
+"""
+Check test measurements against their acceptable limits.
+
+Each board test builds a table of limits, keyed by the CSV field the measurement
+is saved to, and checks every measurement against it. Failures are logged and
+collected rather than aborting the test, so a single run reports every
+out-of-range value on the board. Whether each check passed is saved in the
+'<key>_pass' field of the results, the keys of the failed fields are saved in
+the 'failures' field, and LimitChecker.assert_passed fails the board once all
+the measurements have been taken.
+"""
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+FAILURES_FIELD = 'failures'
+# The suffix of the fields recording whether each check passed
+PASS_SUFFIX = '_pass'
+
+
+def pass_fieldnames(keys: Iterable[str]) -> List[str]:
+    """
+    Return the fields recording whether each check passed.
+
+    :param keys: The results fields that are checked.
+    :return: The pass/fail field of each key, in the same order.
+    """
+    return [f'{key}{PASS_SUFFIX}' for key in keys]
+
+
+class Limit(NamedTuple):
+    """
+    The acceptable range of a measurement, exclusive of the bounds.
+
+    :param name: The name of the measurement, used in log and error messages.
+    :param unit: The unit of the measurement, e.g. 'A'.
+    :param min: The lower bound of the range.
+    :param max: The upper bound of the range.
+    :param description: How the range is described in error messages.
+    """
+
+    name: str
+    unit: str
+    min: float
+    max: float
+    description: str
+
+    @classmethod
+    def bounds(cls, name: str, unit: str, min: float, max: float) -> 'Limit':
+        """
+        Create a limit from a minimum and maximum value.
+
+        :param name: The name of the measurement.
+        :param unit: The unit of the measurement.
+        :param min: The lower bound of the range.
+        :param max: The upper bound of the range.
+        :return: The limit.
+        """
+        center = (min + max) / 2
+        variance = (max - min) / 2
+        return cls(name, unit, min, max, f"{center:.2f}±{variance:.2f}{unit}")
+
+    @classmethod
+    def nominal(
+        cls,
+        name: str,
+        unit: str,
+        nominal: float,
+        tolerance: float,
+        offset: float = 0,
+    ) -> 'Limit':
+        """
+        Create a limit from a nominal value and a tolerance.
+
+        :param name: The name of the measurement.
+        :param unit: The unit of the measurement.
+        :param nominal: The expected value.
+        :param tolerance: The allowed fractional deviation from the nominal value.
+        :param offset: An additional absolute deviation allowed, in the measurement's unit.
+        :return: The limit.
+        """
+        min = nominal * (1 - tolerance) - offset
+        max = nominal * (1 + tolerance) + offset
+        description = f"{nominal:.2f}±{tolerance:.0%}"
+        if offset != 0:
+            description += f"±{offset:.2f}{unit}"
+        return cls(name, unit, min, max, description)
+
+    def passes(self, value: float) -> bool:
+        """
+        Check whether a value is within the limit.
+
+        :param value: The measured value.
+        :return: Whether the value is within the range.
+        """
+        return self.min < value < self.max
+
+    def failure_message(self, value: float) -> str:
+        """
+        Describe a value being outside the limit.
+
+        :param value: The measured value.
+        :return: The error message.
+        """
+        return (
+            f"{self.name.capitalize()} of {value:.3f}{self.unit} is outside acceptable "
+            f"range of {self.description}.")
+
+
+class LimitChecker:
+    """
+    Check measurements against a table of limits, collecting every failure.
+
+    :param results: The results of the test, each measurement is stored under its key,
+        whether it passed under '<key>_pass' and the failed keys in the 'failures' field.
+    :param limits: The limits of the measurements, keyed by the results field.
+    """
+
+    def __init__(
+        self,
+        results: Dict[str, Any],
+        limits: Optional[Mapping[str, Limit]] = None,
+    ) -> None:
+        self.results = results
+        self.limits: Dict[str, Limit] = dict(limits or {})
+        self.failures: Dict[str, str] = {}
+        # Checks may be made from several test steps at once
+        self._lock = threading.Lock()
+
+    def check(self, key: str, value: float, limit: Optional[Limit] = None) -> bool:
+        """
+        Log a measurement, save it to the results and check it against its limit.
+
+        :param key: The results field of the measurement.
+        :param value: The measured value.
+        :param limit: The limit to check against, defaults to the limit of the key
+            in the limits table.
+        :return: Whether the measurement passed.
+        """
+        if limit is None:
+            limit = self.limits[key]
+        logger.info(f"Detected {limit.name}: {value:.3f}{limit.unit}")
+        self.results[key] = value
+        if limit.passes(value):
+            self.results[f'{key}{PASS_SUFFIX}'] = True
+            return True
+        self.fail(key, limit.failure_message(value))
+        return False
+
+    def require(self, key: str, condition: bool, message: str) -> bool:
+        """
+        Check a condition that isn't a measurement, such as an operator's answer.
+
+        :param key: The results field the condition is recorded under.
+        :param condition: Whether the check passed.
+        :param message: The error message if the check failed.
+        :return: The condition.
+        """
+        if condition:
+            self.results[f'{key}{PASS_SUFFIX}'] = True
+        else:
+            self.fail(key, message)
+        return condition
+
+    def fail(self, key: str, message: str) -> None:
+        """
+        Record a failure.
+
+        :param key: The results field that failed.
+        :param message: The description of the failure.
+        """
+        logger.error(message)
+        with self._lock:
+            self.failures[key] = message
+            self.results[f'{key}{PASS_SUFFIX}'] = False
+            self.results[FAILURES_FIELD] = ';'.join(self.failures)
+
+    @property
+    def passed(self) -> bool:
+        """Whether every check so far has passed."""
+        return not self.failures
+
+    def failure_messages(self) -> List[str]:
+        """Return the messages of every failure, in the order they occurred."""
+        with self._lock:
+            return list(self.failures.values())
+
+    def assert_passed(self) -> None:
+        """
+        Fail the test if any check failed.
+
+        :raises AssertionError: Listing every failure.
+        """
+        messages = self.failure_messages()
+        if not messages:
+            return
+        count = len(messages)
+        raise AssertionError(
+            f"{count} check{'s' if count != 1 else ''} failed: " + ' '.join(messages))
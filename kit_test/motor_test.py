@@ -10,78 +10,166 @@ The test will:
 """
 import argparse
 import csv
+import functools
 import logging
-import os
 import textwrap
-from tempfile import NamedTemporaryFile
-from time import sleep
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+from .fixtures import MOTOR_RESISTANCE
+from .hal import (
+    MOTOR_VIDPID,
+    BoardWatcher,
+    MotorBoard,
+    SessionPool,
+    discover_boards,
+    wait_until_settled,
+)
+from .hal.clock import sleep
+from .hal.discovery import Port
+from .hal.utils import BoardDisconnectionError
+from .limits import FAILURES_FIELD, Limit, LimitChecker, pass_fieldnames
+from .parallel import LockedDictWriter, test_ports
+from .results_log import prepare_log
+from .steps import Step, StepRunner
+from .timing import PhaseTimer, TimingSummary, timing_fieldnames
+
+# The change in current between readings that counts as settled, in amps
+SETTLE_TOLERANCE = 0.1
+# The resource of steps that load the board's power supply
+SUPPLY = 'supply'
+
+INPUT_VOLTAGE_LIMIT = Limit.bounds('input voltage', 'V', 11.5, 12.5)
+
+# The phases of the test that are timed, the setup followed by the test steps
+PHASES = ['discovery', 'connect', 'reset', 'motor_0', 'motor_1']
 
-from .hal import MOTOR_VIDPID, MotorBoard, discover_boards
+logger = logging.getLogger("motor_test")
 
-MOTOR_RESISTANCE = 4.7
 
-logger = logging.getLogger("motor_test")
+def motor_limits(input_voltage: float) -> Dict[str, Limit]:
+    """The limits of the motor board measurements, for the measured input voltage."""
+    limits = {}
+    for motor in range(2):
+        limits[f'motor_{motor}_off_current'] = Limit.bounds(
+            f'motor {motor} off state current', 'A', -0.2, 0.2)
+        for direction in (1, -1):
+            for abs_power in range(100, 10, -20):
+                power = abs_power * direction
+                expected_out_current = (input_voltage / MOTOR_RESISTANCE) * (abs_power / 100)
+                limits[f'motor_{motor}_{power}_current'] = Limit.nominal(
+                    f"motor {motor}, {power:.0f}% power", 'A', expected_out_current, 0.1, 0.2)
+    return limits
 
 
-def log_and_assert_bounds(
-    results: dict[str, Any],
-    key: str,
-    value: float,
-    name: str,
-    unit: str,
-    min: float,
-    max: float,
-) -> None:
-    """Log a value and assert it is within bounds."""
-    logger.info(f"Detected {name}: {value:.3f}{unit}")
-    results[key] = value
-    center = (min + max) / 2
-    variance = (max - min) / 2
-    assert min < value < max, (
-        f"{name.capitalize()} of {value:.3f}{unit} is outside acceptable range of "
-        f"{center:.2f}±{variance:.2f}{unit}.")
-
-
-def log_and_assert(
-    results: dict[str, Any],
-    key: str,
-    value: float,
-    name: str,
-    unit: str,
-    nominal: float,
-    tolerance: float,
-    offset: float = 0,
-) -> None:
-    """Log a value and assert it is within bounds."""
-    logger.info(f"Detected {name}: {value:.3f}{unit}")
-    results[key] = value
-    min = nominal * (1 - tolerance) - offset
-    max = nominal * (1 + tolerance) + offset
-    assert min < value < max, (
-        f"{name.capitalize()} of {value:.3f}{unit} is outside acceptable range of "
-        f"{nominal:.2f}±{tolerance:.0%}{f'±{offset:.2f}{unit}' if offset != 0 else ''}.")
+def test_motor(board: MotorBoard, limits: LimitChecker, motor: int) -> None:
+    """Test the current draw of a motor in both directions at a few duty cycles."""
+    logger.info(f"Testing motor {motor}")
+    # test off current
+    limits.check(f'motor_{motor}_off_current', board.motors[motor].current())
+
+    try:
+        for direction in (1, -1):
+            for abs_power in range(100, 10, -20):
+                power = abs_power * direction
+                logger.info(f"Testing motor {motor} at {power:.0f}% power")
+                board.motors[motor].set_power(power / 100)
+                current = wait_until_settled(
+                    board.motors[motor].current, SETTLE_TOLERANCE, samples=2)
+                # test output current
+                limits.check(f'motor_{motor}_{power}_current', current)
+    finally:
+        board.motors[motor].set_power(0)
+
+
+def motor_steps(board: MotorBoard, limits: LimitChecker) -> List[Step]:
+    """
+    The steps of the motor board test, after the board has been identified.
+
+    The expected currents are calculated from the unloaded input voltage,
+    so the motors share the supply and are tested one at a time.
+
+    :param board: The motor board to test.
+    :param limits: The checker the measurements are saved and checked with.
+    :return: The steps, in order of priority.
+    """
+    return [
+        Step(
+            f'motor_{motor}', functools.partial(test_motor, board, limits, motor),
+            resources=[f'motor:{motor}', SUPPLY])
+        for motor in range(len(board.motors))
+    ]
 
 
-def test_board(output_writer: csv.DictWriter, fw_ver: Optional[str] = None) -> None:
+def test_board(
+    output_writer: csv.DictWriter,
+    fw_ver: Optional[str] = None,
+    pool: Optional[SessionPool] = None,
+    summary: Optional[TimingSummary] = None,
+    parallel: bool = False,
+    port: Optional[Port] = None,
+) -> None:
     """
     Test the motor board.
 
     This test will measure the current draw on each motor in both directions at
     a few duty cycles.
+
+    With parallel, every connected motor board is tested at once,
+    otherwise only the first board found is tested. If a port is given, such as
+    a board that has just been connected, only that board is tested.
     """
-    results: Dict[str, Any] = {}
+    timer = PhaseTimer()
 
-    ports = discover_boards(MOTOR_VIDPID)
+    with timer.phase('discovery'):
+        ports = [port] if port is not None else discover_boards(MOTOR_VIDPID)
     if len(ports) == 0:
         logger.error("No motor boards found.")
         return
+    if pool is not None:
+        with timer.phase('connect'):
+            pool.prune(ports)
+
+    test_ports(
+        ports if parallel else ports[:1], timer,
+        lambda port, board_timer: test_port(
+            port, output_writer, fw_ver, pool, summary, board_timer),
+    )
+
+
+def test_port(
+    port: Port,
+    output_writer: csv.DictWriter,
+    fw_ver: Optional[str] = None,
+    pool: Optional[SessionPool] = None,
+    summary: Optional[TimingSummary] = None,
+    timer: Optional[PhaseTimer] = None,
+) -> None:
+    """
+    Test the motor board on a port.
+
+    :param port: The discovered port of the board.
+    :param output_writer: The writer the results are saved with.
+    :param fw_ver: The expected firmware version of the board.
+    :param pool: The pool to reuse the board's connection from.
+    :param summary: The summary to add the test's timings to.
+    :param timer: The timer of the test so far.
+    """
+    results: Dict[str, Any] = {}
+    if timer is None:
+        timer = PhaseTimer()
 
-    board = MotorBoard(ports[0].port, ports[0].identity)
+    with timer.phase('connect'):
+        if pool is not None:
+            # Reuse the connection if this board is still connected from a previous test
+            board = pool.board(MotorBoard, port, shadow_cache=True)
+        else:
+            board = MotorBoard(port.port, port.identity, shadow_cache=True)
 
+    limits = LimitChecker(results, {'input_volt': INPUT_VOLTAGE_LIMIT})
     try:
         results['passed'] = False  # default to failure
-        board_identity = board.identify()
+        # Identified when the board was connected
+        board_identity = board.identity
 
         results['asset'] = board_identity.asset_tag
         results['sw_version'] = board_identity.sw_version
@@ -92,81 +180,99 @@ def test_board(output_writer: csv.DictWriter, fw_ver: Optional[str] = None) -> N
             assert board_identity.sw_version == fw_ver, \
                 f"Expected firmware version {fw_ver}, got {board_identity.sw_version} instead."
 
-        board.reset()
-        sleep(0.5)
+        with timer.phase('reset'):
+            board.reset()
+            sleep(0.5)
 
         # expected currents are calculated using this voltage
         input_voltage = board.status().input_voltage
-        log_and_assert_bounds(
-            results, 'input_volt', input_voltage, 'input voltage', 'V', 11.5, 12.5)
-
-        for motor in range(2):
-            logger.info(f"Testing motor {motor}")
-            # test off current
-            log_and_assert_bounds(
-                results, f'motor_{motor}_off_current', board.motors[motor].current(),
-                f'motor {motor} off state current', 'A', -0.2, 0.2)
-
-            for direction in (1, -1):
-                for abs_power in range(100, 10, -20):
-                    power = abs_power * direction
-                    logger.info(f"Testing {power:.0f}% power")
-                    board.motors[motor].set_power(power / 100)
-                    sleep(0.1)
-
-                    expected_out_current = (
-                        (input_voltage / MOTOR_RESISTANCE) * (abs_power / 100))
-                    # test output current
-                    log_and_assert(
-                        results, f'motor_{motor}_{power}_current',
-                        board.motors[motor].current(),
-                        f"motor {motor}, {power:.0f}% power", 'A',
-                        expected_out_current,
-                        0.1, 0.2)
+        limits.check('input_volt', input_voltage)
+        # The other checks are meaningless with the supply out of range
+        limits.assert_passed()
+        limits.limits.update(motor_limits(input_voltage))
+
+        timer.run_steps(StepRunner(motor_steps(board, limits)))
 
+        # Fail the board now all the measurements have been taken
+        limits.assert_passed()
         logger.info("Board passed")
         results['passed'] = True
+    except (AssertionError, BoardDisconnectionError) as e:
+        # Save the serial history leading up to the failure
+        if board.flight_recorder is not None:
+            board.flight_recorder.dump(e)
+        raise
     finally:
+        timer.save(results)
+        if summary is not None:
+            summary.add(timer)
         output_writer.writerow(results)
         board.reset()
-        board.close()
+        if pool is None:
+            board.close()
 
 
 def main(args: argparse.Namespace) -> None:
     """Main function for the motor board test."""
-    new_log = True
-    fieldnames = [
-        'asset', 'sw_version', 'passed', 'input_volt',
-        'motor_0_off_current', 'motor_1_off_current',
+    measurements = [
+        'input_volt', 'motor_0_off_current', 'motor_1_off_current',
     ] + [
         f'motor_{motor}_{power * direction:.0f}_current'
         for motor in range(2)
         for direction in (1, -1)
         for power in range(100, 10, -20)
     ]
+    fieldnames = [
+        'asset', 'sw_version', 'passed', FAILURES_FIELD,
+        *measurements,
+        *pass_fieldnames(measurements),
+    ] + timing_fieldnames(PHASES)
 
-    if args.log:
-        logfile = args.log
-        if os.path.exists(logfile):
-            new_log = False
-    else:
-        logfile = NamedTemporaryFile(delete=False).name
+    logfile, new_log = prepare_log(args.log, fieldnames)
 
-    with open(logfile, 'a', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    summary = TimingSummary()
+    with open(logfile, 'a', newline='') as csvfile, SessionPool() as pool:
+        writer = LockedDictWriter(csvfile, fieldnames=fieldnames)
         if new_log:
             writer.writeheader()
 
-        while True:
-            try:
-                test_board(writer, args.fw_ver)
-            except AssertionError as e:
-                logger.error(f"Test failed: {e}")
-
-            result = input("Test another motor board? [Y/n]") or 'y'
-            if result.lower() != 'y':
-                break
-
+        watcher = BoardWatcher(MOTOR_VIDPID) if args.hotplug else None
+        try:
+            while True:
+                port = None
+                if watcher is not None:
+                    logger.info("Connect a motor board to test it, or press Ctrl+C to stop")
+                    try:
+                        event = watcher.wait_for('add')
+                    except KeyboardInterrupt:
+                        break
+                    # Without a timeout, wait_for only returns once a board is added
+                    assert event is not None
+                    port = event.port
+
+                try:
+                    test_board(writer, args.fw_ver, pool, summary, args.parallel, port)
+                except AssertionError as e:
+                    logger.error(f"Test failed: {e}")
+
+                if watcher is not None:
+                    logger.info(
+                        "Disconnect the board to test another, or press Ctrl+C to stop")
+                    try:
+                        watcher.wait_for('remove')
+                    except KeyboardInterrupt:
+                        break
+                    continue
+
+                result = input("Test another motor board? [Y/n]") or 'y'
+                if result.lower() != 'y':
+                    break
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+    for line in summary.format():
+        logger.info(line)
     logger.info(f"Test results saved to {logfile}")
 
 
@@ -182,6 +288,12 @@ def create_subparser(subparsers: argparse._SubParsersAction) -> None:
     )
 
     parser.add_argument('--log', default=None, help='A CSV file to save test results to.')
+    parser.add_argument(
+        '--hotplug', action='store_true',
+        help='Start each test when a board is connected instead of prompting.')
+    parser.add_argument(
+        '--parallel', action='store_true',
+        help='Test every connected motor board at once, instead of only the first.')
     parser.add_argument(
         '--fw-ver',
         default=None,
@@ -0,0 +1,179 @@
+"""
+Test several boards of the same type at once.
+
+Each board is tested in its own worker thread. While a worker runs, its board's
+asset tag is the current tag: log messages are prefixed with it by TagFilter, and
+operator prompts are prefixed with it by prompt.
+
+The workers take turns with the operator. A check that shows the operator something
+on the board and asks about it, such as sounding the buzzer, holds operator() from
+starting the stimulus until it has been reset, so the answer can only be about the
+board named in the question.
+
+Within unattended(), such as when benchmarking against simulated boards, prompts
+are given the default answer instead of waiting for an operator.
+
+The tag is held in a context variable, so threads started with a copy of the
+worker's context, such as the StepRunner's steps, are tagged too. The workers are
+started with a copy of the caller's context, so on a virtual clock each board's
+test starts from the caller's time.
+"""
+import contextlib
+import contextvars
+import csv
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, List, Mapping, Optional, Sequence
+
+from .hal import clock
+from .hal.discovery import Port
+from .timing import PhaseTimer
+
+logger = logging.getLogger(__name__)
+
+_tag: ContextVar[str] = ContextVar('board_tag', default='')
+# The answer given to every prompt, None to ask the operator
+_answer: ContextVar[Optional[str]] = ContextVar('operator_answer', default=None)
+# Held by the worker that has the operator's attention, re-entrant so prompt can be
+# called from within operator()
+_operator_lock = threading.RLock()
+
+
+@contextlib.contextmanager
+def tagged(tag: str) -> Iterator[None]:
+    """
+    Tag the log messages and prompts made in the body of a with block.
+
+    :param tag: The tag, usually the asset tag of the board being tested.
+    """
+    token = _tag.set(tag)
+    try:
+        yield
+    finally:
+        _tag.reset(token)
+
+
+class TagFilter(logging.Filter):
+    """Set the 'tag' attribute of log records to the current tag, for use in formats."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Tag the record, never filtering it out."""
+        tag = _tag.get()
+        record.tag = f'[{tag}] ' if tag else ''
+        return True
+
+
+@contextlib.contextmanager
+def operator() -> Iterator[None]:
+    """
+    Hold the operator's attention for the body of a with block.
+
+    Waits for any other worker's check with the operator to finish first.
+    """
+    with _operator_lock:
+        yield
+
+
+@contextlib.contextmanager
+def unattended(answer: str = '') -> Iterator[None]:
+    """
+    Answer every prompt in the body of a with block without asking the operator.
+
+    :param answer: The answer to give, defaults to an empty answer, which each
+        prompt takes as its default.
+    """
+    token = _answer.set(answer)
+    try:
+        yield
+    finally:
+        _answer.reset(token)
+
+
+def prompt(message: str) -> str:
+    """
+    Ask the operator a question, waiting for any other worker's check to finish.
+
+    :param message: The question, prefixed with the current tag if there is one.
+    :return: The operator's answer, or the given answer within unattended().
+    """
+    answer = _answer.get()
+    if answer is not None:
+        logger.debug(f"Answered {message!r} with {answer!r}")
+        return answer
+    tag = _tag.get()
+    with operator():
+        return input(f"[{tag}] {message}" if tag else message)
+
+
+class LockedDictWriter(csv.DictWriter):
+    """A CSV DictWriter that several workers can write rows to at once."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def writerow(self, rowdict: Mapping[str, Any]) -> Any:
+        """Write a row, waiting for any other worker's row to be written."""
+        with self._lock:
+            return super().writerow(rowdict)
+
+
+def port_tag(port: Port) -> str:
+    """Return the tag of a board, its asset tag or its port if it has none."""
+    return port.identity.asset_tag or port.port
+
+
+def test_ports(
+    ports: Sequence[Port],
+    timer: PhaseTimer,
+    test_port: Callable[[Port, PhaseTimer], None],
+) -> None:
+    """
+    Test a set of boards, each in its own worker if there is more than one.
+
+    Each board is timed with a copy of the timer, so the phases before the boards
+    were tested are recorded with every board.
+
+    A single board is tested directly and any error is raised. With several boards,
+    a failed test is logged with the board's tag and doesn't stop the other boards,
+    the first of any other errors is raised once every board has finished.
+
+    :param ports: The boards to test.
+    :param timer: The timer of the phases before the boards were tested.
+    :param test_port: The function that tests a board with its timer.
+    """
+    if len(ports) == 1:
+        test_port(ports[0], timer)
+        return
+
+    logger.info(f"Testing {len(ports)} boards: {', '.join(map(port_tag, ports))}")
+    # The clock time each worker finished at
+    finished: List[float] = []
+
+    def run(port: Port) -> None:
+        with tagged(port_tag(port)):
+            try:
+                test_port(port, timer.fork())
+            except AssertionError as e:
+                logger.error(f"Test failed: {e}")
+            except Exception as e:
+                # Only the first error is raised, so log them all
+                logger.error(f"Test stopped: {e!r}")
+                raise
+            finally:
+                finished.append(clock.monotonic())
+
+    errors: List[BaseException] = []
+    with ThreadPoolExecutor(max_workers=len(ports), thread_name_prefix='board') as executor:
+        futures = [
+            executor.submit(contextvars.copy_context().run, run, port) for port in ports]
+        for future in futures:
+            error = future.exception()
+            if error is not None:
+                errors.append(error)
+
+    clock.wait_until(max(finished))
+    if errors:
+        raise errors[0]
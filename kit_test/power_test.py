@@ -15,130 +15,319 @@ The test will:
 """
 import argparse
 import csv
+import functools
 import logging
-import os
+import sys
 import textwrap
-from tempfile import NamedTemporaryFile
-from time import sleep
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import serial
 
-from .hal import BRAIN_OUTPUT, POWER_VIDPID, PowerBoard, PowerOutputPosition, discover_boards
+from .fixtures import OUTPUT_RESISTANCE
+from .hal import (
+    BRAIN_OUTPUT,
+    POWER_VIDPID,
+    BoardWatcher,
+    PowerBoard,
+    PowerOutputPosition,
+    SessionPool,
+    discover_boards,
+    wait_until_settled,
+)
+from .hal.clock import sleep
+from .hal.discovery import Port
 from .hal.utils import BoardDisconnectionError
-
-OUTPUT_RESISTANCE = [
-    1.5,  # H0
-    1.5,  # H1
-    1.5,  # L0
-    5.0,  # L1
-    6.0,  # L2
-    1.5,  # L3
-    10.0,  # 5V
+from .limits import FAILURES_FIELD, Limit, LimitChecker, pass_fieldnames
+from .parallel import LockedDictWriter, operator, prompt, test_ports
+from .results_log import prepare_log
+from .steps import OPERATOR, Step, StepRunner
+from .timing import PhaseTimer, TimingSummary, timing_fieldnames
+
+# The change in current between readings that counts as settled, in amps
+SETTLE_TOLERANCE = 0.05
+
+INPUT_VOLTAGE_LIMIT = Limit.bounds('input voltage', 'V', 11.5, 12.5)
+# The resource of steps that change the load on the board or measure the battery current
+BATTERY_CURRENT = 'battery_current'
+
+# The phases of the test that are timed, the setup followed by the test steps
+PHASES = [
+    'discovery', 'connect', 'reset',
+    'buzzer', 'leds', 'start_button',
+    *(f'output_{output.name}' for output in PowerOutputPosition),
+    'cumulative_current', 'fan', 'uvlo',
 ]
 
 logger = logging.getLogger("power_test")
 
 
-def log_and_assert_bounds(
-    results: Dict[str, Any],
-    key: str,
-    value: float,
-    name: str,
-    unit: str,
-    min: float,
-    max: float,
-) -> None:
-    """Log a value and assert it is within bounds."""
-    logger.info(f"Detected {name}: {value:.3f}{unit}")
-    results[key] = value
-    center = (min + max) / 2
-    variance = (max - min) / 2
-    assert min < value < max, (
-        f"{name.capitalize()} of {value:.3f}{unit} is outside acceptable range of "
-        f"{center:.2f}±{variance:.2f}{unit}.")
-
-
-def log_and_assert(
-    results: Dict[str, Any],
-    key: str,
-    value: float,
-    name: str,
-    unit: str,
-    nominal: float,
-    tolerance: float,
-) -> None:
-    """Log a value and assert it is within bounds."""
-    logger.info(f"Detected {name}: {value:.3f}{unit}")
-    results[key] = value
-    min = nominal * (1 - tolerance)
-    max = nominal * (1 + tolerance)
-    assert min < value < max, (
-        f"{name.capitalize()} of {value:.3f}{unit} is outside acceptable range of "
-        f"{nominal:.2f}±{tolerance:.0%}.")
+def power_limits(input_voltage: float) -> Dict[str, Limit]:
+    """The limits of the power board measurements, for the measured input voltage."""
+    limits = {
+        'reg_off_current': Limit.bounds('regulator off state current', 'A', -0.2, 0.2),
+        'reg_volt': Limit.bounds('regulator voltage', 'V', 4.5, 5.5),
+    }
+    for output in PowerOutputPosition:
+        if output == PowerOutputPosition.FIVE_VOLT:
+            continue
+        expected_out_current = input_voltage / OUTPUT_RESISTANCE[output]
+        limits[f'out_{output.name}_off_current'] = Limit.bounds(
+            f'output {output.name} off state current', 'A', -0.2, 0.2)
+        limits[f'out_{output.name}_current'] = Limit.nominal(
+            f'output {output.name} current', 'A', expected_out_current, 0.25)
+        limits[f'out_{output.name}_global_current'] = Limit.nominal(
+            'global output current', 'A', expected_out_current, 0.15)
+
+    total_expected_current = 0.0
+    for output in PowerOutputPosition:
+        if output == BRAIN_OUTPUT:
+            continue
+        total_expected_current += input_voltage / OUTPUT_RESISTANCE[output]
+        limits[f'sum_out_{output.name}_current'] = Limit.nominal(
+            f'output current up to {output.name}', 'A', total_expected_current, 0.2)
+    return limits
 
 
 def test_output(
     board: PowerBoard,
-    results: Dict,
+    limits: LimitChecker,
     output: PowerOutputPosition,
-    input_voltage: float,
 ) -> None:
     """Test a single output on the power board."""
     if output == PowerOutputPosition.FIVE_VOLT:
-        test_regulator(board, results)
+        test_regulator(board, limits)
         return
 
-    log_and_assert_bounds(  # test off current
-        results, f'out_{output.name}_off_current', board.outputs[output].current(),
-        f'output {output.name} off state current', 'A', -0.2, 0.2)
+    # test off current
+    limits.check(f'out_{output.name}_off_current', board.outputs[output].current())
 
     # enable output
     board.outputs[output].enable(True)
-    sleep(0.5)
+    wait_until_settled(board.outputs[output].current, SETTLE_TOLERANCE)
 
-    expected_out_current = input_voltage / OUTPUT_RESISTANCE[output]
-    log_and_assert(  # test output current
-        results, f'out_{output.name}_current', board.outputs[output].current(),
-        f'output {output.name} current', 'A', expected_out_current, 0.25)
-    log_and_assert(  # test global current
-        results, f'out_{output.name}_global_current', board.battery_sensor.current(),
-        'global output current', 'A', expected_out_current, 0.15)
+    # Read the output and global currents in a single exchange
+    snapshot = board.snapshot()
+    # test output current
+    limits.check(f'out_{output.name}_current', snapshot.output_currents[output])
+    # test global current
+    limits.check(f'out_{output.name}_global_current', snapshot.battery_current)
 
     # disable output
     board.outputs[output].enable(False)
-    sleep(0.5)
+    wait_until_settled(board.outputs[output].current, SETTLE_TOLERANCE)
 
 
-def test_regulator(board: PowerBoard, results: Dict) -> None:
+def test_regulator(board: PowerBoard, limits: LimitChecker) -> None:
     """Test the 5V regulator on the power board."""
     # test off current
-    log_and_assert_bounds(
-        results, 'reg_off_current', board.outputs[PowerOutputPosition.FIVE_VOLT].current(),
-        'regulator off state current', 'A', -0.2, 0.2)
+    limits.check('reg_off_current', board.outputs[PowerOutputPosition.FIVE_VOLT].current())
 
     # enable output
     board.outputs[PowerOutputPosition.FIVE_VOLT].enable(True)
-    sleep(0.5)
+    wait_until_settled(board.outputs[PowerOutputPosition.FIVE_VOLT].current, SETTLE_TOLERANCE)
 
     reg_voltage = board.status().regulator_voltage
-    log_and_assert_bounds(
-        results, 'reg_volt', reg_voltage, 'regulator voltage', 'V', 4.5, 5.5)
+    limits.check('reg_volt', reg_voltage)
 
+    # The expected current depends on the measured regulator voltage
     expected_reg_current = reg_voltage / OUTPUT_RESISTANCE[PowerOutputPosition.FIVE_VOLT]
-    log_and_assert(
-        results, 'reg_current', board.outputs[PowerOutputPosition.FIVE_VOLT].current(),
-        'regulator current', 'A', expected_reg_current, 0.25)
+    limits.check(
+        'reg_current', board.outputs[PowerOutputPosition.FIVE_VOLT].current(),
+        Limit.nominal('regulator current', 'A', expected_reg_current, 0.25))
 
     # disable output
     board.outputs[PowerOutputPosition.FIVE_VOLT].enable(False)
-    sleep(0.5)
+    wait_until_settled(board.outputs[PowerOutputPosition.FIVE_VOLT].current, SETTLE_TOLERANCE)
+
+
+def test_fan(board: PowerBoard, limits: LimitChecker) -> None:
+    """Ask the operator to check the fan runs."""
+    with operator():
+        # force the fan to run
+        board.enable_fan(True)
+        fan_result = prompt("Is the fan running? [Y/n]") or 'y'  # default to yes
+        board.enable_fan(False)
+    limits.results['fan'] = fan_result
+    limits.require('fan', fan_result.lower() == 'y', "Reported that the fan didn't work.")
+
+
+def test_buzzer(board: PowerBoard, limits: LimitChecker) -> None:
+    """Ask the operator to check the buzzer buzzes."""
+    with operator():
+        board.piezo.buzz(1000, 0.5)
+        buzz_result = prompt("Did the buzzer buzz? [Y/n]") or 'y'  # default to yes
+    limits.results['buzzer'] = buzz_result
+    limits.require(
+        'buzzer', buzz_result.lower() == 'y', "Reported that the buzzer didn't buzz.")
+
+
+def test_leds(board: PowerBoard, limits: LimitChecker) -> None:
+    """Ask the operator to check the LEDs flash."""
+    with operator():
+        board.run_led.flash()
+        board.error_led.flash()
+        led_result = prompt("Are the LEDs flashing? [Y/n]") or 'y'  # default to yes
+        board.run_led.off()
+        board.error_led.off()
+    limits.results['leds'] = led_result
+    limits.require(
+        'leds', led_result.lower() == 'y', "Reported that the LEDs didn't work.")
+
+
+def test_start_button(board: PowerBoard, results: Dict[str, Any]) -> None:
+    """Wait for the operator to press the start button."""
+    with operator():
+        board.start_button()
+        logger.info("Please press the start button")
+        while not board.start_button():
+            sleep(0.1)
+    results['start_btn'] = "y"
+
+
+def test_cumulative_current(
+    board: PowerBoard,
+    limits: LimitChecker,
+    input_voltage: float,
+) -> None:
+    """Test the global current as each output is enabled in turn."""
+    total_expected_current = 0.0
+    for output in PowerOutputPosition:
+        if output == BRAIN_OUTPUT:
+            continue
+        total_expected_current += input_voltage / OUTPUT_RESISTANCE[output]
+        if total_expected_current > 25.0:
+            # stop before we hit the current limit
+            break
+
+        board.outputs[output].enable(True)
+        total_current = wait_until_settled(board.battery_sensor.current, SETTLE_TOLERANCE)
+        limits.check(f'sum_out_{output.name}_current', total_current)
+
+    # disable all outputs
+    for output in PowerOutputPosition:
+        board.outputs[output].enable(False)
+
+
+def test_uvlo(board: PowerBoard, results: Dict[str, Any]) -> None:
+    """Test the software and hardware undervoltage lockouts using the bench PSU."""
+    try:
+        psu = serial.serial_for_url('hwgrep://0416:5011')
+    except serial.SerialException:
+        assert False, "Failed to connect to PSU. Is it connected?"
+    psu.write(b'VSET1:11.5\n')
+    # Enable output
+    psu.write(b'OUT1\n')
+    # start at 11.5V and drop to 10V
+    for voltx10 in range(115, 100, -1):
+        psu.write(f'VSET1:{voltx10 / 10}\n'.encode('ascii'))
+        sleep(0.1)
+        # stop when serial is lost
+        try:
+            meas_voltage = board.battery_sensor.voltage()
+            logger.info(f"Measured voltage: {meas_voltage}V for {voltx10 / 10}V")
+        except BoardDisconnectionError:
+            logger.info(f"Software UVLO triggered at {voltx10 / 10}V")
+            results['soft_uvlo'] = voltx10 / 10
+            break
+    else:
+        assert False, "Software UVLO didn't function at 10V."
+
+    # set to 9.5V and ask if leds are off
+    psu.write(b'VSET1:9.5\n')
+    sleep(0.1)
+    # default to yes
+    hard_uvlo_result = prompt("Have all the LEDs turned off? [Y/n]") or 'y'
+    results['hard_uvlo'] = hard_uvlo_result
+    assert hard_uvlo_result.lower() == 'y', \
+        "Reported that hardware UVLO didn't function."
+
+    # set to 10.9V-11.3V and check if serial is back
+    for voltx10 in range(109, 114):
+        psu.write(f'VSET1:{voltx10 / 10}\n'.encode('ascii'))
+        sleep(2)
+        # stop when serial is back
+        try:
+            meas_voltage = board.battery_sensor.voltage()
+            logger.info(f"Measured voltage: {meas_voltage}V for {voltx10 / 10}V")
+        except BoardDisconnectionError:
+            pass
+        else:
+            logger.info(f"Hardware UVLO cleared at {voltx10 / 10}V")
+            results['hard_uvlo_hyst'] = voltx10 / 10
+            break
+    else:
+        assert False, "Hardware UVLO didn't clear at 11.3V."
+
+    # Disable output
+    psu.write(b'OUT0\n')
+
+
+def power_steps(
+    board: PowerBoard,
+    limits: LimitChecker,
+    input_voltage: float,
+    uvlo: bool,
+) -> List[Step]:
+    """
+    The steps of the power board test, after the board has been identified.
+
+    Every step that changes the load on the board, or measures the battery current,
+    uses the battery current, so the electrical checks run one at a time
+    while the operator checks the buzzer, LEDs and start button.
+
+    :param board: The power board to test.
+    :param limits: The checker the measurements are saved and checked with.
+    :param input_voltage: The measured input voltage, used to calculate the expected currents.
+    :param uvlo: Whether to include the under-voltage lockout test.
+    :return: The steps, in order of priority.
+    """
+    output_steps = [
+        Step(
+            f'output_{output.name}',
+            functools.partial(test_output, board, limits, output),
+            resources=[f'output:{output.name}', BATTERY_CURRENT],
+        )
+        for output in PowerOutputPosition
+    ]
+    all_outputs = [f'output:{output.name}' for output in PowerOutputPosition]
+    steps = [
+        Step(
+            'buzzer', functools.partial(test_buzzer, board, limits),
+            resources=[OPERATOR, 'buzzer']),
+        Step(
+            'leds', functools.partial(test_leds, board, limits),
+            resources=[OPERATOR, 'leds']),
+        Step(
+            'start_button', functools.partial(test_start_button, board, limits.results),
+            resources=[OPERATOR, 'start_button']),
+        *output_steps,
+        Step(
+            'cumulative_current',
+            functools.partial(test_cumulative_current, board, limits, input_voltage),
+            resources=[BATTERY_CURRENT, *all_outputs],
+            after=[step.name for step in output_steps]),
+        # The fan draws current from the battery so would disturb the current checks
+        Step(
+            'fan', functools.partial(test_fan, board, limits),
+            resources=[OPERATOR, 'fan', BATTERY_CURRENT]),
+    ]
+    if uvlo:
+        # The UVLO test disconnects the board, so must run after everything else
+        steps.append(Step(
+            'uvlo', functools.partial(test_uvlo, board, limits.results),
+            resources=[OPERATOR, BATTERY_CURRENT, *all_outputs],
+            after=[step.name for step in steps]))
+    return steps
 
 
 def test_board(
     output_writer: csv.DictWriter,
     test_uvlo: bool,
     fw_ver: Optional[str] = None,
+    pool: Optional[SessionPool] = None,
+    summary: Optional[TimingSummary] = None,
+    parallel: bool = False,
+    port: Optional[Port] = None,
 ) -> None:
     """
     Test the power board.
@@ -149,18 +338,64 @@ def test_board(
     - Detect the start button being pressed
     - Test the current draw on each output with and without the output enabled
     - Test the global current with multiple outputs enabled
+
+    With parallel, every connected power board is tested at once,
+    otherwise only the first board found is tested. If a port is given, such as
+    a board that has just been connected, only that board is tested.
     """
-    results: Dict[str, Any] = {}
+    timer = PhaseTimer()
 
-    ports = discover_boards(POWER_VIDPID)
+    with timer.phase('discovery'):
+        ports = [port] if port is not None else discover_boards(POWER_VIDPID)
     if len(ports) == 0:
         logger.error("No power boards found.")
         return
+    if pool is not None:
+        with timer.phase('connect'):
+            pool.prune(ports)
+
+    test_ports(
+        ports if parallel else ports[:1], timer,
+        lambda port, board_timer: test_port(
+            port, output_writer, test_uvlo, fw_ver, pool, summary, board_timer),
+    )
+
 
-    board = PowerBoard(ports[0].port, ports[0].identity)
+def test_port(
+    port: Port,
+    output_writer: csv.DictWriter,
+    test_uvlo: bool,
+    fw_ver: Optional[str] = None,
+    pool: Optional[SessionPool] = None,
+    summary: Optional[TimingSummary] = None,
+    timer: Optional[PhaseTimer] = None,
+) -> None:
+    """
+    Test the power board on a port.
+
+    :param port: The discovered port of the board.
+    :param output_writer: The writer the results are saved with.
+    :param test_uvlo: Whether to test the UVLO circuit.
+    :param fw_ver: The expected firmware version of the board.
+    :param pool: The pool to reuse the board's connection from.
+    :param summary: The summary to add the test's timings to.
+    :param timer: The timer of the test so far.
+    """
+    results: Dict[str, Any] = {}
+    if timer is None:
+        timer = PhaseTimer()
+
+    with timer.phase('connect'):
+        if pool is not None:
+            # Reuse the connection if this board is still connected from a previous test
+            board = pool.board(PowerBoard, port, shadow_cache=True)
+        else:
+            board = PowerBoard(port.port, port.identity, shadow_cache=True)
+    limits = LimitChecker(results, {'input_volt': INPUT_VOLTAGE_LIMIT})
     try:
         results['passed'] = False  # default to failure
-        board_identity = board.identify()
+        # Identified when the board was connected
+        board_identity = board.identity
 
         results['asset'] = board_identity.asset_tag
         results['sw_version'] = board_identity.sw_version
@@ -171,135 +406,49 @@ def test_board(
             assert board_identity.sw_version == fw_ver, \
                 f"Expected firmware version {fw_ver}, got {board_identity.sw_version} instead."
 
-        board.reset()
-        sleep(0.5)
+        with timer.phase('reset'):
+            board.reset()
+            sleep(0.5)
 
         # expected currents are calculated using this voltage
         input_voltage = board.battery_sensor.voltage()
-        log_and_assert_bounds(
-            results, 'input_volt', input_voltage, 'input voltage', 'V', 11.5, 12.5)
-
-        # fan
-        # force the fan to run
-        board.enable_fan(True)
-        fan_result = input("Is the fan running? [Y/n]") or 'y'  # default to yes
-        results['fan'] = fan_result
-        assert fan_result.lower() == 'y', "Reported that the fan didn't work."
-        board.enable_fan(False)
-
-        # buzzer
-        board.piezo.buzz(1000, 0.5)
-        buzz_result = input("Did the buzzer buzz? [Y/n]") or 'y'  # default to yes
-        results['buzzer'] = buzz_result
-        assert buzz_result.lower() == 'y', "Reported that the buzzer didn't buzz."
-
-        # leds
-        board.run_led.flash()
-        board.error_led.flash()
-        led_result = input("Are the LEDs flashing? [Y/n]") or 'y'  # default to yes
-        results['leds'] = led_result
-        assert led_result.lower() == 'y', "Reported that the LEDs didn't work."
-
-        board.run_led.off()
-        board.error_led.off()
-
-        # start button
-        board.start_button()
-        logger.info("Please press the start button")
-        while not board.start_button():
-            sleep(0.1)
-        results['start_btn'] = "y"
-
-        for output in PowerOutputPosition:
-            test_output(board, results, output, input_voltage)
-
-        total_expected_current = 0.0
-        for output in PowerOutputPosition:
-            if output == BRAIN_OUTPUT:
-                continue
-            total_expected_current += input_voltage / OUTPUT_RESISTANCE[output]
-            if total_expected_current > 25.0:
-                # stop before we hit the current limit
-                break
-
-            board.outputs[output].enable(True)
-            sleep(0.5)
-            log_and_assert(
-                results, f'sum_out_{output.name}_current', board.battery_sensor.current(),
-                f'output current up to {output.name}', 'A', total_expected_current, 0.2)
-            sleep(0.5)
+        limits.check('input_volt', input_voltage)
+        # The other checks are meaningless with the supply out of range
+        limits.assert_passed()
+        limits.limits.update(power_limits(input_voltage))
 
-        # disable all outputs
-        for output in PowerOutputPosition:
-            board.outputs[output].enable(False)
-
-        if test_uvlo:
-            try:
-                psu = serial.serial_for_url('hwgrep://0416:5011')
-            except serial.SerialException:
-                assert False, "Failed to connect to PSU. Is it connected?"
-            psu.write(b'VSET1:11.5\n')
-            # Enable output
-            psu.write(b'OUT1\n')
-            # start at 11.5V and drop to 10V
-            for voltx10 in range(115, 100, -1):
-                psu.write(f'VSET1:{voltx10 / 10}\n'.encode('ascii'))
-                sleep(0.1)
-                # stop when serial is lost
-                try:
-                    meas_voltage = board.battery_sensor.voltage()
-                    logger.info(f"Measured voltage: {meas_voltage}V for {voltx10 / 10}V")
-                except BoardDisconnectionError:
-                    logger.info(f"Software UVLO triggered at {voltx10 / 10}V")
-                    results['soft_uvlo'] = voltx10 / 10
-                    break
-            else:
-                assert False, "Software UVLO didn't function at 10V."
-
-            # set to 9.5V and ask if leds are off
-            psu.write(b'VSET1:9.5\n')
-            sleep(0.1)
-            # default to yes
-            hard_uvlo_result = input("Have all the LEDs turned off? [Y/n]") or 'y'
-            results['hard_uvlo'] = hard_uvlo_result
-            assert hard_uvlo_result.lower() == 'y', \
-                "Reported that hardware UVLO didn't function."
-
-            # set to 10.9V-11.3V and check if serial is back
-            for voltx10 in range(109, 114):
-                psu.write(f'VSET1:{voltx10 / 10}\n'.encode('ascii'))
-                sleep(2)
-                # stop when serial is back
-                try:
-                    meas_voltage = board.battery_sensor.voltage()
-                    logger.info(f"Measured voltage: {meas_voltage}V for {voltx10 / 10}V")
-                except BoardDisconnectionError:
-                    pass
-                else:
-                    logger.info(f"Hardware UVLO cleared at {voltx10 / 10}V")
-                    results['hard_uvlo_hyst'] = voltx10 / 10
-                    break
-            else:
-                assert False, "Hardware UVLO didn't clear at 11.3V."
-
-            # Disable output
-            psu.write(b'OUT0\n')
+        timer.run_steps(StepRunner(power_steps(board, limits, input_voltage, test_uvlo)))
 
+        # Fail the board now all the measurements have been taken
+        limits.assert_passed()
         logger.info("Board passed")
         results['passed'] = True
+    except (AssertionError, BoardDisconnectionError) as e:
+        # Save the serial history leading up to the failure
+        if board.flight_recorder is not None:
+            board.flight_recorder.dump(e)
+        raise
     finally:
+        timer.save(results)
+        if summary is not None:
+            summary.add(timer)
         output_writer.writerow(results)
 
         # Disable all outputs
         board.reset()
-        board.close()
+        if pool is None:
+            board.close()
 
 
 def main(args: argparse.Namespace) -> None:
     """Main function for the power board test."""
-    new_log = True
+    if args.parallel and args.test_uvlo:
+        # There is only one bench PSU to drop the boards' supply with
+        logger.error("The UVLO test can't be run on several boards at once.")
+        sys.exit(1)
+
     fieldnames = [
-        'asset', 'sw_version', 'passed', 'input_volt',
+        'asset', 'sw_version', 'passed', FAILURES_FIELD, 'input_volt',
         'reg_volt', 'reg_current', 'reg_off_current',
         'out_H0_off_current', 'out_H0_current', 'out_H0_global_current',
         'out_H1_off_current', 'out_H1_current', 'out_H1_global_current',
@@ -311,30 +460,70 @@ def main(args: argparse.Namespace) -> None:
         'sum_out_L1_current', 'sum_out_L2_current', 'sum_out_L3_current',
         'sum_out_FIVE_VOLT_current',
         'fan', 'leds', 'buzzer', 'start_btn',
-        'soft_uvlo', 'hard_uvlo', 'hard_uvlo_hyst']
+        'soft_uvlo', 'hard_uvlo', 'hard_uvlo_hyst',
+    ] + pass_fieldnames([
+        'input_volt', 'reg_volt', 'reg_current', 'reg_off_current',
+        *(
+            f'out_{output.name}_{check}'
+            for output in PowerOutputPosition
+            if output != PowerOutputPosition.FIVE_VOLT
+            for check in ('off_current', 'current', 'global_current')
+        ),
+        *(
+            f'sum_out_{output.name}_current'
+            for output in PowerOutputPosition
+            if output != BRAIN_OUTPUT
+        ),
+        'fan', 'leds', 'buzzer',
+    ]) + timing_fieldnames(PHASES)
 
-    if args.log:
-        logfile = args.log
-        if os.path.exists(logfile):
-            new_log = False
-    else:
-        logfile = NamedTemporaryFile(delete=False).name
+    logfile, new_log = prepare_log(args.log, fieldnames)
 
-    with open(logfile, 'a', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    summary = TimingSummary()
+    with open(logfile, 'a', newline='') as csvfile, SessionPool() as pool:
+        writer = LockedDictWriter(csvfile, fieldnames=fieldnames)
         if new_log:
             writer.writeheader()
 
-        while True:
-            try:
-                test_board(writer, args.test_uvlo, args.fw_ver)
-            except AssertionError as e:
-                logger.error(f"Test failed: {e}")
+        watcher = BoardWatcher(POWER_VIDPID) if args.hotplug else None
+        try:
+            while True:
+                port = None
+                if watcher is not None:
+                    logger.info("Connect a power board to test it, or press Ctrl+C to stop")
+                    try:
+                        event = watcher.wait_for('add')
+                    except KeyboardInterrupt:
+                        break
+                    # Without a timeout, wait_for only returns once a board is added
+                    assert event is not None
+                    port = event.port
 
-            result = input("Test another power board? [Y/n]") or 'y'
-            if result.lower() != 'y':
-                break
+                try:
+                    test_board(
+                        writer, args.test_uvlo, args.fw_ver, pool, summary, args.parallel,
+                        port)
+                except AssertionError as e:
+                    logger.error(f"Test failed: {e}")
+
+                if watcher is not None:
+                    logger.info(
+                        "Disconnect the board to test another, or press Ctrl+C to stop")
+                    try:
+                        watcher.wait_for('remove')
+                    except KeyboardInterrupt:
+                        break
+                    continue
+
+                result = input("Test another power board? [Y/n]") or 'y'
+                if result.lower() != 'y':
+                    break
+        finally:
+            if watcher is not None:
+                watcher.close()
 
+    for line in summary.format():
+        logger.info(line)
     logger.info(f"Test results saved to {logfile}")
 
 
@@ -350,7 +539,13 @@ def create_subparser(subparsers: argparse._SubParsersAction) -> None:
     )
 
     parser.add_argument('--log', default=None, help='A CSV file to save test results to.')
+    parser.add_argument(
+        '--hotplug', action='store_true',
+        help='Start each test when a board is connected instead of prompting.')
     parser.add_argument('--test-uvlo', action='store_true', help='Test the UVLO circuit.')
+    parser.add_argument(
+        '--parallel', action='store_true',
+        help='Test every connected power board at once, instead of only the first.')
     parser.add_argument(
         '--fw-ver',
         default=None,
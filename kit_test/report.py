@@ -0,0 +1,402 @@
+"""
+Station throughput report.
+
+Summarise one or more result CSVs written with --log by the power_v4, motor_v4,
+servo_v4, arduino and camera tests. The report covers:
+- the number of tests and boards tested
+- boards tested per hour
+- first-pass yield, the fraction of boards that passed their first test
+- the number of retests per board
+- the fields that failed most often
+- the distribution of each measurement field
+
+Boards are identified by their asset code, or by their serial number when the
+asset code wasn't collected. The rows of each file are taken to be in the order
+they were tested, so files should be given oldest first.
+
+Boards per hour is calculated from the 'started_at' column, counting the time
+between tests as idle once it is longer than --session-gap. Older logs without
+start times only report the throughput of the time spent testing, from their
+'time_total' column, if present.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import logging
+import textwrap
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Set
+
+import numpy as np
+import numpy.typing as npt
+
+from .limits import FAILURES_FIELD
+from .timing import STARTED_FIELD, TIMING_PREFIX, TOTAL_PHASE
+
+logger = logging.getLogger("report")
+
+# The number of rows converted to arrays at once while reading a file
+CHUNK_ROWS = 50_000
+# Fields that identify a board or its outcome rather than being measurements
+NON_MEASUREMENT_FIELDS = {
+    'asset', 'serial', 'sw_version', 'passed', FAILURES_FIELD, STARTED_FIELD,
+}
+TOTAL_FIELD = f'{TIMING_PREFIX}{TOTAL_PHASE}'
+
+StrArray = npt.NDArray[np.str_]
+FloatArray = npt.NDArray[np.float64]
+
+
+class ResultTable:
+    """
+    The rows of a set of result CSVs, reduced to what the report uses.
+
+    The fields that identify a board or its outcome are kept as strings and the
+    measurement fields as numbers, with empty values as NaN. A measurement field
+    with any value that isn't a number isn't kept, its name is added to non_numeric.
+
+    Files with different columns are combined, rows are empty in the
+    columns their file doesn't have.
+
+    :param text: The values of each identifying field.
+    :param numbers: The values of each numeric measurement field.
+    :param non_numeric: The measurement fields that weren't numbers.
+    :param num_rows: The number of rows.
+    """
+
+    def __init__(
+        self,
+        text: Dict[str, StrArray],
+        numbers: Dict[str, FloatArray],
+        non_numeric: Set[str],
+        num_rows: int,
+    ) -> None:
+        self.text = text
+        self.numbers = numbers
+        self.non_numeric = non_numeric
+        self.num_rows = num_rows
+
+    @classmethod
+    def read(cls, paths: Sequence[Path]) -> 'ResultTable':
+        """
+        Read a set of result CSVs.
+
+        Each chunk of rows is reduced as it is read, so only the identifying fields
+        are held as strings.
+
+        :param paths: The CSV files to read.
+        :return: The rows of every file, in order.
+        """
+        chunks: List[_Chunk] = []
+        non_numeric: Set[str] = set()
+        for path in paths:
+            num_rows = 0
+            for chunk in _read_chunks(path):
+                chunks.append(_reduce_chunk(chunk, non_numeric))
+                num_rows += chunks[-1].num_rows
+            logger.info(f"Read {num_rows} rows from {path}")
+
+        text = {
+            field: np.concatenate([
+                chunk.text.get(field, np.full(chunk.num_rows, '')) for chunk in chunks])
+            for field in dict.fromkeys(field for chunk in chunks for field in chunk.text)
+        }
+        numbers = {
+            field: np.concatenate([
+                chunk.numbers.get(field, np.full(chunk.num_rows, np.nan))
+                for chunk in chunks])
+            for field in dict.fromkeys(field for chunk in chunks for field in chunk.numbers)
+            if field not in non_numeric
+        }
+        return cls(text, numbers, non_numeric, sum(chunk.num_rows for chunk in chunks))
+
+    def column(self, field: str) -> StrArray:
+        """Return an identifying field, or an empty column if none of the files have it."""
+        return self.text.get(field, np.full(self.num_rows, ''))
+
+    def numeric(self, field: str) -> Optional[FloatArray]:
+        """
+        Return a measurement field, with empty values as NaN.
+
+        :param field: The field to return.
+        :return: The values, all NaN if none of the files have the field,
+            or None if the field contains values that aren't numbers.
+        """
+        if field in self.non_numeric or field in self.text:
+            return None
+        values = self.numbers.get(field)
+        if values is None:
+            return np.full(self.num_rows, np.nan, dtype=np.float64)
+        return values
+
+    def board_keys(self) -> StrArray:
+        """Return the asset code of each row, or its serial number if it has no asset code."""
+        assets = self.column('asset')
+        return np.where(assets != '', assets, self.column('serial'))
+
+
+class _Chunk(NamedTuple):
+    """A chunk of rows from a CSV, reduced to what the report uses."""
+
+    num_rows: int
+    text: Dict[str, StrArray]
+    numbers: Dict[str, FloatArray]
+
+
+def _read_chunks(path: Path) -> Iterator[Dict[str, StrArray]]:
+    """
+    Read the rows of a CSV as arrays of each column, CHUNK_ROWS rows at a time.
+
+    Rows that don't have the same number of values as the header are skipped,
+    since there is no way to tell which column each value belongs to.
+    """
+    skipped = 0
+    with open(path, newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        fieldnames = next(reader, None)
+        if fieldnames is None:
+            return
+        while True:
+            rows = list(itertools.islice(reader, CHUNK_ROWS))
+            if not rows:
+                break
+            complete = [row for row in rows if len(row) == len(fieldnames)]
+            skipped += len(rows) - len(complete)
+            if not complete:
+                continue
+            yield {
+                field: np.array(values, dtype=np.str_)
+                for field, values in zip(fieldnames, zip(*complete))
+            }
+    if skipped:
+        logger.warning(
+            f"Skipped {skipped} rows of {path} that don't have the same number of "
+            "columns as its header, it may have been appended to by a different "
+            "version of the test")
+
+
+def _reduce_chunk(chunk: Dict[str, StrArray], non_numeric: Set[str]) -> _Chunk:
+    """
+    Keep the identifying fields of a chunk as strings and convert the rest to numbers.
+
+    :param chunk: The values of each column of the chunk.
+    :param non_numeric: The measurement fields found not to be numbers so far,
+        updated with any found in this chunk.
+    :return: The reduced chunk.
+    """
+    text = {}
+    numbers = {}
+    for field, values in chunk.items():
+        if field in NON_MEASUREMENT_FIELDS:
+            text[field] = values
+        elif field not in non_numeric:
+            try:
+                numbers[field] = np.where(values == '', 'nan', values).astype(np.float64)
+            except ValueError:
+                non_numeric.add(field)
+    return _Chunk(len(next(iter(chunk.values()))), text, numbers)
+
+
+def boards_per_hour(
+    started: npt.NDArray[np.datetime64],
+    durations: FloatArray,
+    session_gap: float,
+) -> Optional[float]:
+    """
+    Calculate the number of boards tested per hour the station was in use.
+
+    The station is counted as in use from the start of each test until the start of
+    the next, unless the gap is longer than session_gap, when it is counted as in use
+    until the end of the test instead.
+
+    :param started: The start time of each test, NaT if unknown.
+    :param durations: The duration of each test in seconds, NaN if unknown.
+    :param session_gap: The time between tests that counts as idle, in seconds.
+    :return: The boards per hour, or None if no tests have a start time.
+    """
+    known = ~np.isnat(started)
+    if not np.any(known):
+        return None
+    order = np.argsort(started[known], kind='stable')
+    starts = started[known][order].astype('datetime64[s]').astype(np.float64)
+    test_times = np.nan_to_num(durations[known][order])
+
+    gaps = np.diff(starts)
+    # Count the last test of each session until it finished
+    in_use = np.where(gaps > session_gap, test_times[:-1], gaps).sum() + test_times[-1]
+    if in_use <= 0:
+        return None
+    return float(len(starts) / in_use * 3600)
+
+
+def describe(values: FloatArray) -> Optional[Dict[str, float]]:
+    """
+    Describe the distribution of a measurement.
+
+    :param values: The measured values, NaN where not measured.
+    :return: The count, mean, standard deviation, minimum, 5th, 50th and 95th
+        percentiles and maximum, or None if there are no values.
+    """
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return None
+    p5, p50, p95 = np.percentile(values, [5, 50, 95])
+    return {
+        'count': len(values),
+        'mean': float(np.mean(values)),
+        'std': float(np.std(values)),
+        'min': float(np.min(values)),
+        'p5': float(p5),
+        'p50': float(p50),
+        'p95': float(p95),
+        'max': float(np.max(values)),
+    }
+
+
+def report(
+    table: ResultTable,
+    fields: Optional[Sequence[str]] = None,
+    session_gap: float = 1800,
+    top: int = 10,
+) -> List[str]:
+    """
+    Generate the report of a set of results.
+
+    :param table: The results to report on.
+    :param fields: The fields to describe the distribution of, defaults to
+        every numeric field.
+    :param session_gap: The time between tests that counts as idle, in seconds.
+    :param top: The number of boards and failures to list.
+    :return: The lines of the report.
+    """
+    if table.num_rows == 0:
+        return ["No results"]
+
+    passed = table.column('passed') == 'True'
+    keys = table.board_keys()
+    identified = keys != ''
+    board_keys = keys[identified]
+    board_passed = passed[identified]
+
+    # The rows are in the order tested, so the first occurrence is the first test
+    boards, first_index, inverse, counts = np.unique(
+        board_keys, return_index=True, return_inverse=True, return_counts=True)
+    last_index = np.zeros(len(boards), dtype=np.intp)
+    last_index[inverse] = np.arange(len(board_keys))
+
+    lines = [
+        f"Tests: {table.num_rows}, passed: {np.count_nonzero(passed)} "
+        f"({np.mean(passed):.1%})",
+        f"Boards: {len(boards)}"
+        + (f", {np.count_nonzero(~identified)} tests without an asset or serial"
+           if not np.all(identified) else ''),
+    ]
+
+    if len(boards):
+        lines.append(
+            f"First-pass yield: {np.mean(board_passed[first_index]):.1%}, "
+            f"final yield: {np.mean(board_passed[last_index]):.1%}")
+        retests = counts - 1
+        lines.append(
+            f"Retests: {retests.sum()}, {np.count_nonzero(retests)} boards retested, "
+            f"mean {retests.mean():.2f} per board, max {retests.max()}")
+        most_retested = np.argsort(-retests, kind='stable')[:top]
+        most_retested = most_retested[retests[most_retested] > 0]
+        if len(most_retested):
+            lines.append("Most retested boards:")
+            for index in most_retested:
+                lines.append(
+                    f"  {boards[index]:<20} {retests[index]:>5} retests, "
+                    f"{'passed' if board_passed[last_index[index]] else 'failed'}")
+
+    durations = table.numeric(TOTAL_FIELD)
+    if durations is None:
+        durations = np.full(table.num_rows, np.nan)
+    started = np.array(table.column(STARTED_FIELD), dtype='datetime64[s]')
+    rate = boards_per_hour(started, durations, session_gap)
+    if rate is not None:
+        lines.append(f"Boards per hour: {rate:.1f}")
+    timed = durations[~np.isnan(durations)]
+    if len(timed) and timed.sum() > 0:
+        lines.append(
+            f"Boards per hour of testing: {len(timed) / timed.sum() * 3600:.1f}, "
+            f"mean test time {timed.mean():.1f}s")
+
+    failures = table.column(FAILURES_FIELD)
+    failures = failures[failures != '']
+    if len(failures):
+        # Count the distinct sets of failures, then the fields within them
+        failure_sets, set_counts = np.unique(failures, return_counts=True)
+        field_counts: Dict[str, int] = {}
+        for failure_set, count in zip(failure_sets, set_counts):
+            for field in failure_set.split(';'):
+                field_counts[field] = field_counts.get(field, 0) + int(count)
+        lines.append("Most common failures:")
+        for field, count in sorted(
+                field_counts.items(), key=lambda item: -item[1])[:top]:
+            lines.append(f"  {field:<30} {count:>6}")
+
+    requested = fields is not None
+    if fields is None:
+        fields = list(table.numbers)
+    distributions = []
+    for field in fields:
+        values = table.numeric(field)
+        if values is None:
+            # Only warn about fields the operator asked for, not yes/no answers
+            if requested:
+                logger.warning(f"Field {field} is not numeric, skipping it")
+            continue
+        stats = describe(values)
+        if stats is not None:
+            distributions.append((field, stats))
+        elif field not in table.numbers:
+            logger.warning(f"No results have the field {field}")
+
+    if distributions:
+        lines.append("Field distributions:")
+        lines.append(
+            f"  {'field':<30} {'count':>7} {'mean':>9} {'std':>9} {'min':>9} "
+            f"{'p5':>9} {'p50':>9} {'p95':>9} {'max':>9}")
+        for field, stats in distributions:
+            lines.append(
+                f"  {field:<30} {stats['count']:>7} " + ' '.join(
+                    f"{stats[stat]:>9.3f}"
+                    for stat in ('mean', 'std', 'min', 'p5', 'p50', 'p95', 'max')))
+    return lines
+
+
+def main(args: argparse.Namespace) -> None:
+    """Main function for the throughput report."""
+    table = ResultTable.read(args.csv)
+    for line in report(table, args.field, args.session_gap * 60, args.top):
+        logger.info(line)
+
+
+def create_subparser(subparsers: argparse._SubParsersAction) -> None:
+    """Report command parser."""
+    parser = subparsers.add_parser(
+        "report",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=textwrap.dedent(__doc__),
+        help="Summarise the throughput, yield and measurements of test result CSVs.",
+    )
+
+    parser.add_argument(
+        'csv', type=Path, nargs='+',
+        help='The result CSVs to report on, oldest first.')
+    parser.add_argument(
+        '--field', action='append', default=None,
+        help=(
+            'A field to report the distribution of, can be given multiple times. '
+            'Defaults to every numeric field.'))
+    parser.add_argument(
+        '--session-gap', type=float, default=30,
+        help='The time between tests that counts as idle, in minutes. Defaults to 30.')
+    parser.add_argument(
+        '--top', type=int, default=10,
+        help='The number of most retested boards and most common failures to list.')
+
+    parser.set_defaults(func=main)
@@ -0,0 +1,77 @@
+"""
+Choose the CSV file a test's results are saved to.
+
+The tests append to an existing log and only write the header when the file is new.
+If the log was written by a version of the test with different columns, appending
+would put every value under the wrong column, so the old log is moved aside and a
+new one is started in its place.
+"""
+import csv
+import logging
+import os
+from datetime import datetime
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def read_header(path: Path) -> Optional[List[str]]:
+    """
+    Read the header row of a CSV.
+
+    :param path: The CSV file.
+    :return: The column names, or None if the file is empty.
+    """
+    with open(path, newline='') as csvfile:
+        return next(csv.reader(csvfile), None)
+
+
+def rotated_path(path: Path) -> Path:
+    """
+    Choose the name an outdated log is moved to, next to the original.
+
+    :param path: The log being moved.
+    :return: The path with the current time added to its name, not already in use.
+    """
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    candidate = path.with_name(f'{path.stem}.{stamp}{path.suffix}')
+    count = 1
+    while candidate.exists():
+        candidate = path.with_name(f'{path.stem}.{stamp}-{count}{path.suffix}')
+        count += 1
+    return candidate
+
+
+def prepare_log(log: Optional[str], fieldnames: Sequence[str]) -> Tuple[str, bool]:
+    """
+    Choose the file to save results to and whether it needs a header.
+
+    An existing log is only appended to if its header matches the fieldnames,
+    otherwise it is renamed and a new log is started.
+
+    :param log: The log file given by the operator, or None to use a temporary file.
+    :param fieldnames: The columns the test writes.
+    :return: The path of the log and whether the header needs to be written.
+    """
+    if not log:
+        return NamedTemporaryFile(delete=False).name, True
+
+    path = Path(log)
+    if not path.exists():
+        return log, True
+
+    header = read_header(path)
+    if header is None:
+        # An empty file, such as one created by touch
+        return log, True
+    if header == list(fieldnames):
+        return log, False
+
+    rotated = rotated_path(path)
+    os.replace(path, rotated)
+    logger.warning(
+        f"The columns of {path} don't match the results of this test, "
+        f"moved it to {rotated} and starting a new log")
+    return log, True
@@ -8,35 +8,149 @@ The test will:
 """
 import argparse
 import csv
+import functools
 import logging
-import os
 import textwrap
-from tempfile import NamedTemporaryFile
-from time import sleep
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
-from .hal import SERVO_VIDPID, ServoBoard, discover_boards
+from .hal import (
+    SERVO_VIDPID,
+    BoardWatcher,
+    ServoBoard,
+    SessionPool,
+    discover_boards,
+    wait_until_settled,
+)
+from .hal.clock import sleep
+from .hal.discovery import Port
+from .hal.utils import BoardDisconnectionError
+from .limits import FAILURES_FIELD, Limit, LimitChecker, pass_fieldnames
+from .parallel import LockedDictWriter, operator, prompt, test_ports
+from .results_log import prepare_log
+from .steps import OPERATOR, Step, StepRunner
+from .timing import PhaseTimer, TimingSummary, timing_fieldnames
+
+# The change in current between readings that counts as settled, in amps
+SETTLE_TOLERANCE = 0.05
+# The longest time the servos take to move between the sweep positions, in seconds
+SERVO_TRAVEL_TIME = 0.5
+
+SERVO_LIMITS = {
+    'input_volt': Limit.bounds('input voltage', 'V', 5, 6),
+}
+
+# The phases of the test that are timed, the setup followed by the test steps
+PHASES = ['discovery', 'connect', 'reset', 'sweep']
 
 logger = logging.getLogger("servo_test")
 
 
-def test_board(output_writer: csv.DictWriter, fw_ver: Optional[str] = None) -> None:
+def test_sweep(board: ServoBoard) -> None:
+    """Move all servos to the end stops and back to the middle."""
+    for position in (-0.8, 0.8, -0.8):
+        for servo in board.servos:
+            servo.set_position(position)
+        # Move on once the current has settled, never waiting longer than the servos
+        # take to reach the position
+        wait_until_settled(board.current, SETTLE_TOLERANCE, timeout=SERVO_TRAVEL_TIME)
+    for servo in board.servos:
+        servo.set_position(0)
+
+
+def test_servos_move(board: ServoBoard, limits: LimitChecker) -> None:
+    """Sweep the servos and ask the operator whether they moved."""
+    # The operator has to watch the sweep to answer
+    with operator():
+        test_sweep(board)
+        move_result = prompt("Did the servos move [Y/n]") or 'y'  # default to yes
+    limits.results['servos_move'] = move_result
+    limits.require(
+        'servos_move', move_result.lower() == 'y', "Reported that the servos didn't move.")
+
+
+def servo_steps(board: ServoBoard, limits: LimitChecker) -> List[Step]:
+    """
+    The steps of the servo board test, after the board has been identified.
+
+    :param board: The servo board to test.
+    :param limits: The checker the measurements are saved and checked with.
+    :return: The steps, in order of priority.
+    """
+    return [
+        Step(
+            'sweep', functools.partial(test_servos_move, board, limits),
+            resources=[OPERATOR, 'servos']),
+    ]
+
+
+def test_board(
+    output_writer: csv.DictWriter,
+    fw_ver: Optional[str] = None,
+    pool: Optional[SessionPool] = None,
+    summary: Optional[TimingSummary] = None,
+    parallel: bool = False,
+    port: Optional[Port] = None,
+) -> None:
     """
     Test the servo board.
 
     This test will move all servos to the end stops and back to the middle.
+
+    With parallel, every connected servo board is tested at once,
+    otherwise only the first board found is tested. If a port is given, such as
+    a board that has just been connected, only that board is tested.
     """
-    results: Dict[str, Any] = {}
+    timer = PhaseTimer()
 
-    ports = discover_boards(SERVO_VIDPID)
+    with timer.phase('discovery'):
+        ports = [port] if port is not None else discover_boards(SERVO_VIDPID)
     if len(ports) == 0:
         logger.error("No servo boards found.")
         return
+    if pool is not None:
+        with timer.phase('connect'):
+            pool.prune(ports)
+
+    test_ports(
+        ports if parallel else ports[:1], timer,
+        lambda port, board_timer: test_port(
+            port, output_writer, fw_ver, pool, summary, board_timer),
+    )
+
+
+def test_port(
+    port: Port,
+    output_writer: csv.DictWriter,
+    fw_ver: Optional[str] = None,
+    pool: Optional[SessionPool] = None,
+    summary: Optional[TimingSummary] = None,
+    timer: Optional[PhaseTimer] = None,
+) -> None:
+    """
+    Test the servo board on a port.
 
-    board = ServoBoard(ports[0].port, ports[0].identity)
+    :param port: The discovered port of the board.
+    :param output_writer: The writer the results are saved with.
+    :param fw_ver: The expected firmware version of the board.
+    :param pool: The pool to reuse the board's connection from.
+    :param summary: The summary to add the test's timings to.
+    :param timer: The timer of the test so far.
+    """
+    results: Dict[str, Any] = {}
+    if timer is None:
+        timer = PhaseTimer()
+
+    with timer.phase('connect'):
+        if pool is not None:
+            # Reuse the connection if this board is still connected from a previous test
+            board = pool.board(ServoBoard, port, shadow_cache=True)
+        else:
+            board = ServoBoard(port.port, port.identity, shadow_cache=True)
+    limits = LimitChecker(results, SERVO_LIMITS)
     try:
         results['passed'] = False  # default to failure
-        board_identity = board.identify()
+        # Identified when the board was connected
+        board_identity = board.identity
 
         results['asset'] = board_identity.asset_tag
         results['sw_version'] = board_identity.sw_version
@@ -47,68 +161,89 @@ def test_board(output_writer: csv.DictWriter, fw_ver: Optional[str] = None) -> N
             assert board_identity.sw_version == fw_ver, \
                 f"Expected firmware version {fw_ver}, got {board_identity.sw_version} instead."
 
-        board.reset()
-        sleep(0.5)
+        with timer.phase('reset'):
+            board.reset()
+            sleep(0.5)
 
         input_voltage = board.voltage()
         # expected currents are calculated using this voltage
-        logger.info(f"Detected input voltage {input_voltage:.3f}V")
-        results['input_volt'] = input_voltage
-        assert 5 < input_voltage < 6, \
-            f"Input voltage of {input_voltage:.3f}V is outside acceptable range of 5.5V±0.5V."
-
-        # move all servos
-        for i in range(12):
-            board.servos[i].set_position(-0.8)
-        sleep(0.5)
-        for i in range(12):
-            board.servos[i].set_position(0.8)
-        sleep(0.5)
-        for i in range(12):
-            board.servos[i].set_position(-0.8)
-        sleep(0.5)
-        for i in range(12):
-            board.servos[i].set_position(0)
-
-        move_result = input("Did the servos move [Y/n]") or 'y'  # default to yes
-        results['servos_move'] = move_result
-        assert move_result.lower() == 'y', "Reported that the servos didn't move."
+        limits.check('input_volt', input_voltage)
+        # The other checks are meaningless with the supply out of range
+        limits.assert_passed()
 
+        timer.run_steps(StepRunner(servo_steps(board, limits)))
+
+        # Fail the board now all the checks have been made
+        limits.assert_passed()
         logger.info("Board passed")
         results['passed'] = True
+    except (AssertionError, BoardDisconnectionError) as e:
+        # Save the serial history leading up to the failure
+        if board.flight_recorder is not None:
+            board.flight_recorder.dump(e)
+        raise
     finally:
+        timer.save(results)
+        if summary is not None:
+            summary.add(timer)
         output_writer.writerow(results)
         board.reset()
-        board.close()
+        if pool is None:
+            board.close()
 
 
 def main(args: argparse.Namespace) -> None:
     """Main function for the servo board test."""
-    new_log = True
-    fieldnames = ['asset', 'sw_version', 'passed', 'input_volt', 'servos_move']
-
-    if args.log:
-        logfile = args.log
-        if os.path.exists(logfile):
-            new_log = False
-    else:
-        logfile = NamedTemporaryFile(delete=False).name
-
-    with open(logfile, 'a', newline='') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    fieldnames = [
+        'asset', 'sw_version', 'passed', FAILURES_FIELD, 'input_volt', 'servos_move',
+        *pass_fieldnames(['input_volt', 'servos_move']),
+    ] + timing_fieldnames(PHASES)
+
+    logfile, new_log = prepare_log(args.log, fieldnames)
+
+    summary = TimingSummary()
+    with open(logfile, 'a', newline='') as csvfile, SessionPool() as pool:
+        writer = LockedDictWriter(csvfile, fieldnames=fieldnames)
         if new_log:
             writer.writeheader()
 
-        while True:
-            try:
-                test_board(writer, args.fw_ver)
-            except AssertionError as e:
-                logger.error(f"Test failed: {e}")
+        watcher = BoardWatcher(SERVO_VIDPID) if args.hotplug else None
+        try:
+            while True:
+                port = None
+                if watcher is not None:
+                    logger.info("Connect a servo board to test it, or press Ctrl+C to stop")
+                    try:
+                        event = watcher.wait_for('add')
+                    except KeyboardInterrupt:
+                        break
+                    # Without a timeout, wait_for only returns once a board is added
+                    assert event is not None
+                    port = event.port
+
+                try:
+                    test_board(writer, args.fw_ver, pool, summary, args.parallel, port)
+                except AssertionError as e:
+                    logger.error(f"Test failed: {e}")
 
-            result = input("Test another servo board? [Y/n]") or 'y'
-            if result.lower() != 'y':
-                break
+                if watcher is not None:
+                    logger.info(
+                        "Disconnect the board to test another, or press Ctrl+C to stop")
+                    try:
+                        watcher.wait_for('remove')
+                    except KeyboardInterrupt:
+                        break
+                    continue
 
+                result = input("Test another servo board? [Y/n]") or 'y'
+                if result.lower() != 'y':
+                    break
+        finally:
+            if watcher is not None:
+                watcher.close()
+
+    for line in summary.format():
+        logger.info(line)
     logger.info(f"Test results saved to {logfile}")
 
 
@@ -122,6 +257,12 @@ def create_subparser(subparsers: argparse._SubParsersAction) -> None:
     )
 
     parser.add_argument('--log', default=None, help='A CSV file to save test results to.')
+    parser.add_argument(
+        '--hotplug', action='store_true',
+        help='Start each test when a board is connected instead of prompting.')
+    parser.add_argument(
+        '--parallel', action='store_true',
+        help='Test every connected servo board at once, instead of only the first.')
     parser.add_argument(
         '--fw-ver',
         default=None,
@@ -0,0 +1,86 @@
+"""
+Board simulator.
+
+Serve simulated boards that respond to the same serial protocol as the real
+board firmware. The simulated boards have the test fixture's loads connected
+so the board tests can be run against them.
+
+Each simulated board is served on a pseudo-terminal or a TCP socket and the
+port to connect to is printed. The simulators run until interrupted.
+"""
+import argparse
+import logging
+import textwrap
+from time import sleep
+from typing import List
+
+from .simulator import (
+    PtyTransport,
+    SimulatedBoard,
+    SimulatedMotorBoard,
+    SimulatedPowerBoard,
+    SimulatedServoBoard,
+    SimulatorTransport,
+    SocketTransport,
+)
+
+logger = logging.getLogger("simulate")
+
+BOARD_TYPES = {
+    'power': SimulatedPowerBoard,
+    'motor': SimulatedMotorBoard,
+    'servo': SimulatedServoBoard,
+}
+
+
+def main(args: argparse.Namespace) -> None:
+    """Main function for the board simulator."""
+    transports: List[SimulatorTransport] = []
+
+    for num, board_type in enumerate(args.boards):
+        board: SimulatedBoard = BOARD_TYPES[board_type](
+            asset_tag=f'SIM{num:04d}', noise=args.noise)
+        if isinstance(board, SimulatedPowerBoard):
+            board.auto_press_start = True
+
+        if args.transport == 'socket':
+            transport: SimulatorTransport = SocketTransport(board, args.latency)
+        else:
+            transport = PtyTransport(board, args.latency)
+        transport.start()
+        transports.append(transport)
+        print(f"{board.board_type} {board.asset_tag}: {transport.url}")
+
+    try:
+        while True:
+            sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for transport in transports:
+            transport.stop()
+
+
+def create_subparser(subparsers: argparse._SubParsersAction) -> None:
+    """Simulate command parser."""
+    parser = subparsers.add_parser(
+        "simulate",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        description=textwrap.dedent(__doc__),
+        help="Serve simulated boards for testing without hardware.",
+    )
+
+    parser.add_argument(
+        'boards', nargs='+', choices=sorted(BOARD_TYPES),
+        help='The types of board to simulate.')
+    parser.add_argument(
+        '--transport', choices=['pty', 'socket'], default='pty',
+        help='How to serve the simulated boards. Defaults to a pseudo-terminal.')
+    parser.add_argument(
+        '--latency', type=float, default=0.0,
+        help='The time each simulated board takes to respond to a command, in seconds.')
+    parser.add_argument(
+        '--noise', type=float, default=0.0,
+        help='The relative standard deviation of noise added to analogue readings.')
+
+    parser.set_defaults(func=main)
@@ -0,0 +1,21 @@
+"""Simulated boards for running the HAL and board tests without hardware."""
+from .boards import (
+    SimulatedBoard,
+    SimulatedMotorBoard,
+    SimulatedPowerBoard,
+    SimulatedServoBoard,
+)
+from .protocol_replay import register_handler, replay_ports
+from .transport import PtyTransport, SimulatorTransport, SocketTransport
+
+__all__ = [
+    'PtyTransport',
+    'SimulatedBoard',
+    'SimulatedMotorBoard',
+    'SimulatedPowerBoard',
+    'SimulatedServoBoard',
+    'SimulatorTransport',
+    'SocketTransport',
+    'register_handler',
+    'replay_ports',
+]
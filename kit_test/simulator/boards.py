@@ -0,0 +1,391 @@
+"""
+Simulated boards that respond to the same text protocol as the board firmware.
+
+Each simulated board models the load connected to it in the test fixture,
+so the currents reported follow Ohm's law from the simulated supply voltage.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+from typing import Sequence
+
+from ..fixtures import MOTOR_RESISTANCE, OUTPUT_RESISTANCE
+from ..hal.servo_board import DUTY_MAX, DUTY_MIN
+
+logger = logging.getLogger(__name__)
+
+ACK = 'ACK'
+MANUFACTURER = 'Student Robotics'
+
+
+class SimulatedBoard:
+    """
+    The base class for simulated boards.
+
+    Subclasses implement their board's commands in _handle,
+    calling the base class for any command they don't recognise.
+
+    :param asset_tag: The asset tag reported by the simulated board.
+    :param sw_version: The firmware version reported by the simulated board.
+    :param noise: The standard deviation of the noise added to analogue readings,
+        as a fraction of the reading.
+    :param seed: The seed for the noise generator, so runs can be repeated.
+    """
+
+    board_type = ''
+
+    def __init__(
+        self,
+        asset_tag: str = 'SIM0000',
+        sw_version: str = '4.4',
+        noise: float = 0,
+        seed: int | None = None,
+    ) -> None:
+        self.asset_tag = asset_tag
+        self.sw_version = sw_version
+        self.noise = noise
+        self._random = random.Random(seed)
+        # Transports may serve commands from several threads
+        self._lock = threading.Lock()
+        self.reset()
+
+    def handle_command(self, command: str) -> str:
+        """
+        Process a single command and return the board's response.
+
+        :param command: The command received, without the trailing newline.
+        :return: The response to send, without the trailing newline.
+        """
+        with self._lock:
+            try:
+                return self._handle(command.split(':'))
+            except (ValueError, IndexError):
+                return f'NACK:Invalid arguments to {command}'
+
+    def reset(self) -> None:
+        """Return the board to its power-on state."""
+        pass
+
+    def status(self) -> str:
+        """
+        Generate the response to the *STATUS? command.
+
+        :return: The status response.
+        """
+        return ''
+
+    def _handle(self, args: list[str]) -> str:
+        if args == ['*IDN?']:
+            return ':'.join((MANUFACTURER, self.board_type, self.asset_tag, self.sw_version))
+        if args == ['*STATUS?']:
+            return self.status()
+        if args == ['*RESET']:
+            self.reset()
+            return ACK
+        return 'NACK:Unknown command'
+
+    def _measure(self, value: float) -> int:
+        """Convert a value to the integer milli-units the firmware reports, adding noise."""
+        if self.noise:
+            value *= self._random.gauss(1, self.noise)
+        return round(value * 1000)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__qualname__} {self.board_type} {self.asset_tag!r}>"
+
+
+class SimulatedPowerBoard(SimulatedBoard):
+    """
+    A simulated PBv4B power board.
+
+    By default each output is loaded with the resistance used by the power board test.
+
+    :param battery_voltage: The voltage of the simulated supply, in volts.
+    :param output_resistance: The resistance connected to each output, in ohms.
+        None leaves the output unloaded.
+    :param regulator_voltage: The voltage of the 5V regulator, in volts.
+    :param output_limits: The current at which each output trips, in amps.
+    :param auto_press_start: Report the start button as pressed every time it is read.
+    """
+
+    board_type = 'PBv4B'
+    NUM_OUTPUTS = 7
+    BRAIN_OUTPUT = 4
+    REGULATOR_OUTPUT = 6
+    FAN_CURRENT = 0.1
+    QUIESCENT_CURRENT = 0.05
+
+    def __init__(
+        self,
+        asset_tag: str = 'SIM0000',
+        sw_version: str = '4.4',
+        battery_voltage: float = 12.0,
+        output_resistance: Sequence[float | None] = tuple(OUTPUT_RESISTANCE),
+        regulator_voltage: float = 5.1,
+        output_limits: Sequence[float] = (20, 20, 10, 10, 10, 10, 2),
+        auto_press_start: bool = False,
+        noise: float = 0,
+        seed: int | None = None,
+    ) -> None:
+        self.battery_voltage = battery_voltage
+        self.output_resistance = list(output_resistance)
+        self.regulator_voltage = regulator_voltage
+        self.output_limits = list(output_limits)
+        self.auto_press_start = auto_press_start
+        self.temperature = 25
+        super().__init__(asset_tag, sw_version, noise, seed)
+
+    def reset(self) -> None:
+        """Turn off all outputs except the brain output and clear any faults."""
+        self.outputs = [False] * self.NUM_OUTPUTS
+        self.outputs[self.BRAIN_OUTPUT] = True
+        self.overcurrent = [False] * self.NUM_OUTPUTS
+        self.fan = False
+        self.leds = {'RUN': '0', 'ERR': '0'}
+        self.note: tuple[int, int] | None = None
+        self.start_pressed = False
+
+    def press_start_button(self) -> None:
+        """Latch a press of the start button until it is next read."""
+        with self._lock:
+            self.start_pressed = True
+
+    def output_current(self, index: int) -> float:
+        """
+        Calculate the current drawn by an output.
+
+        :param index: The output number.
+        :return: The current through the output's load, in amps.
+        """
+        resistance = self.output_resistance[index]
+        if not self.outputs[index] or resistance is None:
+            return 0.0
+        if index == self.REGULATOR_OUTPUT:
+            return self.regulator_voltage / resistance
+        return self.battery_voltage / resistance
+
+    def battery_current(self) -> float:
+        """
+        Calculate the total current drawn from the battery.
+
+        :return: The battery current, in amps.
+        """
+        current = self.QUIESCENT_CURRENT + (self.FAN_CURRENT if self.fan else 0)
+        for index in range(self.NUM_OUTPUTS):
+            if index == self.REGULATOR_OUTPUT:
+                # The regulator's power is drawn from the battery at a lower current
+                current += (
+                    self.output_current(index) * self.regulator_voltage / self.battery_voltage)
+            else:
+                current += self.output_current(index)
+        return current
+
+    def status(self) -> str:
+        """
+        Generate the response to the *STATUS? command.
+
+        :return: The status response.
+        """
+        return ':'.join((
+            ','.join(str(int(oc)) for oc in self.overcurrent),
+            str(self.temperature),
+            str(int(self.fan)),
+            str(round(self.regulator_voltage * 1000)),
+        ))
+
+    def _set_output(self, index: int, value: str) -> str:
+        if value not in ('0', '1'):
+            return 'NACK:Invalid output state'
+        if value == '1' and self.overcurrent[index]:
+            # Outputs that have tripped stay off until reset
+            return ACK
+        self.outputs[index] = (value == '1')
+        if self.output_current(index) > self.output_limits[index]:
+            self.outputs[index] = False
+            self.overcurrent[index] = True
+        return ACK
+
+    def _handle(self, args: list[str]) -> str:
+        if args[0] == 'OUT':
+            index = int(args[1])
+            if not 0 <= index < self.NUM_OUTPUTS:
+                return 'NACK:Invalid output number'
+            if args[2:] == ['GET?']:
+                return str(int(self.outputs[index]))
+            if args[2:] == ['I?']:
+                return str(self._measure(self.output_current(index)))
+            if args[2] == 'SET' and len(args) == 4:
+                if index == self.BRAIN_OUTPUT:
+                    return 'NACK:Brain output cannot be controlled'
+                return self._set_output(index, args[3])
+        elif args == ['BATT', 'V?']:
+            return str(self._measure(self.battery_voltage))
+        elif args == ['BATT', 'I?']:
+            return str(self._measure(self.battery_current()))
+        elif args == ['BTN', 'START', 'GET?']:
+            pressed = self.start_pressed or self.auto_press_start
+            self.start_pressed = False
+            return f'{int(pressed)}:0'
+        elif args[0] == 'LED' and len(args) == 4 and args[2] == 'SET':
+            if args[1] not in self.leds or args[3] not in ('0', '1', 'F'):
+                return 'NACK:Invalid LED command'
+            self.leds[args[1]] = args[3]
+            return ACK
+        elif args[0] == 'NOTE' and len(args) == 3:
+            frequency, duration = int(args[1]), int(args[2])
+            if not 8 <= frequency <= 10000 or duration < 0:
+                return 'NACK:Invalid note'
+            self.note = (frequency, duration)
+            return ACK
+        elif args[:2] == ['*SYS', 'FAN'] and len(args) == 4 and args[2] == 'SET':
+            self.fan = (args[3] == '1')
+            return ACK
+        elif args[:2] == ['*SYS', 'BRAIN'] and len(args) == 4 and args[2] == 'SET':
+            return self._set_output(self.BRAIN_OUTPUT, args[3])
+        return super()._handle(args)
+
+
+class SimulatedMotorBoard(SimulatedBoard):
+    """
+    A simulated MCv4B motor board.
+
+    By default each motor output is loaded with the resistance used by the motor board test.
+
+    :param input_voltage: The voltage of the simulated supply, in volts.
+    :param motor_resistance: The resistance connected to each motor output, in ohms.
+    :param fault_current: The current at which a motor output reports a fault, in amps.
+    """
+
+    board_type = 'MCv4B'
+    NUM_MOTORS = 2
+
+    def __init__(
+        self,
+        asset_tag: str = 'SIM0000',
+        sw_version: str = '4.4',
+        input_voltage: float = 12.0,
+        motor_resistance: Sequence[float] = (MOTOR_RESISTANCE, MOTOR_RESISTANCE),
+        fault_current: float = 10.0,
+        noise: float = 0,
+        seed: int | None = None,
+    ) -> None:
+        self.input_voltage = input_voltage
+        self.motor_resistance = list(motor_resistance)
+        self.fault_current = fault_current
+        super().__init__(asset_tag, sw_version, noise, seed)
+
+    def reset(self) -> None:
+        """Disable the motors and clear all faults."""
+        self.enabled = [False] * self.NUM_MOTORS
+        self.power = [0] * self.NUM_MOTORS
+        self.faults = [False] * self.NUM_MOTORS
+
+    def motor_current(self, index: int) -> float:
+        """
+        Calculate the current drawn by a motor output.
+
+        :param index: The motor number.
+        :return: The average current through the motor's load, in amps.
+        """
+        if not self.enabled[index]:
+            return 0.0
+        duty = abs(self.power[index]) / 1000
+        return self.input_voltage / self.motor_resistance[index] * duty
+
+    def status(self) -> str:
+        """
+        Generate the response to the *STATUS? command.
+
+        :return: The status response.
+        """
+        return ':'.join((
+            ','.join(str(int(fault)) for fault in self.faults),
+            str(round(self.input_voltage * 1000)),
+        ))
+
+    def _handle(self, args: list[str]) -> str:
+        if args[0] == 'MOT':
+            index = int(args[1])
+            if not 0 <= index < self.NUM_MOTORS:
+                return 'NACK:Invalid motor number'
+            if args[2:] == ['GET?']:
+                return f'{int(self.enabled[index])}:{self.power[index]}'
+            if args[2:] == ['I?']:
+                return str(self._measure(self.motor_current(index)))
+            if args[2:] == ['DISABLE']:
+                self.enabled[index] = False
+                self.power[index] = 0
+                return ACK
+            if args[2] == 'SET' and len(args) == 4:
+                power = int(args[3])
+                if not -1000 <= power <= 1000:
+                    return 'NACK:Invalid motor power'
+                self.enabled[index] = True
+                self.power[index] = power
+                if self.motor_current(index) > self.fault_current:
+                    self.enabled[index] = False
+                    self.faults[index] = True
+                return ACK
+        return super()._handle(args)
+
+
+class SimulatedServoBoard(SimulatedBoard):
+    """
+    A simulated SBv4B servo board.
+
+    :param regulator_voltage: The voltage of the servo regulator, in volts.
+    :param servo_current: The current drawn by each enabled servo, in amps.
+    """
+
+    board_type = 'SBv4B'
+    NUM_SERVOS = 12
+
+    def __init__(
+        self,
+        asset_tag: str = 'SIM0000',
+        sw_version: str = '4.4',
+        regulator_voltage: float = 5.5,
+        servo_current: float = 0.05,
+        noise: float = 0,
+        seed: int | None = None,
+    ) -> None:
+        self.regulator_voltage = regulator_voltage
+        self.servo_current = servo_current
+        super().__init__(asset_tag, sw_version, noise, seed)
+
+    def reset(self) -> None:
+        """Disable all the servos."""
+        self.duty = [0] * self.NUM_SERVOS
+
+    def status(self) -> str:
+        """
+        Generate the response to the *STATUS? command.
+
+        :return: The status response.
+        """
+        return '0:1'  # watchdog OK, power good
+
+    def _handle(self, args: list[str]) -> str:
+        if args == ['SERVO', 'I?']:
+            enabled = sum(1 for duty in self.duty if duty)
+            return str(self._measure(enabled * self.servo_current))
+        if args == ['SERVO', 'V?']:
+            return str(self._measure(self.regulator_voltage))
+        if args[0] == 'SERVO':
+            index = int(args[1])
+            if not 0 <= index < self.NUM_SERVOS:
+                return 'NACK:Invalid servo number'
+            if args[2:] == ['GET?']:
+                return str(self.duty[index])
+            if args[2:] == ['DISABLE']:
+                self.duty[index] = 0
+                return ACK
+            if args[2] == 'SET' and len(args) == 4:
+                duty = int(args[3])
+                if not DUTY_MIN <= duty <= DUTY_MAX:
+                    return 'NACK:Invalid servo duty'
+                self.duty[index] = duty
+                return ACK
+        return super()._handle(args)
@@ -0,0 +1,327 @@
+"""
+Replay a recorded serial session in place of a board.
+
+This is a pyserial protocol handler for replay:// URLs, registered by replay_ports
+or register_handler. The URL gives the recording file, as in a file:// URL, the port
+in the recording to replay and optionally a speed factor for the board's latency:
+
+    replay:///path/to/session.jsonl.gz?port=%2Fdev%2FttyACM0&speed=10
+
+Each line written to the port must match the next command recorded on that port.
+Its recorded response is returned once the recorded latency, divided by the speed,
+has elapsed, so the replay reproduces the timing of the real board. A speed of 0
+returns every response immediately. Recorded timeouts are replayed by not responding.
+
+Recordings are made with the --record-session option, see hal.session_recorder.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+import serial
+from serial.serialutil import PortNotOpenError, SerialBase, SerialException
+
+from ..hal.discovery import Port
+from ..hal.session_recorder import ENCODING, read_recording
+from ..hal.utils import BoardIdentity
+
+if TYPE_CHECKING:
+    from _typeshed import ReadableBuffer
+
+logger = logging.getLogger(__name__)
+
+
+class ReplayStep(NamedTuple):
+    """A single recorded command and the board's response to it."""
+
+    command: bytes
+    response: bytes | None
+    latency: float
+
+
+class ReplaySession:
+    """
+    The recorded commands of a single port and how far through them the replay is.
+
+    The session is shared by every replay port opened for the same recording and port,
+    so the replay continues when the HAL reopens the port.
+
+    :param name: The name of the session, used in error messages.
+    :param steps: The recorded commands in the order they were sent.
+    """
+
+    def __init__(self, name: str, steps: list[ReplayStep]) -> None:
+        self.name = name
+        self.steps = steps
+        self.position = 0
+        self._lock = threading.Lock()
+
+    def next_step(self, command: bytes) -> ReplayStep:
+        """
+        Advance to the next step of the replay, which must be for the given command.
+
+        :param command: The command written to the port, including the trailing newline.
+        :raises SerialException: If the command doesn't match the recording,
+            or the recording has ended.
+        :return: The recorded step for the command.
+        """
+        with self._lock:
+            if self.position >= len(self.steps):
+                raise SerialException(
+                    f"Replay of {self.name} ended, unexpected command {command!r}")
+            step = self.steps[self.position]
+            if step.command != command:
+                raise SerialException(
+                    f"Replay of {self.name} diverged at command {self.position}, "
+                    f"expected {step.command!r}, got {command!r}")
+            self.position += 1
+            return step
+
+
+# The sessions loaded by replay ports, keyed by recording and port
+_sessions: dict[tuple[Path, str], ReplaySession] = {}
+_sessions_lock = threading.Lock()
+
+
+def _load_steps(entries: list[dict[str, Any]], port: str) -> list[ReplayStep]:
+    steps = []
+    for entry in entries:
+        if entry.get('port') != port or 'c' not in entry:
+            continue
+        for index, command in enumerate(entry['c']):
+            if index < len(entry['r']):
+                response: bytes | None = entry['r'][index].encode(ENCODING) + b'\n'
+                latency = entry['l'][index]
+            else:
+                response, latency = None, 0.0
+            steps.append(ReplayStep(command.encode(ENCODING), response, latency))
+    return steps
+
+
+def load_session(path: Path | str, port: str | None = None) -> ReplaySession:
+    """
+    Get the replay session of a port in a recording, loading it if needed.
+
+    :param path: The recording file.
+    :param port: The port in the recording to replay, may be omitted
+        if only one port was recorded.
+    :raises SerialException: If the port is not in the recording.
+    :return: The shared replay session.
+    """
+    path = Path(path).resolve()
+    with _sessions_lock:
+        if port is not None and (path, port) in _sessions:
+            return _sessions[path, port]
+
+        entries = read_recording(path)
+        ports = list(dict.fromkeys(entry['port'] for entry in entries if 'port' in entry))
+        if port is None:
+            if len(ports) != 1:
+                raise SerialException(
+                    f"{path} contains {len(ports)} ports, choose one with ?port=")
+            port = ports[0]
+            if (path, port) in _sessions:
+                return _sessions[path, port]
+        if port not in ports:
+            raise SerialException(f"Port {port} was not recorded in {path}")
+
+        session = _sessions[path, port] = ReplaySession(
+            f"{port} from {path.name}", _load_steps(entries, port))
+        return session
+
+
+def register_handler() -> None:
+    """Allow replay:// URLs to be opened by serial.serial_for_url."""
+    if __package__ not in serial.protocol_handler_packages:
+        serial.protocol_handler_packages.append(__package__)
+
+
+def replay_url(path: Path, port: str, speed: float = 1.0) -> str:
+    """
+    Create the replay URL of a recorded port.
+
+    :param path: The absolute path of the recording file.
+    :param port: The port in the recording to replay.
+    :param speed: The factor to speed up the board's responses by, 0 for no delay.
+    :return: The URL, with the path quoted so it can be a Windows path.
+    """
+    # Reuse the file URL of the path, e.g. file:///C:/session.jsonl
+    location = path.as_uri()[len('file:'):]
+    return f"replay:{location}?{urllib.parse.urlencode({'port': port, 'speed': speed})}"
+
+
+def replay_ports(path: Path | str, speed: float = 1.0) -> list[Port]:
+    """
+    Create replay URLs for every board in a recording, starting each from the beginning.
+
+    :param path: The recording file.
+    :param speed: The factor to speed up the board's responses by, 0 for no delay.
+    :return: The ports of the recorded boards, with the identities they reported.
+    """
+    register_handler()
+    path = Path(path).resolve()
+    identities: dict[str, BoardIdentity] = {}
+    for entry in read_recording(path):
+        if 'port' in entry:
+            identity = BoardIdentity(*entry['identity']) if 'identity' in entry else None
+            if identity is not None or entry['port'] not in identities:
+                identities[entry['port']] = identity or BoardIdentity()
+
+    with _sessions_lock:
+        for port in identities:
+            _sessions.pop((path, port), None)
+
+    return [
+        Port(replay_url(path, port, speed), identity)
+        for port, identity in identities.items()
+    ]
+
+
+class Serial(SerialBase):
+    """A serial port that replays a board's recorded responses."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.session: ReplaySession | None = None
+        self.speed = 1.0
+        self._condition = threading.Condition()
+        # Bytes written that don't yet form a complete command
+        self._pending = bytearray()
+        # Responses waiting for their latency to elapse, as (ready time, data)
+        self._scheduled: list[tuple[float, bytes]] = []
+        self._received = bytearray()
+        super().__init__(*args, **kwargs)
+
+    def open(self) -> None:
+        """Open the port, loading the recording given by the URL."""
+        if self.is_open:
+            raise SerialException("Port is already open.")
+        if self.port is None:
+            raise SerialException("Port must be configured before it can be used.")
+        self.from_url(self.port)
+        self.is_open = True
+        self.reset_input_buffer()
+        self.reset_output_buffer()
+
+    def close(self) -> None:
+        """Close the port, waking any blocked reads."""
+        with self._condition:
+            self.is_open = False
+            self._condition.notify_all()
+        super().close()
+
+    def _reconfigure_port(self) -> None:
+        # There are no port settings to apply
+        pass
+
+    def from_url(self, url: str) -> None:
+        """
+        Load the session given by a replay:// URL.
+
+        :param url: The URL of the port.
+        :raises SerialException: If the URL is invalid or the recording can't be loaded.
+        """
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme != 'replay':
+            raise SerialException(
+                f'expected a URL in the form "replay://<file>[?port=<port>&speed=<factor>]", '
+                f'not starting with replay:// ({parts.scheme!r})')
+        path = urllib.request.url2pathname(parts.netloc + parts.path)
+        options = urllib.parse.parse_qs(parts.query)
+        try:
+            self.speed = float(options.get('speed', ['1'])[0])
+            self.session = load_session(path, options.get('port', [None])[0])
+        except (OSError, ValueError) as e:
+            raise SerialException(f'Failed to load replay {url!r}: {e}') from e
+
+    def _collect(self) -> float | None:
+        """
+        Move the responses whose latency has elapsed to the receive buffer.
+
+        :return: The time the next scheduled response is ready, if any.
+        """
+        now = time.monotonic()
+        while self._scheduled and self._scheduled[0][0] <= now:
+            self._received += self._scheduled.pop(0)[1]
+        return self._scheduled[0][0] if self._scheduled else None
+
+    @property
+    def in_waiting(self) -> int:
+        """The number of bytes ready to be read."""
+        if not self.is_open:
+            raise PortNotOpenError()
+        with self._condition:
+            self._collect()
+            return len(self._received)
+
+    def read(self, size: int = 1, /) -> bytes:
+        """
+        Read size bytes, waiting until they are ready or the timeout expires.
+
+        :param size: The number of bytes to read.
+        :return: The bytes read, fewer than size if the timeout expired.
+        """
+        if not self.is_open:
+            raise PortNotOpenError()
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._condition:
+            while self.is_open:
+                next_ready = self._collect()
+                if len(self._received) >= size:
+                    break
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    break
+                wake = [t for t in (next_ready, deadline) if t is not None]
+                self._condition.wait(min(wake) - now if wake else None)
+            data = bytes(self._received[:size])
+            del self._received[:size]
+        return data
+
+    def write(self, b: ReadableBuffer, /) -> int | None:
+        """
+        Write commands to the replayed board, scheduling the recorded responses.
+
+        :param b: The data to write.
+        :raises SerialException: If a command doesn't match the recording.
+        :return: The number of bytes written.
+        """
+        if not self.is_open or self.session is None:
+            raise PortNotOpenError()
+        data = bytes(b)
+        now = time.monotonic()
+        with self._condition:
+            self._pending += data
+            while True:
+                end = self._pending.find(b'\n')
+                if end < 0:
+                    break
+                command = bytes(self._pending[:end + 1])
+                del self._pending[:end + 1]
+
+                step = self.session.next_step(command)
+                if step.response is not None:
+                    delay = step.latency / self.speed if self.speed > 0 else 0.0
+                    ready = now + delay
+                    if self._scheduled:
+                        # The board responds to commands in the order they were sent
+                        ready = max(ready, self._scheduled[-1][0])
+                    self._scheduled.append((ready, step.response))
+            self._condition.notify_all()
+        return len(data)
+
+    def reset_input_buffer(self) -> None:
+        """Discard any received or scheduled responses."""
+        with self._condition:
+            self._received.clear()
+            self._scheduled.clear()
+
+    def reset_output_buffer(self) -> None:
+        """Discard any partially written command."""
+        with self._condition:
+            self._pending.clear()
@@ -0,0 +1,203 @@
+"""
+Transports that connect a simulated board to a serial port that the HAL can open.
+
+PtyTransport creates a pseudo-terminal, so the board appears as a real serial device
+such as /dev/pts/3. SocketTransport listens on a TCP port for pyserial's socket:// URLs.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import select
+import socket
+import threading
+import time
+from types import TracebackType
+
+from .boards import SimulatedBoard
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatorTransport:
+    """
+    The base class for simulator transports.
+
+    Incoming bytes are split into lines and each line is passed to the board,
+    with the response written back once the configured latency has elapsed.
+
+    :param board: The simulated board to connect.
+    :param latency: The time the simulated board takes to respond to each command,
+        in seconds.
+    """
+
+    def __init__(self, board: SimulatedBoard, latency: float = 0) -> None:
+        self.board = board
+        self.latency = latency
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """The port or URL to pass to the HAL to connect to the simulated board."""
+        raise NotImplementedError
+
+    def start(self) -> None:
+        """Start serving the simulated board in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._serve, name=f"sim-{self.board.board_type}", daemon=True)
+        self._thread.start()
+        logger.info(f"Simulated {self.board.board_type} {self.board.asset_tag} at {self.url}")
+
+    def stop(self) -> None:
+        """Stop serving the simulated board and wait for the thread to exit."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _serve(self) -> None:
+        raise NotImplementedError
+
+    def _process(self, buffer: bytearray) -> bytes:
+        """
+        Handle every complete line in the buffer, removing them from the buffer.
+
+        :param buffer: The received bytes that have not yet been processed.
+        :return: The responses to send back to the HAL.
+        """
+        responses = []
+        while True:
+            end = buffer.find(b'\n')
+            if end < 0:
+                break
+            line = bytes(buffer[:end]).rstrip(b'\r')
+            del buffer[:end + 1]
+
+            if self.latency:
+                time.sleep(self.latency)
+            try:
+                response = self.board.handle_command(line.decode('ascii'))
+            except UnicodeDecodeError:
+                response = 'NACK:Invalid characters'
+            responses.append(response.encode('ascii') + b'\n')
+        return b''.join(responses)
+
+    def __enter__(self) -> SimulatorTransport:
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.stop()
+
+
+class PtyTransport(SimulatorTransport):
+    """
+    Serve a simulated board on a pseudo-terminal.
+
+    The url property is the path of the terminal device to open.
+    This is only available on POSIX systems.
+    """
+
+    def __init__(self, board: SimulatedBoard, latency: float = 0) -> None:
+        import tty
+
+        super().__init__(board, latency)
+        self._master, self._slave = os.openpty()
+        # Disable echo and line editing so the port behaves like a USB serial device
+        tty.setraw(self._slave)
+        self._device = os.ttyname(self._slave)
+
+    @property
+    def url(self) -> str:
+        """The path of the pseudo-terminal device."""
+        return self._device
+
+    def stop(self) -> None:
+        """Stop serving the simulated board and close the pseudo-terminal."""
+        super().stop()
+        os.close(self._master)
+        os.close(self._slave)
+
+    def _serve(self) -> None:
+        buffer = bytearray()
+        while not self._stop.is_set():
+            readable, _, _ = select.select([self._master], [], [], 0.1)
+            if not readable:
+                continue
+            try:
+                buffer += os.read(self._master, 4096)
+            except OSError:
+                # Raised when no process has the terminal open
+                time.sleep(0.01)
+                continue
+            response = self._process(buffer)
+            if response:
+                os.write(self._master, response)
+
+
+class SocketTransport(SimulatorTransport):
+    """
+    Serve a simulated board on a TCP socket.
+
+    The url property is a pyserial socket:// URL, one client is served at a time.
+
+    :param host: The address to listen on.
+    :param port: The TCP port to listen on, 0 picks a free port.
+    """
+
+    def __init__(
+        self,
+        board: SimulatedBoard,
+        latency: float = 0,
+        host: str = '127.0.0.1',
+        port: int = 0,
+    ) -> None:
+        super().__init__(board, latency)
+        self._server = socket.create_server((host, port))
+        self._server.settimeout(0.1)
+        self._host, self._port = self._server.getsockname()[:2]
+
+    @property
+    def url(self) -> str:
+        """The pyserial URL of the socket."""
+        return f"socket://{self._host}:{self._port}"
+
+    def stop(self) -> None:
+        """Stop serving the simulated board and close the socket."""
+        super().stop()
+        self._server.close()
+
+    def _serve(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            with conn:
+                conn.settimeout(0.1)
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self._serve_client(conn)
+
+    def _serve_client(self, conn: socket.socket) -> None:
+        buffer = bytearray()
+        while not self._stop.is_set():
+            try:
+                data = conn.recv(4096)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            if not data:
+                # The client closed the connection
+                return
+            buffer += data
+            response = self._process(buffer)
+            if response:
+                conn.sendall(response)
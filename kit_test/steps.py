@@ -0,0 +1,249 @@
+"""
+Run a board test as named steps, concurrently where they don't conflict.
+
+Each step declares the resources it uses, such as an output, the battery current
+measurement or the operator's attention, and the steps it must run after.
+The StepRunner starts every step whose dependencies have finished and whose
+resources are free, so the operator can answer one step's prompt while the
+electrical checks that don't share its resources carry on in the background.
+When several steps are ready, the one declared first is started first.
+
+If a step raises, no further steps are started and the error is raised once
+the running steps have finished. The same goes for an error in the runner itself,
+such as a KeyboardInterrupt, so no step is left using the board after run returns.
+
+Each step runs in a copy of the runner's context. On a virtual clock the runner's
+own time doesn't move while it waits, so each step first catches up with the time
+its dependencies finished and its resources were released, and the runner catches
+up with the last step to finish before returning.
+"""
+import contextvars
+import logging
+import threading
+import time
+from typing import (
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+)
+
+from .hal import clock
+
+logger = logging.getLogger(__name__)
+
+# The resource of steps that need the operator to do or check something
+OPERATOR = 'operator'
+
+
+class Step:
+    """
+    A named part of a board test.
+
+    :param name: The name of the step, unique within the test.
+    :param run: The function that performs the step.
+    :param resources: The resources the step uses, no two steps using
+        the same resource run at the same time.
+    :param after: The names of the steps that must finish before this step starts.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        run: Callable[[], None],
+        resources: Iterable[str] = (),
+        after: Iterable[str] = (),
+    ) -> None:
+        self.name = name
+        self.run = run
+        self.resources: FrozenSet[str] = frozenset(resources)
+        self.after: FrozenSet[str] = frozenset(after)
+
+    def __repr__(self) -> str:
+        return f"<{self.__class__.__qualname__} {self.name!r}>"
+
+
+class StepTiming(NamedTuple):
+    """
+    When a step ran, relative to the start of the run.
+
+    :param name: The name of the step.
+    :param start: The time the step started, in seconds.
+    :param end: The time the step finished, in seconds.
+    """
+
+    name: str
+    start: float
+    end: float
+
+    @property
+    def duration(self) -> float:
+        """The time the step took, in seconds."""
+        return self.end - self.start
+
+
+class StepRunner:
+    """
+    Run a set of steps, each as soon as its dependencies and resources allow.
+
+    :param steps: The steps to run, in order of priority.
+    :param max_concurrent: The maximum number of steps to run at once, defaults to no limit.
+    :raises ValueError: If the step names aren't unique or a step depends
+        on a step that doesn't exist.
+    """
+
+    def __init__(self, steps: Sequence[Step], max_concurrent: Optional[int] = None) -> None:
+        names = [step.name for step in steps]
+        if len(set(names)) != len(names):
+            raise ValueError("Step names must be unique")
+        for step in steps:
+            unknown = step.after.difference(names)
+            if unknown:
+                raise ValueError(
+                    f"Step {step.name} runs after unknown steps {sorted(unknown)}")
+        self.steps = list(steps)
+        self.max_concurrent = max_concurrent
+        # The timing of each step that finished in the last run, in the order they finished
+        self.timings: List[StepTiming] = []
+
+        self._condition = threading.Condition()
+        self._held: Set[str] = set()
+        self._running: Dict[str, Step] = {}
+        self._done: Set[str] = set()
+        self._errors: List[BaseException] = []
+        self._start = 0.0
+        # The latest clock time a step finished at, which can be ahead of the runner's
+        # own time on a virtual clock
+        self._finished_at = 0.0
+        # The clock time each finished step finished at and each resource was released at
+        self._finish_times: Dict[str, float] = {}
+        self._released_at: Dict[str, float] = {}
+        # The clock time the run started at and the last step finished at
+        self._run_started_at = 0.0
+        self._last_finished_at = 0.0
+        # The number of steps started in the run
+        self._started = 0
+
+    def _ready(self, step: Step) -> bool:
+        return step.after.issubset(self._done) and self._held.isdisjoint(step.resources)
+
+    def run(self) -> None:
+        """
+        Run every step, returning once they have all finished.
+
+        :raises ValueError: If the remaining steps can never be started,
+            due to circular dependencies.
+        :raises BaseException: The first error raised by a step.
+        """
+        pending = list(self.steps)
+        self.timings = []
+        self._held = set()
+        self._running = {}
+        self._done = set()
+        self._errors = []
+        self._start = time.perf_counter()
+        self._finished_at = self._run_started_at = self._last_finished_at = clock.monotonic()
+        self._finish_times = {}
+        self._released_at = {}
+        self._started = 0
+
+        with self._condition:
+            try:
+                while pending or self._running:
+                    if self._errors:
+                        # Stop starting steps once one has failed
+                        pending.clear()
+                    for step in list(pending):
+                        if self.max_concurrent and len(self._running) >= self.max_concurrent:
+                            break
+                        if self._ready(step):
+                            pending.remove(step)
+                            self._start_step(step)
+
+                    if self._running:
+                        self._condition.wait()
+                    elif pending:
+                        raise ValueError(
+                            "Steps can never start, check for circular dependencies: "
+                            f"{', '.join(step.name for step in pending)}")
+            except BaseException:
+                self._wait_for_running()
+                raise
+
+        clock.wait_until(self._finished_at)
+        if self._errors:
+            raise self._errors[0]
+
+    def _wait_for_running(self) -> None:
+        """
+        Wait for the running steps to finish after the run was stopped by an error.
+
+        The caller resets the board once the error reaches it, so the steps mustn't
+        carry on using it. A second KeyboardInterrupt stops waiting.
+        """
+        if not self._running:
+            return
+        logger.warning(f"Waiting for running steps to finish: {', '.join(self._running)}")
+        try:
+            while self._running:
+                self._condition.wait()
+        except KeyboardInterrupt:
+            logger.warning(f"Abandoned running steps: {', '.join(self._running)}")
+
+    def _start_time(self, step: Step) -> float:
+        """
+        Return the clock time a step can start at.
+
+        This is when the steps it runs after finished and its resources were released,
+        and when a step freed its slot if it had to wait for one.
+        """
+        times = [self._run_started_at]
+        times.extend(self._finish_times[name] for name in step.after)
+        times.extend(
+            self._released_at[resource] for resource in step.resources
+            if resource in self._released_at)
+        if self.max_concurrent and self._started >= self.max_concurrent:
+            times.append(self._last_finished_at)
+        return max(times)
+
+    def _start_step(self, step: Step) -> None:
+        start_at = self._start_time(step)
+        self._running[step.name] = step
+        self._held.update(step.resources)
+        self._started += 1
+        logger.debug(f"Starting step {step.name}")
+        # Run the step in a copy of the runner's context, so it keeps the board's log tag
+        thread = threading.Thread(
+            target=contextvars.copy_context().run, args=(self._run_step, step, start_at),
+            name=f'step-{step.name}', daemon=True)
+        thread.start()
+
+    def _run_step(self, step: Step, start_at: float) -> None:
+        # Only moves the time of a virtual clock, the real clock has already passed it
+        clock.wait_until(start_at)
+        start = time.perf_counter() - self._start
+        try:
+            step.run()
+        except BaseException as e:
+            with self._condition:
+                self._errors.append(e)
+        finally:
+            end = time.perf_counter() - self._start
+            finished_at = clock.monotonic()
+            with self._condition:
+                self._finished_at = max(self._finished_at, finished_at)
+                self._last_finished_at = finished_at
+                self._finish_times[step.name] = finished_at
+                for resource in step.resources:
+                    self._released_at[resource] = finished_at
+                del self._running[step.name]
+                self._held.difference_update(step.resources)
+                self._done.add(step.name)
+                self.timings.append(StepTiming(step.name, start, end))
+                self._condition.notify_all()
+            logger.debug(f"Finished step {step.name} in {end - start:.3f}s")
@@ -0,0 +1,158 @@
+"""
+Time the phases of a board test.
+
+Each test times its phases, such as discovering the board, connecting to it,
+each test step and each operator prompt, with a PhaseTimer. The durations are
+saved as 'time_<phase>' fields of the test's results, alongside the total time
+of the test and the local time it started at, and a TimingSummary collects them
+over a run of tests so the slowest phases can be logged at the end.
+
+Steps that run concurrently are each timed in full, so the phase durations of
+a test can add up to more than its total.
+"""
+import contextlib
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List
+
+from .steps import StepRunner
+
+TIMING_PREFIX = 'time_'
+TOTAL_PHASE = 'total'
+# The field the local time the test started at is saved to, in ISO 8601 format
+STARTED_FIELD = 'started_at'
+
+
+def timing_fieldnames(phases: Iterable[str]) -> List[str]:
+    """
+    The results fields the durations of a test's phases are saved to.
+
+    :param phases: The names of the phases the test times.
+    :return: The field of the start time, the field of each phase,
+        then the field of the total time.
+    """
+    return [STARTED_FIELD] + [f'{TIMING_PREFIX}{phase}' for phase in [*phases, TOTAL_PHASE]]
+
+
+class PhaseTimer:
+    """The durations of the phases of a single test, timed from when it was created."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.started_at = datetime.now()
+        self.durations: Dict[str, float] = {}
+        # Steps are timed from their own threads
+        self._lock = threading.Lock()
+
+    def fork(self) -> 'PhaseTimer':
+        """
+        Copy the timer, for timing one of several boards tested after the phases so far.
+
+        :return: A timer with the same start time and phase durations.
+        """
+        timer = PhaseTimer()
+        timer.start = self.start
+        timer.started_at = self.started_at
+        with self._lock:
+            timer.durations = dict(self.durations)
+        return timer
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Time the body of a with block as a phase.
+
+        The phase is recorded even if the block raises.
+
+        :param name: The name of the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, duration: float) -> None:
+        """
+        Record the duration of a phase, adding to any time already recorded for it.
+
+        :param name: The name of the phase.
+        :param duration: The time the phase took, in seconds.
+        """
+        with self._lock:
+            self.durations[name] = self.durations.get(name, 0.0) + duration
+
+    def run_steps(self, runner: StepRunner) -> None:
+        """
+        Run a set of steps, recording each step that finished as a phase.
+
+        :param runner: The steps to run.
+        """
+        try:
+            runner.run()
+        finally:
+            for timing in runner.timings:
+                self.record(timing.name, timing.duration)
+
+    def total(self) -> float:
+        """Return the time since the timer was created, in seconds."""
+        return time.perf_counter() - self.start
+
+    def phases(self) -> Dict[str, float]:
+        """Return the duration of each phase so far, along with the total time."""
+        with self._lock:
+            durations = dict(self.durations)
+        durations[TOTAL_PHASE] = self.total()
+        return durations
+
+    def save(self, results: Dict[str, Any]) -> None:
+        """
+        Save the start time, the duration of each phase and the total time to the results.
+
+        :param results: The results of the test.
+        """
+        results[STARTED_FIELD] = self.started_at.isoformat(timespec='seconds')
+        for name, duration in self.phases().items():
+            results[f'{TIMING_PREFIX}{name}'] = round(duration, 3)
+
+
+class TimingSummary:
+    """The phase durations of every test in a run."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._durations: Dict[str, List[float]] = {}
+
+    def add(self, timer: PhaseTimer) -> None:
+        """
+        Add the phase durations of a finished test.
+
+        :param timer: The timer of the test.
+        """
+        with self._lock:
+            for name, duration in timer.phases().items():
+                self._durations.setdefault(name, []).append(duration)
+
+    def format(self) -> List[str]:
+        """
+        Format the durations of each phase as a table for logging, slowest first.
+
+        :return: The lines of the table.
+        """
+        with self._lock:
+            durations = {name: list(values) for name, values in self._durations.items()}
+        if not durations:
+            return []
+
+        lines = [
+            f"Timing of {len(durations[TOTAL_PHASE])} tests:",
+            f"  {'phase':<20} {'count':>6} {'mean s':>8} {'max s':>8} {'total s':>9}",
+        ]
+        phases = sorted(
+            durations.items(), key=lambda item: (item[0] != TOTAL_PHASE, -sum(item[1])))
+        for name, values in phases:
+            lines.append(
+                f"  {name:<20} {len(values):>6} {sum(values) / len(values):>8.3f} "
+                f"{max(values):>8.3f} {sum(values):>9.3f}")
+        return lines
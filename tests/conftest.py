@@ -0,0 +1,34 @@
+"""Fixtures for testing the HAL against the simulator."""
+from __future__ import annotations
+
+from typing import Iterator
+
+import pytest
+
+from kit_test.simulator import SimulatedPowerBoard, SocketTransport
+
+
+class RecordingPowerBoard(SimulatedPowerBoard):
+    """A simulated power board that keeps every command it receives."""
+
+    def __init__(self) -> None:
+        super().__init__(asset_tag='SIM-PWR')
+        self.received: list[str] = []
+
+    def handle_command(self, command: str) -> str:
+        """Record the command, then process it as usual."""
+        self.received.append(command)
+        return super().handle_command(command)
+
+
+@pytest.fixture
+def power_sim() -> RecordingPowerBoard:
+    """A simulated power board."""
+    return RecordingPowerBoard()
+
+
+@pytest.fixture
+def power_url(power_sim: RecordingPowerBoard) -> Iterator[str]:
+    """The URL of the simulated power board, served over a socket."""
+    with SocketTransport(power_sim) as transport:
+        yield transport.url
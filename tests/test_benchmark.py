@@ -0,0 +1,60 @@
+"""Tests for comparing benchmark runs."""
+from unittest import mock
+
+import pytest
+
+from kit_test.benchmark import BenchmarkContext, bench_servo_test, compare_runs, find_baseline
+
+
+def test_find_baseline_matches_config() -> None:
+    """The baseline is the latest run with the same settings."""
+    config = {'transport': 'socket', 'latency': 0.001}
+    history = [
+        {'timestamp': 1, 'transport': 'socket', 'latency': 0.001},
+        {'timestamp': 2, 'transport': 'socket', 'latency': 0.001},
+        {'timestamp': 3, 'transport': 'loopback', 'latency': 0.001},
+    ]
+    baseline = find_baseline(history, config)
+    assert baseline is not None
+    assert baseline['timestamp'] == 2
+
+
+def test_find_baseline_none() -> None:
+    """Without a run with the same settings there is no baseline."""
+    history = [{'timestamp': 1, 'transport': 'socket', 'latency': 0.01}]
+    assert find_baseline(history, {'transport': 'socket', 'latency': 0.001}) is None
+    assert find_baseline([], {}) is None
+
+
+def test_compare_runs_flags_regressions() -> None:
+    """Slower times and lower rates beyond the threshold are regressions."""
+    previous = {'query': {'mean_s': 1.0, 'queries_per_s': 100.0, 'p99_s': 2.0}}
+    current = {'query': {'mean_s': 1.2, 'queries_per_s': 80.0, 'p99_s': 2.05}}
+    assert compare_runs(previous, current, threshold=0.1) == [
+        'query.mean_s', 'query.queries_per_s']
+
+
+@pytest.mark.parametrize('previous', [
+    {},
+    {'query': {}},
+    {'query': {'mean_s': 0.0}},
+])
+def test_compare_runs_without_previous_value(previous: dict) -> None:
+    """Metrics with nothing to compare against are never regressions."""
+    assert compare_runs(previous, {'query': {'mean_s': 1.0}}, threshold=0.1) == []
+
+
+def test_compare_runs_improvements() -> None:
+    """Faster times and higher rates aren't regressions."""
+    previous = {'query': {'mean_s': 1.0, 'queries_per_s': 100.0}}
+    current = {'query': {'mean_s': 0.5, 'queries_per_s': 200.0}}
+    assert compare_runs(previous, current, threshold=0.1) == []
+
+
+def test_board_test_benchmark_is_unattended() -> None:
+    """The board test benchmarks run against the simulator without asking the operator."""
+    ctx = BenchmarkContext('socket', latency=0, iterations=1, virtual_clock=True)
+    with mock.patch('builtins.input', side_effect=AssertionError("Asked the operator")):
+        results = bench_servo_test(ctx)
+    assert results['wall_time_s'] > 0
+    assert results['virtual_sleep_s'] > 0
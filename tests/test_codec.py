@@ -0,0 +1,64 @@
+"""Tests for encoding commands and decoding responses."""
+from __future__ import annotations
+
+import pytest
+from conftest import RecordingPowerBoard
+
+from kit_test.hal.codec import (
+    can_resend,
+    decode_command,
+    decode_response,
+    encode_command,
+    encode_set,
+    is_query,
+    parse_bool,
+    parse_fields,
+    parse_milli,
+)
+from kit_test.hal.power_board import PowerBoard
+
+
+def test_encode_command() -> None:
+    """Commands are encoded with a trailing newline and decoded without one."""
+    command = encode_command('OUT:0:I?')
+    assert command == b'OUT:0:I?\n'
+    assert encode_set(b'SERVO:7:SET:', -1500) == b'SERVO:7:SET:-1500\n'
+    assert decode_command(command) == 'OUT:0:I?'
+
+
+@pytest.mark.parametrize('commands,resend', [
+    ([], True),
+    ([b'OUT:0:SET:1\n'], True),
+    ([b'OUT:0:I?\n', b'OUT:1:I?\n'], True),
+    ([b'OUT:0:I?\n', b'OUT:1:SET:1\n'], False),
+])
+def test_can_resend(commands: list[bytes], resend: bool) -> None:
+    """Only queries, or a single write, are sent again after a failure."""
+    assert can_resend(commands) == resend
+
+
+def test_parse_responses() -> None:
+    """Responses are parsed without decoding them first."""
+    assert is_query(b'*STATUS?\n')
+    assert not is_query(b'*RESET\n')
+    assert parse_milli(b'-1250') == pytest.approx(-1.25)
+    assert parse_bool(b'1')
+    assert not parse_bool(b'0')
+    assert parse_fields(b'0,0:25:1') == [b'0,0', b'25', b'1']
+    assert decode_response(b'NACK:Invalid') == 'NACK:Invalid'
+
+
+def test_board_reads_through_codec(power_sim: RecordingPowerBoard, power_url: str) -> None:
+    """The board's pre-encoded commands read the simulated board's values."""
+    board = PowerBoard(power_url)
+    try:
+        board.outputs[0].enable(True)
+        assert board.outputs[0].is_enabled()
+        expected = power_sim.output_current(0)
+        assert board.outputs[0].current() == pytest.approx(expected, abs=0.001)
+        assert not board.outputs[0].overcurrent()
+        assert board.battery_sensor.voltage() == pytest.approx(power_sim.battery_voltage)
+    finally:
+        board.close()
+    assert power_sim.received[1:] == [
+        'OUT:0:SET:1', 'OUT:0:GET?', 'OUT:0:I?', '*STATUS?', 'BATT:V?']
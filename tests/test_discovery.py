@@ -0,0 +1,67 @@
+"""Tests for discovering boards from sysfs."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from kit_test.hal import discovery
+from kit_test.hal.discovery import Port, VidPid, clear_discovery_cache, discover_boards
+from kit_test.hal.utils import BoardIdentity
+
+POWER_BOARD = VidPid(0x1BDA, 0x0010)
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="Needs symlinks")
+
+
+@pytest.fixture
+def usb_device(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[Path]:
+    """A fake sysfs tree with a single USB serial board, returning its USB device."""
+    device = tmp_path / 'devices' / 'usb1' / '1-1'
+    interface = device / '1-1:1.0'
+    interface.mkdir(parents=True)
+    (tmp_path / 'bus' / 'usb').mkdir(parents=True)
+    (interface / 'subsystem').symlink_to(tmp_path / 'bus' / 'usb')
+    tty = tmp_path / 'class' / 'tty' / 'ttyACM0'
+    tty.mkdir(parents=True)
+    (tty / 'device').symlink_to(interface)
+    (tmp_path / 'class' / 'tty' / 'ttyS0').mkdir()
+
+    for name, value in {
+        'idVendor': '1bda',
+        'idProduct': '0010',
+        'manufacturer': 'Student Robotics',
+        'product': 'PBv4B',
+        'serial': 'FIRST',
+        'devnum': '5',
+    }.items():
+        (device / name).write_text(value + '\n')
+
+    monkeypatch.setattr(discovery, 'SYSFS_TTY', tmp_path / 'class' / 'tty')
+    clear_discovery_cache()
+    yield device
+    clear_discovery_cache()
+
+
+def test_discover_sysfs(usb_device: Path) -> None:
+    """Matching USB serial devices are found with their USB descriptor."""
+    assert discover_boards(POWER_BOARD) == [
+        Port('/dev/ttyACM0', BoardIdentity('Student Robotics', 'PBv4B', 'FIRST'))]
+    assert discover_boards(VidPid(0x1BDA, 0x0011)) == []
+
+
+def test_identity_cached(usb_device: Path) -> None:
+    """The descriptor is reused until the device is reconnected or the cache cleared."""
+    discover_boards(POWER_BOARD)
+    (usb_device / 'serial').write_text('SECOND\n')
+    assert discover_boards(POWER_BOARD)[0].identity.asset_tag == 'FIRST'
+
+    # A reconnected device has a new device number
+    (usb_device / 'devnum').write_text('6\n')
+    assert discover_boards(POWER_BOARD)[0].identity.asset_tag == 'SECOND'
+
+    (usb_device / 'serial').write_text('THIRD\n')
+    clear_discovery_cache()
+    assert discover_boards(POWER_BOARD)[0].identity.asset_tag == 'THIRD'
@@ -0,0 +1,90 @@
+"""Tests for checking measurements against their limits."""
+import pytest
+
+from kit_test.limits import FAILURES_FIELD, Limit, LimitChecker, pass_fieldnames
+
+
+def test_bounds_description() -> None:
+    """A limit from bounds is described by its center and half-width."""
+    limit = Limit.bounds('voltage', 'V', 11.0, 13.0)
+    assert (limit.min, limit.max) == (11.0, 13.0)
+    assert limit.description == "12.00±1.00V"
+
+
+def test_nominal_range() -> None:
+    """A nominal limit allows the fractional tolerance plus the absolute offset."""
+    limit = Limit.nominal('current', 'A', 2.0, 0.1, offset=0.05)
+    assert limit.min == pytest.approx(1.75)
+    assert limit.max == pytest.approx(2.25)
+    assert limit.description == "2.00±10%±0.05A"
+    assert Limit.nominal('current', 'A', 2.0, 0.1).description == "2.00±10%"
+
+
+def test_passes_excludes_bounds() -> None:
+    """Values on the bounds are outside the limit."""
+    limit = Limit.bounds('voltage', 'V', 11.0, 13.0)
+    assert limit.passes(12.0)
+    assert not limit.passes(11.0)
+    assert not limit.passes(13.0)
+
+
+def test_failure_message() -> None:
+    """The failure message names the measurement, its value and the range."""
+    limit = Limit.bounds('voltage', 'V', 11.0, 13.0)
+    assert limit.failure_message(10.5) == (
+        "Voltage of 10.500V is outside acceptable range of 12.00±1.00V.")
+
+
+def test_pass_fieldnames() -> None:
+    """Each checked field has a pass field, in the same order."""
+    assert pass_fieldnames(['a', 'b']) == ['a_pass', 'b_pass']
+
+
+def test_check_records_results() -> None:
+    """Checks save the value and whether it passed, collecting every failure."""
+    results: dict = {}
+    checker = LimitChecker(results, {
+        'volt': Limit.bounds('voltage', 'V', 11.0, 13.0),
+        'amps': Limit.bounds('current', 'A', 0.0, 1.0),
+    })
+
+    assert checker.check('volt', 12.0)
+    assert not checker.check('amps', 1.5)
+    assert results['volt'] == pytest.approx(12.0)
+    assert results['volt_pass'] is True
+    assert results['amps'] == pytest.approx(1.5)
+    assert results['amps_pass'] is False
+    assert results[FAILURES_FIELD] == 'amps'
+    assert not checker.passed
+
+
+def test_check_with_explicit_limit() -> None:
+    """A limit given to check is used instead of the table."""
+    results: dict = {}
+    checker = LimitChecker(results)
+    assert checker.check('volt', 5.0, Limit.bounds('voltage', 'V', 4.5, 5.5))
+    with pytest.raises(KeyError):
+        checker.check('other', 5.0)
+
+
+def test_require() -> None:
+    """Conditions are recorded like measurements."""
+    results: dict = {}
+    checker = LimitChecker(results)
+    assert checker.require('fan', True, "Fan didn't turn")
+    assert not checker.require('leds', False, "LEDs didn't light")
+    assert results['fan_pass'] is True
+    assert results['leds_pass'] is False
+    assert checker.failure_messages() == ["LEDs didn't light"]
+
+
+def test_assert_passed() -> None:
+    """assert_passed lists every failure in the order they occurred."""
+    checker = LimitChecker({})
+    checker.assert_passed()
+
+    checker.fail('a', "First.")
+    checker.fail('b', "Second.")
+    with pytest.raises(AssertionError, match=r"^2 checks failed: First\. Second\.$"):
+        checker.assert_passed()
+    assert checker.results[FAILURES_FIELD] == 'a;b'
@@ -0,0 +1,64 @@
+"""Tests for sharing a board between threads through the request multiplexer."""
+from __future__ import annotations
+
+import threading
+
+import pytest
+from conftest import RecordingPowerBoard
+
+from kit_test.hal.serial_wrapper import SerialWrapper
+
+
+def test_concurrent_queries(power_sim: RecordingPowerBoard, power_url: str) -> None:
+    """Queries from several threads each get the response to their own command."""
+    power_sim.outputs[:6] = [True, False, True, False, False, True]
+    wrapper = SerialWrapper(power_url, 115200, multiplexed=True)
+    errors: list[str] = []
+
+    def check_output(index: int) -> None:
+        expected = str(int(power_sim.outputs[index]))
+        for _ in range(50):
+            response = wrapper.query(f'OUT:{index}:GET?')
+            if response != expected:
+                errors.append(f'Output {index} returned {response}')
+
+    threads = [threading.Thread(target=check_output, args=(index,)) for index in range(6)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        wrapper.stop()
+    assert errors == []
+    assert len(power_sim.received) == 6 * 50
+
+
+def test_nack_fails_only_its_request(power_sim: RecordingPowerBoard, power_url: str) -> None:
+    """A rejected command fails its own request, not the others sent with it."""
+    wrapper = SerialWrapper(power_url, 115200, multiplexed=True)
+    try:
+        identity = wrapper.submit_query('*IDN?')
+        invalid = wrapper.submit_query('OUT:9:GET?')
+        write = wrapper.submit_write('OUT:1:SET:1')
+        battery = wrapper.submit_query('BATT:V?')
+        assert identity.result().split(':')[2] == 'SIM-PWR'
+        with pytest.raises(RuntimeError):
+            invalid.result()
+        assert write.result() is None
+        assert int(battery.result()) == int(power_sim.battery_voltage * 1000)
+        wrapper.flush()
+    finally:
+        wrapper.stop()
+    assert power_sim.outputs[1]
+
+
+def test_failed_write_raised_by_flush(power_url: str) -> None:
+    """A fire-and-forget write that is rejected is raised by the next flush."""
+    wrapper = SerialWrapper(power_url, 115200, multiplexed=True)
+    try:
+        wrapper.submit_write('OUT:4:SET:0')
+        with pytest.raises(RuntimeError):
+            wrapper.flush()
+    finally:
+        wrapper.stop()
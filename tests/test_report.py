@@ -0,0 +1,122 @@
+"""Tests for the station throughput report."""
+import csv
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pytest
+
+from kit_test import report
+from kit_test.report import ResultTable, boards_per_hour, describe
+
+
+def write_csv(path: Path, rows: List[Dict[str, str]]) -> Path:
+    """Write rows to a CSV with the columns of the first row."""
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return path
+
+
+def row(asset: str, passed: bool, started: str, **fields: str) -> Dict[str, str]:
+    """Return a result row."""
+    return {
+        'asset': asset, 'passed': str(passed), 'started_at': started,
+        'time_total': '60', **fields}
+
+
+@pytest.fixture
+def results(tmp_path: Path) -> Path:
+    """Three boards, one failing its first test and passing its retest."""
+    return write_csv(tmp_path / 'results.csv', [
+        row('A', True, '2024-01-01T10:00:00', volt='12.0', failures=''),
+        row('B', False, '2024-01-01T10:02:00', volt='10.0', failures='volt'),
+        row('C', True, '2024-01-01T10:04:00', volt='12.2', failures=''),
+        row('B', True, '2024-01-01T10:06:00', volt='11.8', failures=''),
+    ])
+
+
+def test_read_types(results: Path) -> None:
+    """Identifying fields stay strings and measurements become numbers."""
+    table = ResultTable.read([results])
+    assert table.num_rows == 4
+    assert list(table.column('asset')) == ['A', 'B', 'C', 'B']
+    volt = table.numeric('volt')
+    assert volt is not None
+    assert list(volt) == [12.0, 10.0, 12.2, 11.8]
+    assert table.numeric('asset') is None
+
+
+def test_read_in_chunks(results: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Reading a file in several chunks gives the same table."""
+    whole = ResultTable.read([results])
+    monkeypatch.setattr(report, 'CHUNK_ROWS', 3)
+    chunked = ResultTable.read([results])
+    assert chunked.num_rows == whole.num_rows
+    assert list(chunked.column('asset')) == list(whole.column('asset'))
+    np.testing.assert_array_equal(chunked.numeric('volt'), whole.numeric('volt'))
+
+
+def test_read_combines_columns(tmp_path: Path) -> None:
+    """Files with different columns are combined, with gaps where a file lacks a column."""
+    first = write_csv(tmp_path / 'first.csv', [{'asset': 'A', 'volt': '12'}])
+    second = write_csv(tmp_path / 'second.csv', [{'asset': 'B', 'amps': 'high'}])
+    table = ResultTable.read([first, second])
+    volt = table.numeric('volt')
+    assert volt is not None
+    assert volt[0] == pytest.approx(12.0) and np.isnan(volt[1])
+    assert table.numeric('amps') is None
+    assert list(table.column('serial')) == ['', '']
+
+
+def test_read_skips_misaligned_rows(tmp_path: Path) -> None:
+    """Rows with a different number of values than the header are skipped."""
+    path = tmp_path / 'results.csv'
+    path.write_text("asset,volt\nA,12\nB,11,extra\n")
+    table = ResultTable.read([path])
+    assert list(table.column('asset')) == ['A']
+
+
+def test_report(results: Path) -> None:
+    """The report counts tests, boards, yields, retests and failures."""
+    lines = report.report(ResultTable.read([results]), session_gap=1800)
+    assert "Tests: 4, passed: 3 (75.0%)" in lines
+    assert "Boards: 3" in lines
+    assert "First-pass yield: 66.7%, final yield: 100.0%" in lines
+    assert any(line.startswith("Retests: 1, 1 boards retested") for line in lines)
+    assert any(line.split() == ['B', '1', 'retests,', 'passed'] for line in lines)
+    # Four tests from 10:00 to 10:07 is 7 minutes of use
+    assert f"Boards per hour: {4 / 420 * 3600:.1f}" in lines
+    assert any(line.split() == ['volt', '1'] for line in lines)
+    assert any(line.split()[:2] == ['volt', '4'] for line in lines)
+
+
+def test_report_empty(tmp_path: Path) -> None:
+    """An empty log has no results."""
+    path = tmp_path / 'empty.csv'
+    path.write_text('')
+    assert report.report(ResultTable.read([path])) == ["No results"]
+
+
+def test_boards_per_hour_session_gap() -> None:
+    """Gaps longer than the session gap only count the test's own time."""
+    started = np.array(
+        ['2024-01-01T10:00:00', '2024-01-01T10:01:00', '2024-01-01T12:00:00'],
+        dtype='datetime64[s]')
+    durations = np.array([30.0, 30.0, 30.0])
+    # 60s until the second test, then 30s for each of the others
+    assert boards_per_hour(started, durations, session_gap=600) == pytest.approx(
+        3 / 120 * 3600)
+    assert boards_per_hour(
+        np.array(['NaT'], dtype='datetime64[s]'), np.array([30.0]), 600) is None
+
+
+def test_describe() -> None:
+    """Distributions ignore missing values."""
+    stats = describe(np.array([1.0, np.nan, 3.0]))
+    assert stats is not None
+    assert stats['count'] == 2
+    assert stats['mean'] == pytest.approx(2.0)
+    assert (stats['min'], stats['max']) == (1.0, 3.0)
+    assert describe(np.array([np.nan])) is None
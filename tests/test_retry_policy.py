@@ -0,0 +1,81 @@
+"""Tests for retrying calls and failing fast once a board stops responding."""
+from __future__ import annotations
+
+import pytest
+from conftest import RecordingPowerBoard
+
+from kit_test.hal import clock
+from kit_test.hal.retry_policy import CircuitBreaker, CircuitOpenError, RetryPolicy
+from kit_test.hal.serial_wrapper import SerialWrapper
+from kit_test.hal.utils import BoardDisconnectionError
+from kit_test.simulator import SocketTransport
+
+
+def test_delay_backoff() -> None:
+    """The delay grows by the multiplier up to the maximum."""
+    policy = RetryPolicy(base_delay=0.1, max_delay=0.3, multiplier=2, jitter=0)
+    assert [policy.delay(retry) for retry in range(4)] == pytest.approx([0.1, 0.2, 0.3, 0.3])
+
+
+def test_call_retries_until_success() -> None:
+    """A failing call is retried with the policy's delays until it succeeds."""
+    failures = [BoardDisconnectionError('Simulated failure')] * 2
+    policy = RetryPolicy(attempts=3, base_delay=0.1, jitter=0)
+
+    def call() -> str:
+        if failures:
+            raise failures.pop()
+        return 'ACK'
+
+    virtual = clock.VirtualClock()
+    with clock.use_clock(virtual):
+        assert policy.call(call) == 'ACK'
+    assert virtual.slept == pytest.approx(0.3)
+
+
+def test_half_open_allows_one_probe() -> None:
+    """Once the reset timeout has passed, only one call may probe the board."""
+    breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=1.0)
+    with clock.use_clock(clock.VirtualClock()):
+        breaker.record_failure()
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+        clock.sleep(1.0)
+        assert breaker.check() == CircuitBreaker.HALF_OPEN
+        with pytest.raises(CircuitOpenError):
+            breaker.check()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_against_simulator(power_sim: RecordingPowerBoard) -> None:
+    """The breaker fails fast while the board is gone and closes once it answers again."""
+    # Bind a free port for the board, but don't serve it yet
+    offline = SocketTransport(power_sim)
+    url = offline.url
+    offline.stop()
+
+    breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=1.0)
+    wrapper = SerialWrapper(
+        url, 115200,
+        retry_policy=RetryPolicy(attempts=2, jitter=0),
+        circuit_breaker=breaker,
+    )
+    try:
+        with clock.use_clock(clock.VirtualClock()):
+            for _ in range(2):
+                with pytest.raises(BoardDisconnectionError) as error:
+                    wrapper.query('*IDN?')
+                assert not isinstance(error.value, CircuitOpenError)
+            assert breaker.state == CircuitBreaker.OPEN
+            with pytest.raises(CircuitOpenError):
+                wrapper.query('*IDN?')
+
+            clock.sleep(1.0)
+            port = int(url.rsplit(':', 1)[1])
+            with SocketTransport(power_sim, port=port):
+                assert wrapper.query('*IDN?').split(':')[2] == 'SIM-PWR'
+            assert breaker.state == CircuitBreaker.CLOSED
+    finally:
+        wrapper.stop()
+    assert power_sim.received == ['*IDN?']
@@ -0,0 +1,91 @@
+"""Tests for batching and retrying commands in the serial wrapper."""
+from __future__ import annotations
+
+import pytest
+import serial
+from conftest import RecordingPowerBoard
+
+from kit_test.hal import clock
+from kit_test.hal.serial_wrapper import SerialWrapper
+from kit_test.hal.utils import BoardDisconnectionError
+
+CURRENT_QUERIES = ['OUT:0:I?', 'OUT:1:I?', 'OUT:2:I?', 'OUT:3:I?']
+
+
+def fail_readline(monkeypatch: pytest.MonkeyPatch, call: int) -> None:
+    """Make the serial connection fail while reading the given response, once."""
+    readline = SerialWrapper._readline
+    calls = 0
+
+    def flaky_readline(self: SerialWrapper) -> bytes:
+        nonlocal calls
+        calls += 1
+        if calls == call:
+            raise serial.SerialException('Simulated failure')
+        return readline(self)
+
+    monkeypatch.setattr(SerialWrapper, '_readline', flaky_readline)
+
+
+def test_query_multi(power_sim: RecordingPowerBoard, power_url: str) -> None:
+    """A batch of queries is answered in order."""
+    wrapper = SerialWrapper(power_url, 115200)
+    try:
+        responses = wrapper.query_multi(['*IDN?', 'OUT:1:GET?', 'BATT:V?'])
+    finally:
+        wrapper.stop()
+    assert responses[0].split(':')[2] == 'SIM-PWR'
+    assert responses[1] == '0'
+    assert int(responses[2]) == int(power_sim.battery_voltage * 1000)
+    assert power_sim.received == ['*IDN?', 'OUT:1:GET?', 'BATT:V?']
+
+
+def test_retry_only_unanswered(
+    power_sim: RecordingPowerBoard,
+    power_url: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """After a failure mid-batch only the queries that weren't answered are sent again."""
+    fail_readline(monkeypatch, call=3)
+    wrapper = SerialWrapper(power_url, 115200)
+    try:
+        with clock.use_clock(clock.VirtualClock()):
+            responses = wrapper.query_multi(CURRENT_QUERIES)
+    finally:
+        wrapper.stop()
+    assert len(responses) == len(CURRENT_QUERIES)
+    assert power_sim.received == [*CURRENT_QUERIES, 'OUT:2:I?', 'OUT:3:I?']
+
+
+def test_unanswered_writes_not_resent(
+    power_sim: RecordingPowerBoard,
+    power_url: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Several writes that may have been applied are not sent again."""
+    fail_readline(monkeypatch, call=1)
+    commands = ['OUT:0:SET:1', 'OUT:1:SET:1']
+    wrapper = SerialWrapper(power_url, 115200)
+    try:
+        with clock.use_clock(clock.VirtualClock()), pytest.raises(BoardDisconnectionError):
+            wrapper.query_multi(commands)
+    finally:
+        wrapper.stop()
+    assert power_sim.received == commands
+
+
+def test_framing_many_responses_per_read(
+    power_sim: RecordingPowerBoard,
+    power_url: str,
+) -> None:
+    """Responses that arrive together are split into lines in step with the commands."""
+    power_sim.outputs[2] = True
+    commands = [f'OUT:{index % 7}:GET?' for index in range(70)]
+    wrapper = SerialWrapper(power_url, 115200)
+    try:
+        responses = wrapper.query_multi(commands)
+        # Nothing is left over to be read as the response to the next command
+        assert wrapper.query('OUT:2:GET?') == '1'
+    finally:
+        wrapper.stop()
+    assert responses == [str(int(power_sim.outputs[index % 7])) for index in range(70)]
@@ -0,0 +1,47 @@
+"""Tests for keeping boards connected between tests."""
+from __future__ import annotations
+
+from conftest import RecordingPowerBoard
+
+from kit_test.hal.discovery import Port
+from kit_test.hal.power_board import PowerBoard
+from kit_test.hal.session_pool import SessionPool
+from kit_test.hal.utils import BoardIdentity
+
+
+def test_board_reused(power_sim: RecordingPowerBoard, power_url: str) -> None:
+    """The same board on the same port is only connected and identified once."""
+    port = Port(power_url, BoardIdentity(asset_tag='USB-SERIAL'))
+    with SessionPool() as pool:
+        board = pool.board(PowerBoard, port)
+        assert pool.board(PowerBoard, port) is board
+        assert pool.serial(port) is pool.serial(port)
+        assert board.identity == BoardIdentity('Student Robotics', 'PBv4B', 'SIM-PWR', '4.4')
+        board.outputs[0].enable(True)
+    assert power_sim.received == ['*IDN?', 'OUT:0:SET:1']
+
+
+def test_identity_skips_identify(power_sim: RecordingPowerBoard, power_url: str) -> None:
+    """A board given its identity doesn't ask the board for it."""
+    identity = BoardIdentity('Student Robotics', 'PBv4B', 'SIM-PWR', '4.4')
+    board = PowerBoard(power_url, identity=identity)
+    try:
+        assert board.identity == identity
+        board.outputs[0].enable(True)
+    finally:
+        board.close()
+    assert power_sim.received == ['OUT:0:SET:1']
+
+
+def test_new_board_on_port(power_sim: RecordingPowerBoard, power_url: str) -> None:
+    """A different board on a port replaces the previous board's connection."""
+    first = Port(power_url, BoardIdentity(asset_tag='FIRST'))
+    second = Port(power_url, BoardIdentity(asset_tag='SECOND'))
+    with SessionPool() as pool:
+        first_board = pool.board(PowerBoard, first)
+        second_board = pool.board(PowerBoard, second)
+        assert second_board is not first_board
+        assert pool.board(PowerBoard, second) is second_board
+        pool.prune([])
+        assert pool.board(PowerBoard, second) is not second_board
+    assert power_sim.received == ['*IDN?'] * 3
@@ -0,0 +1,64 @@
+"""Tests for waiting for a measurement to settle, on a virtual clock."""
+from typing import Callable, List
+
+import pytest
+
+from kit_test.hal import clock
+from kit_test.hal.clock import VirtualClock, use_clock
+from kit_test.hal.settle import wait_until_settled
+
+
+def decaying(start: float, target: float, time_constant: float) -> Callable[[], float]:
+    """Return a reading that approaches the target, halving the difference each period."""
+    begin = clock.monotonic()
+
+    def read() -> float:
+        elapsed = clock.monotonic() - begin
+        return float(target + (start - target) * 0.5 ** (elapsed / time_constant))
+    return read
+
+
+def test_settles_after_decay() -> None:
+    """A decaying value is returned once the readings agree."""
+    with use_clock(VirtualClock()) as virtual:
+        value = wait_until_settled(
+            decaying(5.0, 1.0, 0.1), tolerance=0.01, timeout=5.0, update_period=0)
+        assert value == pytest.approx(1.0, abs=0.02)
+        assert 0.5 < virtual.monotonic() < 5.0
+
+
+def test_constant_value_settles_quickly() -> None:
+    """A steady value settles after the minimum number of readings."""
+    with use_clock(VirtualClock()) as virtual:
+        assert wait_until_settled(
+            lambda: 3.0, tolerance=0.01, interval=0.05, samples=3,
+            min_time=0.1, update_period=0) == pytest.approx(3.0)
+        assert virtual.monotonic() == pytest.approx(0.2)
+
+
+def test_timeout_returns_last_reading() -> None:
+    """A value that never settles is returned at the timeout."""
+    readings: List[float] = []
+
+    def read() -> float:
+        readings.append(float(len(readings)))
+        return readings[-1]
+
+    with use_clock(VirtualClock()) as virtual:
+        value = wait_until_settled(read, tolerance=0.1, timeout=1.0, update_period=0)
+        assert value == readings[-1]
+        assert virtual.monotonic() == pytest.approx(1.0)
+
+
+def test_readings_span_update_period() -> None:
+    """The readings compared are spread over at least one sensor update."""
+    times: List[float] = []
+
+    def read() -> float:
+        times.append(clock.monotonic())
+        return 1.0
+
+    with use_clock(VirtualClock()):
+        wait_until_settled(read, tolerance=0.01, interval=0.01, samples=3, update_period=0.2)
+    assert times[0] >= 0.2
+    assert times[-1] - times[0] >= 0.2 - 1e-9
@@ -0,0 +1,61 @@
+"""Tests for skipping commands that set a channel to the value it already has."""
+from __future__ import annotations
+
+from typing import Iterator
+
+import pytest
+from conftest import RecordingPowerBoard
+
+from kit_test.hal.power_board import PowerBoard
+from kit_test.hal.utils import BoardIdentity
+
+IDENTITY = BoardIdentity('Student Robotics', 'PBv4B', 'SIM-PWR', '4.4')
+
+
+@pytest.fixture
+def board(power_url: str) -> Iterator[PowerBoard]:
+    """A power board with the shadow cache enabled."""
+    board = PowerBoard(power_url, shadow_cache=True, identity=IDENTITY)
+    yield board
+    board.close()
+
+
+def test_redundant_set_skipped(power_sim: RecordingPowerBoard, board: PowerBoard) -> None:
+    """Setting a channel to the value it was last set to sends nothing."""
+    board.outputs[0].enable(True)
+    board.outputs[0].enable(True)
+    board.run_led.on()
+    board.run_led.on()
+    board.outputs[0].enable(False)
+    assert power_sim.received == ['OUT:0:SET:1', 'LED:RUN:SET:1', 'OUT:0:SET:0']
+
+
+def test_disabled_by_default(power_sim: RecordingPowerBoard, power_url: str) -> None:
+    """Without the cache every command is sent."""
+    board = PowerBoard(power_url, identity=IDENTITY)
+    try:
+        board.outputs[0].enable(True)
+        board.outputs[0].enable(True)
+    finally:
+        board.close()
+    assert power_sim.received == ['OUT:0:SET:1', 'OUT:0:SET:1']
+
+
+def test_overcurrent_invalidates(power_sim: RecordingPowerBoard, board: PowerBoard) -> None:
+    """An output the firmware turned off is set again after its overcurrent is read."""
+    power_sim.output_limits[0] = 0.1
+    board.outputs[0].enable(True)
+    board.outputs[0].enable(True)
+    assert board.outputs[0].overcurrent()
+    board.outputs[0].enable(True)
+    assert power_sim.received == ['OUT:0:SET:1', '*STATUS?', 'OUT:0:SET:1']
+
+
+def test_reset_invalidates(power_sim: RecordingPowerBoard, board: PowerBoard) -> None:
+    """Resetting the board forgets every value set on it."""
+    board.outputs[0].enable(True)
+    board.reset()
+    board.outputs[0].enable(True)
+    assert power_sim.received == [
+        'OUT:0:SET:1', '*RESET', '*SYS:BRAIN:SET:0', 'OUT:0:SET:1']
+    assert power_sim.outputs[0]
@@ -0,0 +1,51 @@
+"""Tests for reading the power board's state in a single exchange."""
+from __future__ import annotations
+
+import pytest
+from conftest import RecordingPowerBoard
+
+from kit_test.hal import clock
+from kit_test.hal.power_board import PowerBoard
+from kit_test.hal.utils import BoardIdentity
+
+IDENTITY = BoardIdentity('Student Robotics', 'PBv4B', 'SIM-PWR', '4.4')
+
+
+def test_snapshot_values(power_sim: RecordingPowerBoard, power_url: str) -> None:
+    """A snapshot reads the status, every output and the battery together."""
+    power_sim.outputs[0] = True
+    power_sim.overcurrent[3] = True
+    board = PowerBoard(power_url, identity=IDENTITY)
+    try:
+        snapshot = board.snapshot()
+    finally:
+        board.close()
+    assert snapshot.status.overcurrent == (False, False, False, True, False, False, False)
+    assert snapshot.output_currents == pytest.approx(
+        [power_sim.output_current(index) for index in range(7)], abs=0.001)
+    assert snapshot.battery_voltage == pytest.approx(power_sim.battery_voltage)
+    assert power_sim.received[0] == '*STATUS?'
+    assert len(power_sim.received) == 10
+
+
+def test_snapshot_reused(power_sim: RecordingPowerBoard, power_url: str) -> None:
+    """Reads with a max_age share a snapshot until it is too old."""
+    board = PowerBoard(power_url, identity=IDENTITY)
+    try:
+        with clock.use_clock(clock.VirtualClock()):
+            first = board.snapshot()
+            clock.sleep(0.05)
+            board.outputs[1].current(max_age=0.1)
+            board.outputs[2].overcurrent(max_age=0.1)
+            board.battery_sensor.voltage(max_age=0.1)
+            assert board.snapshot(max_age=0.1) is first
+            assert len(power_sim.received) == 10
+
+            clock.sleep(0.1)
+            assert board.snapshot(max_age=0.1) is not first
+            assert len(power_sim.received) == 20
+            # Without a max_age the value is read on its own
+            board.outputs[1].current()
+            assert power_sim.received[-1] == 'OUT:1:I?'
+    finally:
+        board.close()
@@ -0,0 +1,162 @@
+"""Tests for running a board test as concurrent steps."""
+import functools
+import threading
+from typing import List
+
+import pytest
+
+from kit_test.hal.clock import VirtualClock, use_clock
+from kit_test.steps import OPERATOR, Step, StepRunner
+
+
+def test_dependencies_run_first() -> None:
+    """A step only starts once the steps it runs after have finished."""
+    order: List[str] = []
+    runner = StepRunner([
+        Step('check', lambda: order.append('check'), after=['enable']),
+        Step('enable', lambda: order.append('enable')),
+        Step('disable', lambda: order.append('disable'), after=['check']),
+    ])
+    runner.run()
+    assert order == ['enable', 'check', 'disable']
+    assert [timing.name for timing in runner.timings] == order
+
+
+def test_priority_order() -> None:
+    """When steps conflict, the one declared first runs first."""
+    order: List[str] = []
+    runner = StepRunner([
+        Step(name, functools.partial(order.append, name), resources=['output'])
+        for name in ['a', 'b', 'c']
+    ])
+    runner.run()
+    assert order == ['a', 'b', 'c']
+
+
+def test_shared_resources_never_overlap() -> None:
+    """Steps using the same resource run one at a time."""
+    lock = threading.Lock()
+    overlapped = []
+
+    def use_operator() -> None:
+        if not lock.acquire(blocking=False):
+            overlapped.append(True)
+            return
+        try:
+            threading.Event().wait(0.01)
+        finally:
+            lock.release()
+
+    StepRunner([
+        Step(f'prompt{index}', use_operator, resources=[OPERATOR]) for index in range(4)
+    ]).run()
+    assert not overlapped
+
+
+def test_independent_steps_run_concurrently() -> None:
+    """Steps without shared resources run at the same time."""
+    barrier = threading.Barrier(2, timeout=5)
+
+    def meet() -> None:
+        # Times out, failing the step, unless both steps are running
+        barrier.wait()
+
+    StepRunner([
+        Step('a', meet, resources=['output0']),
+        Step('b', meet, resources=['output1']),
+    ]).run()
+
+
+def test_max_concurrent() -> None:
+    """No more than max_concurrent steps run at once."""
+    lock = threading.Lock()
+    running = [0]
+    peak = [0]
+
+    def step() -> None:
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        threading.Event().wait(0.01)
+        with lock:
+            running[0] -= 1
+
+    StepRunner([Step(str(index), step) for index in range(6)], max_concurrent=2).run()
+    assert peak[0] <= 2
+
+
+def test_cycle_detected() -> None:
+    """Steps that depend on each other are reported instead of hanging."""
+    runner = StepRunner([
+        Step('a', lambda: None, after=['b']),
+        Step('b', lambda: None, after=['a']),
+        Step('c', lambda: None),
+    ])
+    with pytest.raises(ValueError, match='circular dependencies: a, b'):
+        runner.run()
+
+
+@pytest.mark.parametrize('steps', [
+    [Step('a', lambda: None), Step('a', lambda: None)],
+    [Step('a', lambda: None, after=['missing'])],
+])
+def test_invalid_steps(steps: List[Step]) -> None:
+    """Duplicate names and unknown dependencies are rejected up front."""
+    with pytest.raises(ValueError):
+        StepRunner(steps)
+
+
+def test_error_stops_later_steps() -> None:
+    """A failed step stops further steps and its error is raised."""
+    ran: List[str] = []
+
+    def fail() -> None:
+        raise AssertionError("failed")
+
+    runner = StepRunner([
+        Step('fail', fail),
+        Step('after', lambda: ran.append('after'), after=['fail']),
+    ])
+    with pytest.raises(AssertionError, match='failed'):
+        runner.run()
+    assert ran == []
+
+
+def test_virtual_clock_catches_up() -> None:
+    """On a virtual clock the runner's time follows the longest chain of steps."""
+    with use_clock(VirtualClock()) as clock:
+        StepRunner([
+            Step('a', lambda: clock.sleep(1.0), resources=['output0']),
+            Step('b', lambda: clock.sleep(2.0), resources=['output1']),
+            Step('c', lambda: clock.sleep(1.5), after=['a']),
+        ]).run()
+        assert clock.monotonic() == pytest.approx(2.5)
+
+
+def test_virtual_clock_serialised_steps() -> None:
+    """Steps sharing a resource start when the previous holder finished."""
+    starts: List[float] = []
+
+    def step() -> None:
+        starts.append(clock.monotonic())
+        clock.sleep(1.0)
+
+    clock = VirtualClock()
+    with use_clock(clock):
+        StepRunner([
+            Step('a', step, resources=['x']),
+            Step('b', step, resources=['x']),
+        ]).run()
+        assert starts == pytest.approx([0.0, 1.0])
+        assert clock.monotonic() == pytest.approx(2.0)
+        assert clock.slept == pytest.approx(2.0)
+
+
+def test_virtual_clock_max_concurrent() -> None:
+    """A step waiting for a free slot starts when a running step finished."""
+    with use_clock(VirtualClock()) as clock:
+        StepRunner(
+            [Step(str(index), lambda: clock.sleep(1.0)) for index in range(3)],
+            max_concurrent=1,
+        ).run()
+        assert clock.monotonic() == pytest.approx(3.0)
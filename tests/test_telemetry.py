@@ -0,0 +1,105 @@
+"""Tests for the time series of sampled measurements."""
+from typing import List
+
+import pytest
+
+from kit_test.hal.clock import VirtualClock, use_clock
+from kit_test.hal.telemetry import TelemetrySampler, TimeSeries
+
+
+def make_series(capacity: int, samples: int) -> TimeSeries:
+    """Create a series with samples of the value 2t at t = 0, 1, 2, ..."""
+    series = TimeSeries('test', capacity)
+    for index in range(samples):
+        series.append(float(index), 2.0 * index)
+    return series
+
+
+def test_capacity_must_be_positive() -> None:
+    """A series that can't hold a sample is rejected."""
+    with pytest.raises(ValueError):
+        TimeSeries('test', 0)
+
+
+def test_ring_buffer_overwrites_oldest() -> None:
+    """Once full, the oldest samples are dropped and the rest stay in order."""
+    series = make_series(capacity=3, samples=5)
+    assert len(series) == 3
+    times, values = series.window(end=10.0)
+    assert list(times) == [2.0, 3.0, 4.0]
+    assert list(values) == [4.0, 6.0, 8.0]
+    assert series.latest() == pytest.approx(8.0)
+
+
+def test_window_duration_and_end() -> None:
+    """A window holds the samples after its start, up to and including its end."""
+    series = make_series(capacity=10, samples=10)
+    times, _ = series.window(duration=3.0, end=7.0)
+    assert list(times) == [5.0, 6.0, 7.0]
+
+
+def test_window_ends_now() -> None:
+    """The window ends at the active clock's time by default."""
+    series = make_series(capacity=10, samples=10)
+    with use_clock(VirtualClock(start=4.0)):
+        times, _ = series.window(duration=2.0)
+    assert list(times) == [3.0, 4.0]
+
+
+def test_statistics() -> None:
+    """The mean, minimum and maximum cover the window."""
+    series = make_series(capacity=10, samples=5)
+    with use_clock(VirtualClock(start=4.0)):
+        assert series.mean() == pytest.approx(4.0)
+        assert series.min(2.0) == pytest.approx(6.0)
+        assert series.max(2.0) == pytest.approx(8.0)
+
+
+def test_slope() -> None:
+    """The slope is fitted in units per second."""
+    series = make_series(capacity=10, samples=5)
+    with use_clock(VirtualClock(start=4.0)):
+        assert series.slope() == pytest.approx(2.0)
+        assert series.slope(2.0) == pytest.approx(2.0)
+
+
+def test_slope_needs_two_times() -> None:
+    """A slope can't be fitted to samples all taken at one time."""
+    series = TimeSeries('test', 5)
+    series.append(1.0, 1.0)
+    series.append(1.0, 2.0)
+    with use_clock(VirtualClock(start=1.0)), pytest.raises(ValueError):
+        series.slope()
+
+
+def test_empty() -> None:
+    """Statistics of no samples are an error, not NaN."""
+    series = make_series(capacity=5, samples=5)
+    series.clear()
+    assert len(series) == 0
+    with pytest.raises(ValueError):
+        series.latest()
+    with use_clock(VirtualClock(start=10.0)), pytest.raises(ValueError):
+        series.mean()
+
+
+def test_sampler_on_virtual_clock() -> None:
+    """On a virtual clock the sampler samples in step with the caller's sleeps."""
+    virtual = VirtualClock()
+    reads: List[float] = []
+
+    def read() -> float:
+        reads.append(virtual.monotonic())
+        return 1.0
+
+    with use_clock(virtual):
+        sampler = TelemetrySampler(rate=8)
+        sampler.add('x', read)
+        with sampler:
+            virtual.sleep(0.5)
+            times, _ = sampler['x'].window(0.5)
+            assert list(times) == pytest.approx([0.125, 0.25, 0.375, 0.5])
+            assert sampler['x'].mean(0.5) == pytest.approx(1.0)
+        # The sampler didn't run ahead of the caller
+        assert len(reads) == 5
+        assert virtual.slept == pytest.approx(0.5)